@@ -2,6 +2,11 @@
 """
 Ponto de entrada principal da aplicação Streamlit "Orçamento Pro".
 Orquestra a UI, o gerenciamento de estado e as chamadas para os outros módulos.
+
+No topo ficam só os módulos da tela de login. Serviços de dados, cálculos e
+PDF são importados por budget_page (e o PDF só ao salvar), para que a
+primeira sessão não espere por eles antes de ver o formulário de login.
+Perfil da inicialização: python -m benchmarks.startup_profile
 """
 import streamlit as st
 import pandas as pd
@@ -9,17 +14,16 @@ from datetime import datetime
 import re
 import json
 import os
-import unicodedata
+import copy
 
 # Importa os módulos da aplicação
 import config
 import storage
 import auth
-import data_services as ds
 import ui_components as ui
-import calculations as calc
-from generate_pdf import generate_proposal_pdf
-from generate_ordem_prototipo import generate_ordem_prototipo_pdf
+import perf
+import warmup
+import budget_fields
 
 # ================== CONFIGURAÇÃO DA PÁGINA E ESTADO INICIAL ==================
 
@@ -71,13 +75,44 @@ def initialize_session_state():
     storage.initialize_session_state_df('df_clientes', config.CLIENTES_FILE, config.COLUNAS_CLIENTES)
     storage.initialize_session_state_df('df_orcamentos', config.ORCAMENTOS_FILE, config.COLUNAS_ORCAMENTOS)
 
+def max_orcamento_number(df: pd.DataFrame) -> int:
+    """Maior número de orçamento (IDs no formato ORC123) presente no DataFrame, ou 0."""
+    if "ID" in df.columns and not df.empty:
+        numeros = df["ID"].astype(str).str.extract(r'ORC(\d+)')[0].dropna().astype(int)
+        if not numeros.empty:
+            return int(numeros.max())
+    return 0
+
 # orcamento_pro/app.py
 
 # ================== LÓGICA DE ORÇAMENTO ==================
+@st.fragment(run_every=1)
+def wait_for_reference_tables():
+    """Progresso do aquecimento das tabelas; ao terminar, roda a página de novo."""
+    if warmup.ready():
+        st.rerun()
+    carregadas, total = warmup.progress()
+    st.progress(carregadas / total if total else 0.0,
+                text=f"Carregando tabelas de referência ({carregadas}/{total})... a página abre sozinha.")
+
 def budget_page():
     """Renderiza a página principal de criação de orçamento."""
+    import data_services as ds
+    import calculations as calc
+    import descriptions
+    import pricing
+    import optimizer
+    import crossover
+    import risk
+
     st.title("📐 Criação de Orçamento")
 
+    # Logo depois do deploy as tabelas ainda podem estar carregando: mostra o progresso em vez de prender o rerun
+    warmup.start()  # normalmente já iniciado na tela de login
+    if not warmup.ready():
+        wait_for_reference_tables()
+        return
+
     # --- Dinâmica de edição: aviso e botão cancelar ---
     editing_id = st.session_state.get('editing_id')
     if editing_id:
@@ -96,22 +131,12 @@ def budget_page():
         if not row.empty:
             row = row.iloc[0]
             # Use sempre os dados da última versão salva, se houver
-            versoes_json = row.get("VersoesJSON", "[]")
-            try:
-                versoes = json.loads(versoes_json)
-                if versoes and isinstance(versoes, list):
-                    last_version = versoes[-1]["data"] if "data" in versoes[-1] else None
-                else:
-                    last_version = None
-            except Exception:
-                last_version = None
+            versoes = budget_fields.versoes(row)
+            last_version = versoes[-1].get("data") if versoes and isinstance(versoes[-1], dict) else None
 
             dados_orcamento = last_version if last_version else row.to_dict()
-            # Carrega selecoes do orçamento salvo
-            try:
-                selecoes = json.loads(dados_orcamento.get("SelecoesJSON", "{}"))
-            except Exception:
-                selecoes = {}
+            # Carrega selecoes do orçamento salvo (cópia: os valores vão para o session_state)
+            selecoes = copy.deepcopy(budget_fields.selecoes(dados_orcamento))
 
             # Limpa todos os campos de seleção de componentes antes de preencher
             for key in list(st.session_state.keys()):
@@ -143,25 +168,34 @@ def budget_page():
                 if key.startswith(('cd_', 'mat_cost_', 'serv_cost_', 'paper_', 'util_', 'rings_', 'vu_')):
                     st.session_state[key] = selecoes[key]
 
-            st.session_state['ajustes'] = json.loads(dados_orcamento.get('AjustesJSON', '[]'))
+            st.session_state['ajustes'] = copy.deepcopy(budget_fields.ajustes(dados_orcamento))
             st.session_state['edit_loaded'] = True
 
+    # --- Configuração de capa escolhida na busca da capa mais barata (aplicada antes dos widgets) ---
+    capa_pendente = st.session_state.pop('_capa_pendente', None)
+    if capa_pendente:
+        st.session_state['sel_capa_papel'], st.session_state['sel_capa_impressao'], st.session_state['selected_laminacao'] = capa_pendente
+
     # --- Carregar todos os dados externos ---
-    try:
-        df_paper = ds.load_paper_purchases()
-        df_miolos = ds.load_component_data(config.URL_USO_PAPEL_MIOLO, ['Miolo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_bolsas = ds.load_component_data(config.URL_USO_PAPEL_BOLSA, ['Bolsa', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_divisorias = ds.load_component_data(config.URL_USO_PAPEL_DIVISORIA, ['Divisoria', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_adesivos = ds.load_component_data(config.URL_USO_PAPEL_ADESIVO, ['Adesivo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_guarda_forro = ds.load_component_data(config.URL_GUARDA_FORRO, ['Item', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_guarda_verso = ds.load_component_data(config.URL_GUARDA_VERSO, ['GuardaVerso', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        direct_purchases_cats = ds.load_direct_purchases()
-        wireo_map = ds.load_wireo_table()
-        df_mod_ggf = ds.load_mod_ggf_data()
-        paper_options = sorted(df_paper['PapelLimpo'].dropna().unique())
-    except Exception as e:
-        st.error(f"❌ Erro fatal ao carregar dados externos: {e}")
-        st.stop()
+    with perf.span("orcamento.carregar_dados"):
+        try:
+            df_paper = ds.load_paper_purchases()
+            paper_index = ds.load_paper_index()
+            paper_yield_index = ds.load_paper_yield_index()
+            paper_price_book = ds.load_paper_price_book()
+            df_miolos = ds.load_component_table('Miolo')
+            df_bolsas = ds.load_component_table('Bolsa')
+            df_divisorias = ds.load_component_table('Divisoria')
+            df_adesivos = ds.load_component_table('Adesivo')
+            df_guarda_forro = ds.load_component_table('Item')
+            df_guarda_verso = ds.load_component_table('GuardaVerso')
+            direct_purchases_cats = ds.load_direct_purchases()
+            wireo_map = ds.load_wireo_table()
+            df_mod_ggf = ds.load_mod_ggf_data()
+            paper_options = sorted(df_paper['PapelLimpo'].dropna().unique())
+        except Exception as e:
+            st.error(f"❌ Erro fatal ao carregar dados externos: {e}")
+            st.stop()
 
     # --- LÓGICA DE TEMPLATES ---
     st.header("Modelo de Orçamento")
@@ -189,15 +223,35 @@ def budget_page():
         value=st.session_state.get('budget_quantity', 15000),
         step=100
     )
+    # Estratégia de preço de compra (papéis e aviamentos); trocar é só uma consulta na tabela de preços
+    estrategia_options = list(pricing.ESTRATEGIAS)
+    if st.session_state.get('sel_estrategia_preco') not in estrategia_options:
+        st.session_state['sel_estrategia_preco'] = config.PRECO_ESTRATEGIA_PADRAO
+    estrategia_preco = col2.selectbox(
+        "Preço de compra",
+        options=estrategia_options,
+        format_func=pricing.ESTRATEGIAS.get,
+        key="sel_estrategia_preco"
+    )
+    paper_price_book = paper_price_book.with_strategy(estrategia_preco)
+    direct_purchases_cats = ds.apply_price_strategy(direct_purchases_cats, estrategia_preco)
 
     st.divider()
 
-    all_costs = []
+    all_costs = []  # lista de calc.CostLine
     direct_purchases_render = direct_purchases_cats.copy()
     direct_purchases_render.pop("COURO", None)
 
+    # --- Função Auxiliar para Adicionar Custos ---
+    def add_cost_lines(result, label):
+        """Acrescenta as linhas de custo não nulas de um cálculo ou mostra o erro."""
+        if result and not result.get("error"):
+            all_costs.extend(line for line in result.get("lines", []) if line.unit_cost > 0)
+        elif result and result.get("error"):
+            st.error(f"{label}: {result['error']}")
+
     # --- Lógica da Capa ---
-    with st.container(border=True):
+    with st.container(border=True), perf.span("orcamento.capa"):
         st.markdown("### 📕 Capa")
         # Corrige conflito de Session State e valor default do selectbox
         produto_options = [""] + sorted(config.PRODUTOS_BASE)
@@ -240,110 +294,134 @@ def budget_page():
             else:
                 # Se o produto for Policromia, mostra todos os papéis do CSV; senão, pode restringir conforme desejado
                 if "POLICROMIA" in selected_product.upper():
-                    paper_cover_options = list(paper_options)
+                    # Mais baratos por capa primeiro (rendimento pré-calculado na carga)
+                    paper_cover_options = ds.rank_papers_by_cover_cost(paper_options, paper_yield_index, selected_product, paper_price_book)
                 else:
                     paper_cover_options = []  # Aqui você pode definir outro filtro se quiser, ou deixar vazio
+                base_product_capa = calc.base_product_name(selected_product)
+
+                def format_paper_cover(paper):
+                    spec = paper_index.get(paper)
+                    if spec is not None and not spec.has_dimensions:
+                        return f"{paper} · ⚠️ sem dimensões no cadastro (não serve para digital/laminação)"
+                    y = paper_yield_index.get((paper, base_product_capa))
+                    custo_capa = ds.paper_cost_per_cover(y, paper_price_book)
+                    if custo_capa is None:
+                        return paper
+                    return f"{paper} · {y.capas_por_folha} capas/folha · R$ {custo_capa:.3f}/capa"
+
                 c1, c2 = st.columns(2)
-                selected_paper_cover = c1.selectbox("Papel da capa", options=[""] + sorted(paper_cover_options), key="sel_capa_papel")
+                selected_paper_cover = c1.selectbox("Papel da capa", options=[""] + paper_cover_options, key="sel_capa_papel", format_func=format_paper_cover)
                 impression_options = ["", "Offset", "Digital 4/0", "Digital 4/1", "Digital 1/0", "Digital 1/1"]
                 impression_type = c2.selectbox("Tipo de Impressão", options=impression_options, key="sel_capa_impressao")
+                if paper_cover_options:
+                    with st.expander("🔎 Buscar a capa mais barata"):
+                        variar_laminacao = st.checkbox("Incluir variação de laminação", key="busca_capa_variar_laminacao")
+                        chave_busca = (selected_product, budget_quantity, estrategia_preco, selected_laminacao, variar_laminacao)
+                        if st.button("Buscar", key="btn_busca_capa"):
+                            impression_url = config.CSV_MAP_IMPRESSAO.get(calc.base_product_name(selected_product))
+                            st.session_state['_busca_capa'] = (chave_busca, optimizer.find_cheapest_covers(
+                                selected_product, budget_quantity, paper_cover_options, df_paper,
+                                paper_index, paper_yield_index, paper_price_book,
+                                impression_steps=ds.load_impression_steps(impression_url) if impression_url else None,
+                                laminacoes=optimizer.LAMINACOES if variar_laminacao else (selected_laminacao,)
+                            ))
+                        busca = st.session_state.get('_busca_capa')
+                        if busca and busca[0] == chave_busca:
+                            resultado = busca[1]
+                            st.caption(f"{resultado.avaliadas} combinações avaliadas, {resultado.descartadas} inviáveis (papel sem compras ou sem dimensões no cadastro).")
+                            if resultado.options:
+                                st.dataframe(
+                                    optimizer.options_to_frame(resultado.options), width='stretch', hide_index=True,
+                                    column_config={c: st.column_config.NumberColumn(format="R$ %.4f") for c in (
+                                        "Papel (R$/un)", "Impressão (R$/un)", "Laminação (R$/un)", "Total capa (R$/un)")}
+                                )
+                                escolha = st.selectbox(
+                                    "Opção", options=range(len(resultado.options)), key="busca_capa_escolha",
+                                    format_func=lambda i: f"{i + 1}. {resultado.options[i].paper} · {resultado.options[i].impression} · {resultado.options[i].laminacao}"
+                                )
+                                if st.button("Aplicar ao orçamento", key="btn_aplica_capa"):
+                                    opcao = resultado.options[escolha]
+                                    st.session_state['_capa_pendente'] = (opcao.paper, opcao.impression, opcao.laminacao)
+                                    st.rerun()
+                            else:
+                                st.warning("⚠️ Nenhuma configuração viável encontrada para este produto.")
+                impression_url_capa = config.CSV_MAP_IMPRESSAO.get(base_product_capa)
+                paper_yield_capa = paper_yield_index.get((selected_paper_cover, base_product_capa))
+                if selected_paper_cover and impression_url_capa and paper_yield_capa is not None:
+                    with st.expander("📈 Offset x Digital por quantidade"):
+                        digital_type = impression_type if "Digital" in (impression_type or "") else "Digital 4/0"
+                        steps_capa = ds.load_impression_steps(impression_url_capa)
+                        preco_folha_capa = paper_price_book.price(selected_paper_cover)
+                        virada = None
+                        if preco_folha_capa is not None and not steps_capa.empty:
+                            virada = crossover.find_crossovers(
+                                selected_product, selected_paper_cover, steps_capa, paper_yield_capa, preco_folha_capa,
+                                digital_type=digital_type, laminacao=selected_laminacao != "Nenhum",
+                                q_min=100, q_max=max(int(steps_capa.laminas[-1]), budget_quantity)
+                            )
+                        if virada is None:
+                            st.info("Não é possível comparar Offset e Digital para este papel.")
+                        else:
+                            faixa_atual = next((f for f in virada.faixas if f.inicio <= budget_quantity <= f.fim), None)
+                            if faixa_atual:
+                                st.caption(f"Para {budget_quantity} un, o mais barato é **{faixa_atual.metodo}**.")
+                            st.dataframe(
+                                crossover.faixas_to_frame(virada), width='stretch', hide_index=True,
+                                column_config={c: st.column_config.NumberColumn(format="R$ %.4f") for c in (
+                                    "Custo capa no início (R$/un)", "Custo capa no fim (R$/un)")}
+                            )
+                            # Abaixo do primeiro degrau o Offset cobra a tiragem mínima e distorce o gráfico
+                            visivel = virada.quantidades >= steps_capa.laminas[0]
+                            st.line_chart(pd.DataFrame({
+                                "Offset": virada.custo_offset_unit[visivel],
+                                virada.metodo_digital: virada.custo_digital_unit[visivel],
+                            }, index=pd.Index(virada.quantidades[visivel], name="Quantidade")))
+                if selected_paper_cover in paper_price_book.table.index:
+                    with st.expander("Comparar estratégias de preço do papel"):
+                        comparativo = paper_price_book.table.loc[selected_paper_cover, list(pricing.ESTRATEGIAS)]
+                        st.dataframe(
+                            comparativo.rename(pricing.ESTRATEGIAS).astype(float).to_frame("R$ por folha"),
+                            width='stretch',
+                            column_config={"R$ por folha": st.column_config.NumberColumn(format="R$ %.4f")}
+                        )
                 if selected_paper_cover and impression_type:
                     product_base = selected_product.replace(" - POLICROMIA", "")
                     if "Offset" in impression_type:
                         impression_url = config.CSV_MAP_IMPRESSAO.get(product_base)
                         if impression_url:
-                            df_impression = ds.load_impression_table(impression_url)
-                            cover_cost_result = calc.calculate_offset_cover_cost(product_base, budget_quantity, selected_paper_cover, df_paper, df_impression)
+                            impression_steps = ds.load_impression_steps(impression_url)
+                            cover_cost_result = calc.calculate_offset_cover_cost(product_base, budget_quantity, selected_paper_cover, df_paper, impression_steps, price_book=paper_price_book)
                     elif "Digital" in impression_type:
-                        cover_cost_result = calc.calculate_digital_cover_cost(selected_product, selected_paper_cover, impression_type, budget_quantity, df_paper)
-            if cover_cost_result and not cover_cost_result.get("error"):
-                paper_cost = cover_cost_result.get("paper_cost_unit", 0)
-                if paper_cost > 0:
-                    all_costs.append({"name": "Capa - Papel/Material", "cost": paper_cost, "details": cover_cost_result.get('paper_name', 'N/A'), "category": "Papel/Material"})
-                service_cost = cover_cost_result.get("service_cost_unit", 0)
-                if service_cost > 0:
-                    all_costs.append({"name": "Capa - Impressão", "cost": service_cost, "details": "Serviço de impressão da capa", "category": "Impressão/Serviços"})
-            elif cover_cost_result and cover_cost_result.get("error"):
-                st.error(f"Capa: {cover_cost_result['error']}")
-
-    # --- NOVO: Adiciona o custo do Hot Stamping à lista ---
-    if selected_hot_stamping != "Nenhum":
-        hot_stamping_cost_result = calc.calculate_hot_stamping_cost(selected_hot_stamping, budget_quantity)
-        if hot_stamping_cost_result and not hot_stamping_cost_result.get("error"):
-            cost = hot_stamping_cost_result.get("total_cost_unit", 0)
-            if cost > 0:
-                all_costs.append({
-                    "name": "Acabamento - Hot Stamping",
-                    "cost": cost,
-                    "details": hot_stamping_cost_result.get("details", "Acabamento - Hot Stamping"),
-                    "category": "Impressão/Serviços"
-                })
-        elif hot_stamping_cost_result and hot_stamping_cost_result.get("error"):
-            st.error(f"Hot Stamping: {hot_stamping_cost_result['error']}")
-
-    # --- NOVO: Adiciona o custo de Laminação à lista ---
-    if selected_laminacao != "Nenhum" and cover_cost_result and not cover_cost_result.get("error"):
-        if "Digital" in impression_type:
-            lamination_cost_result = calc.calculate_lamination_cost(
-                impression_type,
-                selected_paper_cover,
-                budget_quantity,
-                df_paper,
-                digital_sheets=cover_cost_result.get("folhas_uteis_necessarias"),
-                product_name=selected_product
-            )
-        else:  # Offset
-            lamination_cost_result = calc.calculate_lamination_cost(
-                impression_type,
-                selected_paper_cover,
-                budget_quantity,
-                df_paper,
-                offset_sheets=cover_cost_result.get("quantity"),
-                product_name=selected_product
+                        cover_cost_result = calc.calculate_digital_cover_cost(
+                            selected_product, selected_paper_cover, impression_type, budget_quantity, df_paper,
+                            paper_yield=paper_yield_index.get((selected_paper_cover, base_product_capa)),
+                            price_book=paper_price_book
+                        )
+            add_cost_lines(cover_cost_result, "Capa")
+
+    with perf.span("orcamento.acabamentos"):
+        # --- NOVO: Adiciona o custo do Hot Stamping à lista ---
+        if selected_hot_stamping != "Nenhum":
+            hot_stamping_cost_result = calc.calculate_hot_stamping_cost(selected_hot_stamping, budget_quantity)
+            add_cost_lines(hot_stamping_cost_result, "Hot Stamping")
+
+        # --- NOVO: Adiciona o custo de Laminação à lista ---
+        if selected_laminacao != "Nenhum" and cover_cost_result and not cover_cost_result.get("error"):
+            lamination_cost_result = calc.calculate_cover_lamination_cost(
+                cover_cost_result, impression_type, selected_paper_cover, budget_quantity, df_paper,
+                product_name=selected_product, paper_spec=paper_index.get(selected_paper_cover)
             )
-        if lamination_cost_result and not lamination_cost_result.get("error"):
-            cost = lamination_cost_result.get("total_cost_unit", 0)
-            if cost > 0:
-                all_costs.append({
-                    "name": "Acabamento - Laminação",
-                    "cost": cost,
-                    "details": lamination_cost_result.get("details", ""),
-                    "category": "Impressão/Serviços"
-                })
-        elif lamination_cost_result and lamination_cost_result.get("error"):
-            st.error(f"Laminação: {lamination_cost_result['error']}")
-
-    # --- NOVO: Adiciona o custo de Silk à lista ---
-    if selected_silk != "Nenhum":
-        silk_cost_result = calc.calculate_silk_cost(selected_silk, budget_quantity)
-        if silk_cost_result and not silk_cost_result.get("error"):
-            cost = silk_cost_result.get("total_cost_unit", 0)
-            if cost > 0:
-                all_costs.append({
-                    "name": f"Acabamento - Silk {selected_silk}",
-                    "cost": cost,
-                    "details": silk_cost_result.get("details", ""),
-                    "category": "Impressão/Serviços"
-                })
-        elif silk_cost_result and silk_cost_result.get("error"):
-            st.error(f"Silk: {silk_cost_result['error']}")
+            add_cost_lines(lamination_cost_result, "Laminação")
 
-    # --- Função Auxiliar para Adicionar Custos ---
-    def add_component_costs_to_list(result, selection_dict):
-        if result and not result.get("error"):
-            paper_cost = result.get("paper_cost_unit", 0)
-            if paper_cost > 0:
-                paper_name = selection_dict.get("paper", "Material Personalizado") if selection_dict["selection"] == "Personalizado" else result.get('paper_name')
-                all_costs.append({"name": f"{selection_dict['selection']} - Material", "cost": paper_cost, "details": f"Papel: {paper_name}", "category": "Papel/Material"})
-            service_cost = result.get("service_cost_unit", 0)
-            if service_cost > 0:
-                all_costs.append({"name": f"{selection_dict['selection']} - Serviço", "cost": service_cost, "details": "Custo de serviço do componente", "category": "Impressão/Serviços"})
-        elif result and result.get("error"):
-            st.error(f"{selection_dict['selection']}: {result['error']}")
+        # --- NOVO: Adiciona o custo de Silk à lista ---
+        if selected_silk != "Nenhum":
+            silk_cost_result = calc.calculate_silk_cost(selected_silk, budget_quantity)
+            add_cost_lines(silk_cost_result, "Silk")
 
     # --- Renderização dos Componentes e Compras Diretas ---
     col_comp, col_cd = st.columns(2)
-    with col_comp:
+    with col_comp, perf.span("orcamento.componentes"):
         with st.container(border=True):
             st.markdown("### 📄 Componentes Adicionais")
             
@@ -364,11 +442,11 @@ def budget_page():
                 comp_cost_result = None
                 if selection["selection"] == "Personalizado":
                     if selection.get("total_material_cost", 0) > 0 or selection.get("total_service_cost", 0) > 0:
-                        comp_cost_result = calc.calculate_custom_component_cost(total_material_cost=selection["total_material_cost"], total_service_cost=selection["total_service_cost"], budget_quantity=budget_quantity)
+                        comp_cost_result = calc.calculate_custom_component_cost(total_material_cost=selection["total_material_cost"], total_service_cost=selection["total_service_cost"], budget_quantity=budget_quantity, material_name=selection.get("paper", "Material Personalizado"))
                 elif selection["selection"] != "Nenhum":
-                    comp_cost_result = calc.calculate_component_cost(selection["selection"], config_data["df"], df_paper, budget_quantity, config_data["col"])
+                    comp_cost_result = calc.calculate_component_cost(selection["selection"], config_data["df"], df_paper, budget_quantity, config_data["col"], price_book=paper_price_book)
                 
-                add_component_costs_to_list(comp_cost_result, selection)
+                add_cost_lines(comp_cost_result, selection["selection"])
                 st.divider()
 
             if selection_guarda_frente and "guarda" in selection_guarda_frente["selection"].lower():
@@ -376,25 +454,19 @@ def budget_page():
                 comp_cost_result_gv = None
                 if selection_gv["selection"] == "Personalizado":
                     if selection_gv.get("total_material_cost", 0) > 0 or selection_gv.get("total_service_cost", 0) > 0:
-                       comp_cost_result_gv = calc.calculate_custom_component_cost(total_material_cost=selection_gv["total_material_cost"], total_service_cost=selection_gv["total_service_cost"], budget_quantity=budget_quantity)
+                       comp_cost_result_gv = calc.calculate_custom_component_cost(total_material_cost=selection_gv["total_material_cost"], total_service_cost=selection_gv["total_service_cost"], budget_quantity=budget_quantity, material_name=selection_gv.get("paper", "Material Personalizado"))
                 elif selection_gv["selection"] != "Nenhum":
-                    comp_cost_result_gv = calc.calculate_component_cost(selection_gv["selection"], df_guarda_verso, df_paper, budget_quantity, "GuardaVerso")
+                    comp_cost_result_gv = calc.calculate_component_cost(selection_gv["selection"], df_guarda_verso, df_paper, budget_quantity, "GuardaVerso", price_book=paper_price_book)
                 
-                add_component_costs_to_list(comp_cost_result_gv, selection_gv)
+                add_cost_lines(comp_cost_result_gv, selection_gv["selection"])
 
-    with col_cd:
+    with col_cd, perf.span("orcamento.compras_diretas"):
         with st.container(border=True):
             st.markdown("### 🔧 Compras Diretas (Aviamentos)")
             for category, items in sorted(direct_purchases_render.items()):
-                cost_info = ui.render_direct_purchase_selector(category, items, wireo_map)
-                if cost_info["cost"] > 0:
-                    all_costs.append({
-                        "name": category,
-                        "cost": cost_info["cost"],
-                        "details": cost_info["details"],
-                        "category": "Aviamentos",
-                        "aproveitamento": cost_info.get("util", 1)  # Pega o aproveitamento do cost_info
-                    })
+                cost_info = ui.render_direct_purchase_selector(category, items, wireo_map, budget_quantity)
+                if cost_info["line"] is not None:
+                    all_costs.append(cost_info["line"])
 
     # --- Lógica de MOD e GGF ---
     if selected_product and not df_mod_ggf.empty:
@@ -402,7 +474,7 @@ def budget_page():
             produto_padronizado = re.sub(r'\s+', ' ', selected_product.strip().upper())
             custos_extras = df_mod_ggf.loc[produto_padronizado]
             mod_ggf_cost = custos_extras['MOD+GGF']
-            all_costs.append({"name": "MOD + GGF", "cost": mod_ggf_cost, "details": "Custo combinado", "category": "MOD+GGF"})
+            all_costs.append(calc.CostLine("MOD + GGF", calc.CATEGORIA_MOD_GGF, mod_ggf_cost, budget_quantity, "un", "Custo combinado"))
         except KeyError:
             st.warning(f"⚠️ Produto '{selected_product}' não encontrado na tabela de custos MOD/GGF.")
 
@@ -440,16 +512,15 @@ def budget_page():
     st.subheader("💰 Resumo Financeiro")
 
     if all_costs:
-        custo_componentes = sum(item['cost'] for item in all_costs)
+        cost_df = calc.cost_lines_to_frame(all_costs)
+        custo_componentes = cost_df["unit_cost"].sum()
         
         with st.container(border=True):
             st.markdown("##### Resumo de Custos por Categoria")
-            categorias_custo = {
-                "Papel/Material": sum(c['cost'] for c in all_costs if c.get("category") == "Papel/Material"),
-                "Impressão/Serviços": sum(c['cost'] for c in all_costs if c.get("category") == "Impressão/Serviços"),
-                "Aviamentos": sum(c['cost'] for c in all_costs if c.get("category") == "Aviamentos"),
-                "MOD+GGF": sum(c['cost'] for c in all_costs if c.get("category") == "MOD+GGF")
-            }
+            categorias_custo = cost_df.groupby("category")["unit_cost"].sum().reindex(
+                [calc.CATEGORIA_MATERIAL, calc.CATEGORIA_SERVICOS, calc.CATEGORIA_AVIAMENTOS, calc.CATEGORIA_MOD_GGF],
+                fill_value=0.0
+            )
             c1, c2, c3, c4 = st.columns(4)
             c1.metric("Papel/Material", f"R$ {categorias_custo['Papel/Material']:,.2f}")
             c2.metric("Impressão/Serviços", f"R$ {categorias_custo['Impressão/Serviços']:,.2f}")
@@ -477,100 +548,32 @@ def budget_page():
                             st.session_state.ajustes.pop(i)
         
         # Detalhes dos Custos
-        with st.expander("Ver detalhes do custo"):
-            # Adiciona coluna de quantidade
-            cost_rows = []
-            for item in all_costs:
-                quantidade = None
-                # CAPA
-                if item["name"].startswith("Capa"):
-                    if "Impressão" in item["name"]:
-                        quantidade = budget_quantity
-                    else:
-                        quantidade = cover_cost_result.get("quantity", budget_quantity)
-                # Componentes Miolo, Guarda, Bolsa, Divisoria, Adesivo, Forro
-                elif (
-                    "Miolo" in item["name"]
-                    or "Bolsa" in item["name"]
-                    or "Divisória" in item["name"]
-                    or "Adesivo" in item["name"]
-                    or "GUARDA FRENTE" in item["name"]
-                    or "GUARDA VERSO" in item["name"]
-                    or "Forro" in item["name"]
-                    or "MIOLO" in item["name"]
-                    or "BOLSA" in item["name"]
-                    or "Divisoria" in item["name"]
-                    or "ADESIVO" in item["name"]
-                    or "FORRO" in item["name"]
-                    or "DIVISORIA" in item["name"]
-                ):
-                    # Para componentes padrão (não personalizados), a quantidade é sempre a quantidade do orçamento
-                    # O cálculo complexo só deve ser aplicado para itens personalizados
-                    quantidade = budget_quantity
-                # Aviamentos, incluindo Rebite
-                else:
-                    def normalize(s):
-                        return unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('ASCII').lower()
-                    aviamentos = [
-                        "elastico", "fita de cetim", "papelao", "ilhos", "ferragem",
-                        "rebite", "rebites", "pendente", "saco adesivado", "wire-o"
-                    ]
-                    name_norm = normalize(item["name"])
-                    if any(av in name_norm for av in aviamentos):
-                        aproveitamento = item.get("aproveitamento", 1)
-                        quantidade = aproveitamento * budget_quantity
-                    elif "MOD + GGF" in item["name"]:
-                        quantidade = budget_quantity
-                    elif "Acabamento - Hot Stamping" in item["name"]:
-                        quantidade = budget_quantity
-                    elif "Acabamento - Laminação" in item["name"]:
-                        quantidade = budget_quantity
-                    elif "Acabamento - Silk" in item["name"]:
-                        quantidade = budget_quantity
-                    else:
-                        quantidade = ""
-                row = item.copy()
-                row["Quantidade"] = quantidade
-                cost_rows.append(row)
-            # Reordena colunas: name, Quantidade, cost, details
-            cost_df = pd.DataFrame(cost_rows)
-            cols = ["name", "Quantidade", "cost", "details"]
-            cost_df = cost_df[[c for c in cols if c in cost_df.columns]]
-            if "cost" in cost_df.columns:
-                cost_df["cost"] = cost_df["cost"].round(2)
-            if "Quantidade" in cost_df.columns:
-                # NOVO: mostra casas decimais para Couro Sintético, inteiro para os demais
-                def round_quantidade(row):
-                    try:
-                        val = row["Quantidade"]
-                        # Se for None, vazio ou não numérico, retorna como está
-                        if val is None or (isinstance(val, str) and not val.replace('.', '', 1).isdigit()):
-                            return val
-                        val = float(val)
-                        if "Capa - Papel/Material" in row["name"] and cover_cost_result and "COURO SINTÉTICO" in str(cover_cost_result.get("details", "")):
-                            return round(val, 2)
-                        if cover_cost_result and "COURO SINTÉTICO" in str(cover_cost_result.get("details", "")) and row["name"].startswith("Capa"):
-                            return round(val, 2)
-                        return round(val, 0)
-                    except Exception:
-                        return row["Quantidade"]
-                cost_df["Quantidade"] = cost_df.apply(round_quantidade, axis=1)
-            cost_df = cost_df.copy()
-            for col in cost_df.columns:
-                # Se a coluna for object, tenta converter para número, senão converte para string
-                if cost_df[col].dtype == "object":
-                    try:
-                        cost_df[col] = pd.to_numeric(cost_df[col])
-                    except Exception:
-                        cost_df[col] = cost_df[col].astype(str)
+        with st.expander("Ver detalhes do custo"), perf.span("orcamento.detalhes_custo"):
+            # Quantidades já vêm de cada linha de custo; m² com 2 casas, o resto inteiro
+            detalhes_df = cost_df.drop(columns=["category"])
+            detalhes_df["quantity"] = detalhes_df["quantity"].where(
+                detalhes_df["unit"] == "m²", detalhes_df["quantity"].round(0)
+            ).round(2)
+            detalhes_df["unit_cost"] = detalhes_df["unit_cost"].round(2)
             st.dataframe(
-                cost_df.drop(columns=['category'], errors='ignore'),
+                detalhes_df,
                 width='stretch',
+                hide_index=True,
                 column_config={
-                    "cost": st.column_config.NumberColumn("Custo Unitário (R$)", format="R$ %.2f"),
-                    "Quantidade": st.column_config.NumberColumn("Quantidade", format="%.0f")
+                    "component": "Componente",
+                    "quantity": st.column_config.NumberColumn("Quantidade"),
+                    "unit": "Unidade",
+                    "unit_cost": st.column_config.NumberColumn("Custo Unitário (R$)", format="R$ %.2f"),
+                    "details": "Detalhes"
                 }
             )
+            if cover_cost_result and cover_cost_result.get("layout_capas"):
+                st.caption(
+                    f"Imposição da capa: {cover_cost_result['layout_capas'].describe()} · "
+                    f"folha útil no papel: {cover_cost_result['layout_papel'].describe()}"
+                )
+            if cover_cost_result and cover_cost_result.get("roll_plan"):
+                st.caption(f"Encaixe no rolo de couro: {cover_cost_result['details']} · bloco: {cover_cost_result['roll_plan'].period_layout.describe()}")
 
         # Cálculos Finais e Exibição de Métricas
         ajuste_total_valor = sum(item['valor'] for item in st.session_state.ajustes)
@@ -582,37 +585,59 @@ def budget_page():
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("##### Definição de Preço")
-            markup = st.number_input("Markup", min_value=1.0, value=2.0, step=0.1)
+            markup = st.number_input("Markup", min_value=1.0, value=config.MARKUP_PADRAO, step=0.1)
         with col2:
             st.markdown("##### Comissões")
-            comissao_vendedor = st.number_input("Comissão Vendedor (%)", min_value=0.0, value=1.5, step=0.1)
-            comissao_promotor = st.number_input("Comissão Promotor (%)", min_value=0.0, value=1.7, step=0.1)
+            comissao_vendedor = st.number_input("Comissão Vendedor (%)", min_value=0.0, value=config.COMISSAO_VENDEDOR_PADRAO, step=0.1)
+            comissao_promotor = st.number_input("Comissão Promotor (%)", min_value=0.0, value=config.COMISSAO_PROMOTOR_PADRAO, step=0.1)
         
         total_comissao_percent = comissao_vendedor + comissao_promotor
         # CORREÇÃO: As comissões não devem alterar o custo, apenas o preço de venda
-        preco_base = custo_ajustado * markup  # Preço base sem comissões
-        
-        # Validação para evitar divisão por zero ou valores inválidos
-        if total_comissao_percent >= 100:
-            st.error("⚠️ Total de comissões não pode ser 100% ou mais!")
-            preco_venda = preco_base
-        else:
-            preco_venda = preco_base / (1 - total_comissao_percent / 100)  # Preço final incluindo comissões
+        preco = calc.calculate_sale_price(custo_ajustado, markup, total_comissao_percent)
+        if preco["error"]:
+            st.error(f"⚠️ {preco['error']}")
+        preco_venda = preco["preco_venda"]
         
         # Exibe o custo inalterado e o preço de venda com comissões
         st.metric("Custo Final (Inalterado)", f"R$ {custo_ajustado:,.2f}".replace('.', ','))
         st.metric("Preço de Venda Unitário Sugerido (com comissões)", f"R$ {preco_venda:,.2f}".replace('.', ','))
+
+        # Risco de preço de compra: reprecifica o orçamento com preços sorteados do histórico
+        with st.expander("🎲 Risco de preço de compra"), perf.span("orcamento.risco"):
+            try:
+                risco = risk.simulate_quote(all_costs, ds.load_price_histories(), fixed_extra=ajuste_total_valor)
+            except Exception as e:
+                st.error(f"❌ Não foi possível simular o risco de preço: {e}")
+                risco = None
+            if risco is not None and not risco.itens:
+                st.info("Nenhum item do orçamento tem histórico de compras para simular.")
+            elif risco is not None:
+                markup_risco = risco.markup_sugerido(markup)
+                r1, r2, r3 = st.columns(3)
+                r1.metric("Custo P50", f"R$ {risco.p50:,.2f}".replace('.', ','))
+                r2.metric(f"Custo P{risco.percentil}", f"R$ {risco.p_risco:,.2f}".replace('.', ','),
+                          delta=f"{(risco.p_risco / risco.custo_cotado - 1) * 100:+.1f}% sobre o cotado", delta_color="inverse")
+                r3.metric("Markup sugerido", f"{markup_risco:.2f}".replace('.', ','),
+                          delta=f"{markup_risco - markup:+.2f}" if round(markup_risco - markup, 2) > 0 else None)
+                st.caption(
+                    f"{risco.simulacoes:,} simulações".replace(',', '.') + " sorteando cada preço entre as últimas "
+                    f"{config.RISCO_JANELA_COMPRAS} compras do item. O markup sugerido mantém, no P{risco.percentil}, "
+                    f"a margem que o markup atual dá sobre o custo cotado."
+                )
+                st.dataframe(
+                    risk.items_to_frame(risco), width='stretch', hide_index=True,
+                    column_config={c: st.column_config.NumberColumn(format="R$ %.4f") for c in (
+                        "Preço cotado (R$)", "Mín. histórico (R$)", "Máx. histórico (R$)", "Custo cotado (R$/un)")}
+                )
+                if risco.sem_historico:
+                    st.caption("Sem histórico (custo fixo na simulação): " + ", ".join(risco.sem_historico))
         st.divider()
-        
-        from generate_pdf import generate_proposal_pdf
-        import os
-                
-        from collections import defaultdict
 
         if st.button("💾 Salvar e Gerar Proposta de Orçamento"):
             if not selected_client or not selected_product:
                 st.warning("Selecione um cliente e um produto para salvar o orçamento.")
             else:
+                from generate_pdf import generate_proposal_pdf
                 validade_orcamento = "10 dias"
                 prazo_entrega = "15 dias"
 
@@ -621,39 +646,10 @@ def budget_page():
                 razao_social = cliente_row["Razao Social"].values[0] if not cliente_row.empty else selected_client
                 contato_cliente = cliente_row["Contato"].values[0] if not cliente_row.empty else ""
 
-                # Agrupamento e descrição dos componentes (igual ao seu código)
-                grupos = defaultdict(list)
-                for item in all_costs:
-                    nome = item.get("name", "").strip()
-                    detalhes = item.get("details", "")
-                    nome_lower = nome.lower()
-                    if "mod + ggf" in nome_lower:
-                        continue
-                    if nome_lower.startswith("capa"):
-                        grupos["Capa"].append(f"{nome}: {detalhes}")
-                    elif nome_lower.startswith("guarda"):
-                        grupos["Guarda"].append(f"{nome}: {detalhes}")
-                    elif nome_lower.startswith("miolo"):
-                        grupos["Miolo"].append(f"{nome}: {detalhes}")
-                    elif nome_lower.startswith("acabamento"):
-                        grupos["Acabamento"].append(f"{nome}: {detalhes}")
-                    elif nome_lower.startswith("bolsa") or nome_lower.startswith("servico de terceiro - bolsa"):
-                        grupos["Bolsa"].append(f"{nome}: {detalhes}")
-                    else:
-                        grupos[nome].append(f"{nome}: {detalhes}")
-
-                ordem = ["Capa", "Guarda", "Miolo", "Bolsa"]
-                descricao_componentes = []
-                for grupo in ordem:
-                    if grupos[grupo]:
-                        descricao_componentes.append(f"{grupo}:\n" + "\n".join(grupos[grupo]))
-                for grupo in grupos:
-                    if grupo not in ordem and grupo != "Acabamento":
-                        descricao_componentes.append(f"{grupo}:\n" + "\n".join(grupos[grupo]))
-                if grupos["Acabamento"]:
-                    descricao_componentes.append("Acabamento:\n" + "\n".join(grupos["Acabamento"]))
-
-                descricao_produto = "\n\n".join(descricao_componentes)
+                # Agrupamento e descrição dos componentes (mesmo classificador da ordem de protótipo)
+                descricao_produto = descriptions.proposal_description(
+                    (line.component, line.details) for line in all_costs
+                )
 
                 # --- NOVO: Geração do número sequencial e versão ---
                 editing_id = st.session_state.get('editing_id')
@@ -661,23 +657,14 @@ def budget_page():
                     orcamento_id = editing_id
                     # Busca versão
                     idx = st.session_state.df_orcamentos[st.session_state.df_orcamentos['ID'] == editing_id].index[0]
-                    versoes_json = st.session_state.df_orcamentos.loc[idx].get("VersoesJSON", "[]")
-                    try:
-                        versoes = json.loads(versoes_json)
-                        versao_num = len(versoes) + 1
-                    except Exception:
-                        versao_num = 1
+                    versao_num = len(budget_fields.versoes(st.session_state.df_orcamentos.loc[idx])) + 1
                 else:
-                    def get_next_orcamento_number():
-                        """Gera o próximo número sequencial de orçamento com base no DataFrame atual."""
-                        df = st.session_state.df_orcamentos
-                        if "ID" in df.columns and not df.empty:
-                            # IDs no formato ORC123, extrai o número
-                            numeros = df["ID"].str.extract(r'ORC(\d+)')[0].dropna().astype(int)
-                            if not numeros.empty:
-                                return numeros.max() + 1
-                        return 1
-                    orcamento_num = get_next_orcamento_number()
+                    # Reserva atômica na sequência persistida; o histórico só é varrido
+                    # uma vez, para semear a sequência quando ela ainda não existe.
+                    orcamento_num = storage.reserve_sequence_number(
+                        config.ORCAMENTOS_SEQ_FILE,
+                        seed=lambda: max_orcamento_number(st.session_state.df_orcamentos)
+                    )
                     orcamento_id = f"ORC{orcamento_num}"
                     versao_num = 1
 
@@ -707,7 +694,6 @@ def budget_page():
                 )
                 # Aviso se a logo não for encontrada
                 try:
-                    import os
                     base_dir = os.path.dirname(os.path.abspath(__file__))
                     logo_candidates = [
                         os.path.join(base_dir, "logo_cicero.png"),
@@ -724,7 +710,7 @@ def budget_page():
                 # Salva o PDF também no GitHub (pasta Propostas)
                 token = storage.get_github_token()
                 if token:
-                    with open(output_pdf, "rb") as fpdf:
+                    with open(output_pdf, "rb") as fpdf, perf.span("github.upload_proposta"):
                         import base64, requests
                         repo = "controleciceropapelaria-design/Orcamentoperosnalizado"
                         path = f"Propostas/{os.path.basename(output_pdf)}"
@@ -767,11 +753,7 @@ def budget_page():
                     # Atualiza orçamento existente e salva versão anterior acumulando todas as versões
                     idx = st.session_state.df_orcamentos[st.session_state.df_orcamentos['ID'] == editing_id].index[0]
                     orcamento_antigo = st.session_state.df_orcamentos.loc[idx].to_dict()
-                    versoes = []
-                    try:
-                        versoes = json.loads(st.session_state.df_orcamentos.loc[idx].get("VersoesJSON", "[]"))
-                    except Exception:
-                        versoes = []
+                    versoes = list(budget_fields.versoes(st.session_state.df_orcamentos.loc[idx]))
                     versoes.append({
                         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "data": orcamento_antigo
@@ -883,6 +865,10 @@ def main():
                 else:
                     st.warning("Todos os campos são obrigatórios.")
 
+        # Tabelas de referência carregam em segundo plano enquanto o usuário faz login (só a 1ª
+        # chamada inicia). Depois do formulário: os imports do aquecimento não atrasam a tela
+        warmup.start()
+
     # --- Bloco de Lógica para usuário LOGADO ---
     else:
         page_options = ["Orçamento", "Cadastro de Clientes", "Histórico de Orçamentos"]
@@ -904,14 +890,15 @@ def main():
                 del st.session_state[key]
             st.rerun()
 
-        if page == "Orçamento":
-            budget_page()
-        elif page == "Cadastro de Clientes":
-            ui.display_client_registration_form()
-        elif page == "Histórico de Orçamentos":
-            ui.display_history_page()
-        elif page == "Painel Admin":
-            ui.display_admin_panel()
+        with perf.rerun(page):
+            if page == "Orçamento":
+                budget_page()
+            elif page == "Cadastro de Clientes":
+                ui.display_client_registration_form()
+            elif page == "Histórico de Orçamentos":
+                ui.display_history_page()
+            elif page == "Painel Admin":
+                ui.display_admin_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
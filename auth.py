@@ -2,60 +2,111 @@
 """
 Módulo para autenticação e gerenciamento de usuários.
 Encapsula toda a lógica de login, registro e manipulação de senhas.
+
+A busca de usuários usa um índice (usuário normalizado -> registro) montado
+uma única vez por versão do DataFrame, e o bcrypt roda em um pool limitado
+de threads, para que uma rajada de logins não trave as demais sessões.
 """
-import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import streamlit as st
 import storage
 import config
 
-def hash_password(password: str) -> str:
-    """Gera o hash de uma senha usando bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# Pool compartilhado por todas as sessões do processo. O bcrypt libera o GIL,
+# então o limite de workers é o que controla quantos núcleos os hashes ocupam.
+_hash_executor = ThreadPoolExecutor(max_workers=config.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+def normalize_username(username) -> str:
+    """Normaliza o nome de usuário para comparação robusta (strip + casefold)."""
+    return str(username or "").strip().casefold()
+
+# O bcrypt é importado no primeiro hash/verificação: a tela de login renderiza sem ele
+def _hash_password_sync(password: str, rounds: int) -> str:
+    import bcrypt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _verify_password_sync(password: str, hashed_password: str) -> bool:
+    import bcrypt
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except ValueError:
+        # Hash corrompido ou em formato desconhecido
+        return False
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """Gera o hash de uma senha usando bcrypt (executado no pool de hashing)."""
+    rounds = rounds or config.BCRYPT_ROUNDS
+    return _hash_executor.submit(_hash_password_sync, password, rounds).result()
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    """Verifica se uma senha corresponde ao seu hash."""
+    """Verifica se uma senha corresponde ao seu hash (executado no pool de hashing)."""
     # Garante que o hash é uma string válida antes de codificar
     if not isinstance(hashed_password, str):
         return False
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return _hash_executor.submit(_verify_password_sync, password or "", hashed_password).result()
 
-def login_user(username, password) -> tuple[bool, str]:
+# ================== ÍNDICE DE USUÁRIOS ==================
+def build_user_index(users_df: pd.DataFrame) -> dict:
     """
-    Tenta autenticar um usuário, verificando o status e a senha.
-    Retorna uma tupla: (sucesso, mensagem).
+    Monta o índice usuário normalizado -> registro (dict).
+    Em caso de duplicidade, vale o primeiro registro, como no filtro anterior.
     """
-    users_df = st.session_state.df_usuarios
-    if users_df is None or users_df.empty:
-        return False, "Nenhum usuário cadastrado."
+    if users_df is None or users_df.empty or "usuario" not in users_df.columns:
+        return {}
+    index = {}
+    for record in users_df.to_dict("records"):
+        index.setdefault(normalize_username(record.get("usuario")), record)
+    return index
 
-    # Normaliza ambos para comparação robusta (strip + casefold)
-    uname_norm = (username or "").strip().casefold()
-    users_df = users_df.copy()
-    users_df["_usuario_norm"] = users_df["usuario"].astype(str).str.strip().str.casefold()
+def refresh_user_index():
+    """Reconstrói o índice da sessão. Chame sempre que df_usuarios for alterado no lugar."""
+    users_df = st.session_state.get("df_usuarios")
+    # Guarda o próprio DataFrame (e não o id): um id reaproveitado por outro objeto não passa por "is"
+    st.session_state["_usuarios_index"] = (users_df, build_user_index(users_df))
+    return st.session_state["_usuarios_index"][1]
 
-    user_record = users_df[users_df["_usuario_norm"] == uname_norm]
+def get_user_index() -> dict:
+    """Retorna o índice da sessão, reconstruindo-o se df_usuarios foi substituído."""
+    cached = st.session_state.get("_usuarios_index")
+    if cached is None or cached[0] is not st.session_state.get("df_usuarios"):
+        return refresh_user_index()
+    return cached[1]
 
-    if user_record.empty:
-        return False, "Usuário ou senha incorretos."
+def authenticate(user_index: dict, username, password) -> tuple[bool, str, dict | None]:
+    """
+    Autentica contra o índice de usuários, sem tocar no estado da sessão.
+    Retorna uma tupla: (sucesso, mensagem, registro do usuário).
+    """
+    if not user_index:
+        return False, "Nenhum usuário cadastrado.", None
+
+    user_data = user_index.get(normalize_username(username))
+    if user_data is None:
+        return False, "Usuário ou senha incorretos.", None
 
-    user_data = user_record.iloc[0]
-    
     # Verifica se o status é 'ativo'
     if user_data["status"] != "ativo":
-        return False, "Usuário pendente de aprovação ou inativo."
+        return False, "Usuário pendente de aprovação ou inativo.", None
 
-    # Verifica a senha
     if verify_password(password, user_data["senha_hashed"]):
+        return True, "Login bem-sucedido.", user_data
+    return False, "Usuário ou senha incorretos.", None
+
+def login_user(username, password) -> tuple[bool, str]:
+    """
+    Tenta autenticar um usuário, verificando o status e a senha.
+    Retorna uma tupla: (sucesso, mensagem).
+    """
+    success, message, user_data = authenticate(get_user_index(), username, password)
+    if success:
         # Se o login for bem-sucedido, atualiza o estado da sessão
         st.session_state.logged_in = True
         # Guarda o nome de usuário exatamente como cadastrado
         st.session_state.username = user_data["usuario"]
         st.session_state.full_name = user_data["nome_completo"]
         st.session_state.role = user_data["role"]
-        return True, "Login bem-sucedido."
-    else:
-        return False, "Usuário ou senha incorretos."
+    return success, message
 
 
 def register_user(username, password, full_name) -> tuple[bool, str]:
@@ -64,11 +115,10 @@ def register_user(username, password, full_name) -> tuple[bool, str]:
     """
     users_df = st.session_state.df_usuarios
     # Impede duplicidades ignorando maiúsculas/minúsculas e espaços
-    uname_norm = (username or "").strip().casefold()
+    uname_norm = normalize_username(username)
     if not uname_norm:
         return False, "Informe um nome de usuário válido."
-    existing_norm = users_df.get("usuario", pd.Series(dtype=str)).astype(str).str.strip().str.casefold()
-    if uname_norm in set(existing_norm.values):
+    if uname_norm in get_user_index():
         return False, "Usuário já existe."
 
     hashed = hash_password(password)
@@ -79,9 +129,10 @@ def register_user(username, password, full_name) -> tuple[bool, str]:
         "role": "user",      # Role padrão
         "status": "pendente" # Status padrão
     }])
-    
+
     new_user = new_user.reindex(columns=config.COLUNAS_USUARIOS)
 
     st.session_state.df_usuarios = pd.concat([users_df, new_user], ignore_index=True)
     storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
-    return True, "Usuário cadastrado com sucesso! Aguarde a aprovação do administrador."
\ No newline at end of file
+    refresh_user_index()
+    return True, "Usuário cadastrado com sucesso! Aguarde a aprovação do administrador."
@@ -0,0 +1,272 @@
+# orcamento_pro/batch.py
+"""
+Cotação em lote (licitações) a partir de um arquivo de especificações.
+
+Lê um CSV ou JSONL com uma especificação por linha, cota todas em paralelo
+com quoting.quote_selections (as mesmas fórmulas da tela) e grava os
+resultados à medida que ficam prontos, em CSV ou Parquet. Cada processo
+carrega as tabelas de referência uma única vez (arquivos locais/snapshots,
+sem Streamlit rodando). Uma linha inválida não interrompe o lote: ela sai
+com status "erro" e a mensagem.
+
+    ORCAMENTO_DADOS_LOCAIS=. python -m batch licitacao.csv resultado.csv --linhas componentes.parquet
+
+Colunas da entrada (JSONL: mesmas chaves):
+    id (opcional), produto, quantidade,
+    markup / comissao_vendedor / comissao_promotor (opcionais, padrão da tela),
+    selecoes (opcional, SelecoesJSON) e/ou colunas com as chaves do SelecoesJSON
+    (sel_capa_papel, sel_capa_impressao, selected_laminacao, sel_miolo, cd_ELASTICO, util_<item>...).
+Células vazias ficam com o padrão da tela ("Nenhum").
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+import calculations as calc
+import quoting
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele, só saída CSV
+    pa = None
+
+STATUS_OK = "ok"
+STATUS_INCOMPLETO = "incompleto"  # cotou, mas algum componente deu erro (fica fora do custo)
+STATUS_ERRO = "erro"
+
+COLUNAS_RESUMO = [
+    "linha", "id", "produto", "quantidade", "status",
+    "custo_papel", "custo_servicos", "custo_aviamentos", "custo_mod_ggf", "custo_base",
+    "markup", "comissao_pct", "preco_venda_unitario", "preco_venda_total", "erros", "avisos",
+]
+COLUNAS_LINHAS = ["linha", "id", "componente", "categoria", "quantidade", "unidade", "custo_unitario", "detalhes"]
+
+# Tipos das colunas na saída Parquet (as demais são texto)
+TIPOS_NUMERICOS = {
+    "linha": int, "quantidade": int, "custo_papel": float, "custo_servicos": float, "custo_aviamentos": float,
+    "custo_mod_ggf": float, "custo_base": float, "markup": float, "comissao_pct": float,
+    "preco_venda_unitario": float, "preco_venda_total": float, "custo_unitario": float,
+}
+
+CATEGORIAS_RESUMO = {
+    "custo_papel": calc.CATEGORIA_MATERIAL,
+    "custo_servicos": calc.CATEGORIA_SERVICOS,
+    "custo_aviamentos": calc.CATEGORIA_AVIAMENTOS,
+    "custo_mod_ggf": calc.CATEGORIA_MOD_GGF,
+}
+
+# ================== ENTRADA ==================
+def read_specs(path: str):
+    """Gera (nº da linha, especificação) de um CSV ou JSONL, sem carregar o arquivo inteiro."""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for n, raw in enumerate(f, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    spec = json.loads(raw)
+                except json.JSONDecodeError as e:
+                    yield n, {"_erro": f"JSON inválido: {e}"}
+                    continue
+                yield n, spec if isinstance(spec, dict) else {"_erro": "linha não é um objeto JSON"}
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            # linha 1 = cabeçalho
+            for n, row in enumerate(csv.DictReader(f), start=2):
+                yield n, {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+
+def spec_to_body(spec: dict) -> dict:
+    """Converte uma linha plana (produto, quantidade, chaves do SelecoesJSON) no formato de parse_quote_spec."""
+    if "_erro" in spec:
+        raise quoting.QuoteSpecError(spec["_erro"])
+    selecoes = dict(quoting.parse_selections(spec.get("selecoes") or {}))
+    selecoes.update({k: v for k, v in spec.items() if quoting.is_selection_key(k)})
+    if spec.get("produto"):
+        selecoes["sel_produto"] = spec["produto"]
+    body = {k: spec.get(k) for k in ("quantidade", "markup", "comissao_vendedor", "comissao_promotor", "ajustes")}
+    body["selecoes"] = selecoes
+    return body
+
+# ================== CÁLCULO (processos) ==================
+_tables = None
+
+def _init_worker():
+    """Carrega as tabelas de referência uma vez por processo."""
+    global _tables
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    _tables = quoting.load_reference_tables()
+
+def quote_rows(rows: list) -> list:
+    """Cota um bloco de (linha, especificação); devolve [(resumo, linhas de custo)]."""
+    results = []
+    for n, spec in rows:
+        if not isinstance(spec, dict):  # read_specs já converte, mas quote_rows também é chamada direto
+            spec = {"_erro": "linha não é um objeto JSON"}
+        base = {"linha": n, "id": spec.get("id", ""), "produto": spec.get("produto") or "", "quantidade": spec.get("quantidade")}
+        try:
+            results.append(_quote_row(n, spec, base))
+        except Exception as e:  # uma linha ruim não interrompe o lote
+            results.append((dict(base, status=STATUS_ERRO, erros=f"{type(e).__name__}: {e}"), []))
+    return results
+
+def _quote_row(n: int, spec: dict, base: dict) -> tuple:
+    args = quoting.parse_quote_spec(spec_to_body(spec))
+    quote = quoting.quote_selections(tables=_tables, **args)
+    categorias = quote.categorias
+    resumo = dict(
+        base, produto=quote.produto, quantidade=quote.quantidade,
+        status=STATUS_INCOMPLETO if quote.erros else STATUS_OK,
+        **{col: categorias.get(cat, 0.0) for col, cat in CATEGORIAS_RESUMO.items()},
+        custo_base=quote.custo_componentes, markup=quote.markup, comissao_pct=quote.comissao_pct,
+        preco_venda_unitario=quote.preco_venda, preco_venda_total=quote.preco_venda * quote.quantidade,
+        erros="; ".join(quote.erros), avisos="; ".join(quote.avisos),
+    )
+    linhas = [
+        {"linha": n, "id": base["id"], "componente": l.component, "categoria": l.category,
+         "quantidade": float(l.quantity), "unidade": l.unit, "custo_unitario": float(l.unit_cost), "detalhes": str(l.details)}
+        for l in quote.lines
+    ]
+    return resumo, linhas
+
+def _blocks(specs, size: int):
+    block = []
+    for item in specs:
+        block.append(item)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def run_batch(specs, workers: int = None, block_size: int = None):
+    """
+    Cota as especificações em paralelo e gera os resultados na ordem da entrada.
+
+    Args:
+        specs: Iterável de (nº da linha, especificação), como read_specs.
+        workers (int): Processos de cálculo (padrão: config.LOTE_WORKERS; 1 = no próprio processo).
+        block_size (int): Linhas por tarefa (padrão: config.LOTE_TAMANHO_BLOCO).
+
+    Yields:
+        tuple: (resumo, linhas de custo) de cada especificação.
+    """
+    workers = workers or config.LOTE_WORKERS
+    block_size = block_size or config.LOTE_TAMANHO_BLOCO
+    if workers <= 1:
+        _init_worker()
+        for block in _blocks(specs, block_size):
+            yield from quote_rows(block)
+        return
+    # "spawn": os processos não herdam estado do processo principal
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        pending = []
+        for block in _blocks(specs, block_size):
+            pending.append(pool.submit(quote_rows, block))
+            # Janela limitada: no máximo 2 blocos por processo em voo (memória constante em arquivos grandes)
+            while len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+# ================== SAÍDA ==================
+class ResultWriter:
+    """Grava linhas (dicts) em CSV ou Parquet, em blocos, sem acumular o lote em memória."""
+
+    def __init__(self, path: str, columns: list):
+        self.path, self.columns = path, columns
+        self.parquet = path.lower().endswith(".parquet")
+        self._buffer = []
+        if self.parquet:
+            if pa is None:
+                raise RuntimeError("Saída Parquet requer pyarrow.")
+            self.schema = pa.schema([
+                (c, {int: pa.int64(), float: pa.float64()}.get(TIPOS_NUMERICOS.get(c), pa.string())) for c in columns
+            ])
+            self._writer = None
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+            self._writer.writeheader()
+
+    def write(self, rows: list):
+        if not self.parquet:
+            self._writer.writerows(rows)
+            return
+        self._buffer.extend(rows)
+        if len(self._buffer) >= config.LOTE_TAMANHO_BLOCO * 10:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        table = pa.Table.from_pydict(
+            {c: [_coerce(r.get(c), c) for r in self._buffer] for c in self.columns}, schema=self.schema
+        )
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def close(self):
+        if self.parquet:
+            self._flush()
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+def _coerce(value, column: str):
+    """Valor no tipo da coluna Parquet; vazio ou inválido (ex: quantidade de uma linha com erro) vira nulo."""
+    if value is None or value == "":
+        return None
+    tipo = TIPOS_NUMERICOS.get(column, str)
+    try:
+        return tipo(float(value)) if tipo is int else tipo(value)
+    except (TypeError, ValueError):
+        return None
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Cotação em lote a partir de CSV/JSONL.")
+    parser.add_argument("entrada", help="Especificações (.csv ou .jsonl)")
+    parser.add_argument("saida", help="Resumo por especificação (.csv ou .parquet)")
+    parser.add_argument("--linhas", help="Custo por componente de cada especificação (.csv ou .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help=f"Processos de cálculo (padrão: {config.LOTE_WORKERS})")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.entrada):
+        print(f"Arquivo não encontrado: {args.entrada}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    resumo_out = ResultWriter(args.saida, COLUNAS_RESUMO)
+    linhas_out = ResultWriter(args.linhas, COLUNAS_LINHAS) if args.linhas else None
+    contagem = dict.fromkeys((STATUS_OK, STATUS_INCOMPLETO, STATUS_ERRO), 0)
+    try:
+        for resumo, linhas in run_batch(read_specs(args.entrada), workers=args.workers):
+            contagem[resumo["status"]] += 1
+            resumo_out.write([resumo])
+            if linhas_out:
+                linhas_out.write(linhas)
+            if resumo["status"] == STATUS_ERRO:
+                print(f"linha {resumo['linha']}: {resumo['erros']}", file=sys.stderr)
+    finally:
+        resumo_out.close()
+        if linhas_out:
+            linhas_out.close()
+
+    total = sum(contagem.values())
+    print(f"{total} especificações em {time.perf_counter() - start:.1f} s: "
+          f"{contagem[STATUS_OK]} ok, {contagem[STATUS_INCOMPLETO]} incompletas, {contagem[STATUS_ERRO]} com erro")
+    return 0 if contagem[STATUS_ERRO] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
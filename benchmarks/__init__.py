@@ -0,0 +1,5 @@
+# orcamento_pro/benchmarks/__init__.py
+"""
+Scripts de medição de desempenho. Execute a partir da raiz do projeto,
+por exemplo: python -m benchmarks.bench_auth
+"""
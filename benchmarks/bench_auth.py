@@ -0,0 +1,76 @@
+# orcamento_pro/benchmarks/bench_auth.py
+"""
+Mede logins por segundo do auth.authenticate sob uma rajada de sessões
+simultâneas (ex: início de turno), com o fator de custo configurável.
+
+Uso: python -m benchmarks.bench_auth --usuarios 200 --sessoes 16 --logins 64 --rounds 12
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import auth
+import config
+
+
+def _make_users(n_users: int, rounds: int) -> pd.DataFrame:
+    # Todos compartilham o mesmo hash: o custo de verificação é o mesmo e a geração fica barata
+    hashed = auth.hash_password("senha123", rounds=rounds)
+    return pd.DataFrame({
+        "usuario": [f"Usuario {i}" for i in range(n_users)],
+        "senha_hashed": hashed,
+        "nome_completo": [f"Usuário Número {i}" for i in range(n_users)],
+        "role": "user",
+        "status": "ativo",
+    }, columns=config.COLUNAS_USUARIOS)
+
+
+def run(n_users: int, n_sessions: int, n_logins: int, rounds: int) -> dict:
+    users_df = _make_users(n_users, rounds)
+
+    start = time.perf_counter()
+    index = auth.build_user_index(users_df)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for i in range(10_000):
+        index.get(auth.normalize_username(f" usuario {i % n_users} "))
+    lookup_us = (time.perf_counter() - start) / 10_000 * 1e6
+
+    def one_login(i):
+        ok, _, _ = auth.authenticate(index, f"USUARIO {i % n_users}", "senha123")
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as sessions:
+        results = list(sessions.map(one_login, range(n_logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results), "Falha de autenticação no benchmark"
+
+    return {
+        "usuarios": n_users,
+        "sessoes": n_sessions,
+        "logins": n_logins,
+        "bcrypt_rounds": rounds,
+        "hash_workers": config.AUTH_HASH_WORKERS,
+        "indice_ms": round(index_ms, 3),
+        "busca_us": round(lookup_us, 3),
+        "logins_por_segundo": round(n_logins / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--sessoes", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=config.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+    for key, value in run(args.usuarios, args.sessoes, args.logins, args.rounds).items():
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# orcamento_pro/benchmarks/bench_snapshots.py
+"""
+Compara o carregamento das tabelas de referência a partir do CSV (parse +
+limpeza) com a leitura do snapshot Arrow via memory-map: tempo por tabela
+(parse, leitura do snapshot e load_table completo, que com a fonte sem
+mudança nem relê o CSV) e memória de um processo novo que carrega todas as
+tabelas pelos loaders reais do data_services (com o cache do Streamlit).
+
+Memória: RSS total e privado (sem as páginas mapeadas de arquivo, que ficam
+no cache do sistema e são compartilhadas entre os processos). O modo
+"snapshot_copia" mostra o custo de guardar as tabelas em st.cache_data, que
+serializa e devolve uma cópia. Com --escala, as compras e os componentes são
+ampliados (benchmarks/generators.py) em uma pasta temporária.
+
+Uso: ORCAMENTO_DADOS_LOCAIS=. python -m benchmarks.bench_snapshots [--repeticoes 20] [--escala 100]
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import config
+import data_services as ds
+import snapshots
+from benchmarks import generators as gen
+
+# (nome do snapshot, URL, parse, variant) — o mesmo que os loaders usam
+def _tables():
+    tables = [
+        ("compras_papel", config.URL_COMPRAS, ds._parse_paper_purchases, ""),
+        ("compras_diretas", config.URL_COMPRA_DIRETA, ds._parse_direct_purchases, ""),
+    ]
+    for item_col, url in ds.COMPONENT_TABLES.items():
+        columns = [item_col] + ds.COLUNAS_COMPONENTE
+        tables.append((f"componente_{ds._table_slug(url)}", url,
+                       lambda raw, columns=columns: ds._parse_component_data(raw, columns), "|".join(columns)))
+    for url in sorted(set(config.CSV_MAP_IMPRESSAO.values())):
+        tables.append((f"impressao_{ds._table_slug(url)}", url, ds._parse_impression_table, ""))
+    return tables
+
+
+# csv: sem snapshots; snapshot: como os loaders guardam (st.cache_resource); snapshot_copia: como st.cache_data
+MODOS_RSS = ("csv", "snapshot", "snapshot_copia")
+
+
+def _frame_loaders() -> list:
+    """Loaders do data_services que devolvem as tabelas vindas dos snapshots."""
+    loaders = [ds.load_paper_purchases, ds.load_direct_purchases_frame]
+    loaders += [lambda item_col=item_col: ds.load_component_table(item_col) for item_col in ds.COMPONENT_TABLES]
+    loaders += [lambda url=url: ds.load_impression_table(url) for url in sorted(set(config.CSV_MAP_IMPRESSAO.values()))]
+    return loaders
+
+
+def _rss_kb() -> tuple:
+    """(RSS total, RSS privado) do processo, em KB."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident, shared = (int(v) for v in f.read().split()[1:3])
+        page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+        return resident * page_kb, (resident - shared) * page_kb
+    except OSError:  # fora do Linux: usa o pico
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, peak
+
+
+def _load_all(mode: str) -> tuple:
+    """Carrega todas as tabelas pelos loaders em um processo novo e devolve o acréscimo de RSS (KB)."""
+    config.USAR_SNAPSHOTS = mode != "csv"
+    import pyarrow  # noqa: F401 — o custo do import não entra na medição
+    before = _rss_kb()
+    frames = [loader() for loader in _frame_loaders()]
+    if mode == "snapshot_copia":
+        # st.cache_data guarda os bytes serializados e devolve uma cópia deles a cada chamada
+        guardados = [pickle.dumps(df) for df in frames]
+        frames = [pickle.loads(b) for b in guardados]
+    after = _rss_kb()
+    return after[0] - before[0], after[1] - before[1]
+
+
+def _use_data_dir(pasta: str):
+    """Lê as fontes e grava os snapshots em pasta (e não nas fontes e em data/snapshots)."""
+    config.DADOS_REFERENCIA_LOCAL = pasta
+    config.SNAPSHOT_DIR = os.path.join(pasta, "snapshots")
+
+
+def _write_scaled_sources(pasta: str, escala: int, seed: int = 0):
+    """Grava em pasta as fontes ampliadas, com os nomes locais; as tabelas de impressão vão como estão."""
+    fontes = {
+        config.URL_COMPRAS: gen.paper_purchases_csv(escala, seed),
+        config.URL_COMPRA_DIRETA: gen.direct_purchases_csv(escala, seed),
+    }
+    for url in ds.COMPONENT_TABLES.values():
+        fontes[url] = gen.component_csv(url, escala, seed)
+    for url in set(config.CSV_MAP_IMPRESSAO.values()):
+        fontes[url] = snapshots.fetch_source(url)
+    for url, raw in fontes.items():
+        file_name = os.path.basename(url)
+        with open(os.path.join(pasta, config.ARQUIVOS_LOCAIS_ALIAS.get(file_name, file_name)), "wb") as f:
+            f.write(raw)
+
+
+def _rss_of(mode: str) -> dict:
+    dados = ["--dados", config.DADOS_REFERENCIA_LOCAL] if config.DADOS_REFERENCIA_LOCAL else []
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_snapshots", "--rss-child", mode, *dados],
+        capture_output=True, text=True, check=True, env=os.environ.copy()
+    ).stdout.strip().splitlines()[-1]
+    total, privado = (int(v) for v in out.split())
+    return {"rss_delta_kb": total, "rss_privado_delta_kb": privado}
+
+
+def run(repeticoes: int) -> dict:
+    results = {}
+    for name, url, parse, variant in _tables():
+        raw = snapshots.fetch_source(url)
+        digest = snapshots._digest(name, raw, variant)
+        path = snapshots._snapshot_path(name, digest)
+        snapshots.load_table(name, url, parse, variant)  # grava o snapshot e a versão da fonte, se preciso
+
+        start = time.perf_counter()
+        for _ in range(repeticoes):
+            parse(raw)
+        csv_ms = (time.perf_counter() - start) / repeticoes * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeticoes):
+            snapshots.read_snapshot(path)
+        snap_ms = (time.perf_counter() - start) / repeticoes * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeticoes):
+            snapshots.load_table(name, url, parse, variant)
+        load_ms = (time.perf_counter() - start) / repeticoes * 1000
+        results[name] = {"csv_ms": round(csv_ms, 3), "snapshot_ms": round(snap_ms, 3), "load_table_ms": round(load_ms, 3)}
+
+    results["_total"] = {
+        campo: round(sum(r[campo] for r in results.values()), 3)
+        for campo in ("csv_ms", "snapshot_ms", "load_table_ms")
+    }
+    results["_memoria"] = {mode: _rss_of(mode) for mode in MODOS_RSS}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--escala", type=int, default=1, help="Fator de ampliação das compras e componentes")
+    parser.add_argument("--rss-child", choices=MODOS_RSS, help=argparse.SUPPRESS)
+    parser.add_argument("--dados", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.dados:
+        _use_data_dir(args.dados)
+    if args.rss_child:
+        print(*_load_all(args.rss_child))
+        return
+    if args.escala == 1:
+        print(json.dumps(run(args.repeticoes), indent=2, ensure_ascii=False))
+        return
+    with tempfile.TemporaryDirectory() as pasta:
+        _write_scaled_sources(pasta, args.escala)
+        _use_data_dir(pasta)
+        print(json.dumps(run(args.repeticoes), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+# orcamento_pro/benchmarks/bench_suite.py
+"""
+Suíte de desempenho: mede tempo e pico de memória de cada subsistema com
+dados sintéticos (benchmarks.generators) e grava o resultado em JSON para
+comparar entre execuções.
+
+Casos:
+    loaders/*     limpeza e índices das tabelas de referência (1x, 10x, 100x)
+    calc/*        cada função de calculations, o encaixe no rolo de uma peça pequena e uma cotação completa
+    storage/*     save_csv / load_csv de históricos grandes de orçamentos
+    historico/*   preparação dos dados da página "Meu Histórico"
+    pdf/*         proposta e ordem de protótipo
+
+Uso (a partir da raiz do projeto):
+    ORCAMENTO_DADOS_LOCAIS=. python -m benchmarks.bench_suite [--escalas 1 10 100] [--filtro loaders]
+    ORCAMENTO_DADOS_LOCAIS=. python -m benchmarks.bench_suite --comparar benchmarks/resultados/<anterior>.json
+
+Com --comparar, casos mais lentos que o limite (--limite, padrão 25%) e acima
+do ruído mínimo são listados como regressão e o processo termina com código 1.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import numpy as np
+import pandas as pd
+
+import config
+import calculations as calc
+import data_services as ds
+import imposition
+import quoting
+import risk
+import storage
+from benchmarks import generators as gen
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+ESCALAS_PADRAO = [1, 10, 100]
+QUANTIDADE = 15000
+# Abaixo disso a diferença entre execuções é ruído, não regressão
+RUIDO_MS = 0.5
+RUIDO_KB = 256
+
+# ================== CASOS ==================
+# Cada caso é (nome, preparo); preparo() monta os dados (fora da medição) e devolve a função medida.
+def _loader_cases(escala: int, seed: int) -> list:
+    sufixo = f"@{escala}x"
+    cache = {}
+
+    def papel():
+        if "papel" not in cache:
+            cache["papel"] = gen.paper_purchases_csv(escala, seed)
+        return cache["papel"]
+
+    def diretas():
+        if "diretas" not in cache:
+            cache["diretas"] = gen.direct_purchases_csv(escala, seed)
+        return cache["diretas"]
+
+    def compras_papel():
+        raw = papel()
+        return lambda: ds._parse_paper_purchases(raw)
+
+    def compras_diretas():
+        raw = diretas()
+        return lambda: ds._parse_direct_purchases(raw)
+
+    def componente():
+        item_col, url = next(iter(ds.COMPONENT_TABLES.items()))
+        raw, columns = gen.component_csv(url, escala, seed), [item_col] + ds.COLUNAS_COMPONENTE
+        return lambda: ds._parse_component_data(raw, columns)
+
+    def precos_papel():
+        df = ds._parse_paper_purchases(papel())
+        return lambda: ds.build_paper_price_book(df)
+
+    def indice_papel():
+        df = ds._parse_paper_purchases(papel())
+        return lambda: ds.build_paper_index(df)
+
+    def rendimento_papel():
+        index = ds.build_paper_index(ds._parse_paper_purchases(papel()))
+        return lambda: ds.build_paper_yield_index(index)
+
+    def precos_compras_diretas():
+        df = ds._parse_direct_purchases(diretas())
+        return lambda: ds.build_direct_purchases(ds.build_direct_purchases_price_table(df))
+
+    def historicos_preco():
+        df = ds._parse_paper_purchases(papel())
+        return lambda: risk.build_price_history(df, "PapelLimpo", "ValorUnitario", "DataEmissaoNF")
+
+    return [(f"loaders/{fn.__name__}{sufixo}", fn) for fn in (
+        compras_papel, compras_diretas, componente, precos_papel, indice_papel,
+        rendimento_papel, precos_compras_diretas, historicos_preco,
+    )]
+
+def _first_paper(tables: quoting.ReferenceTables, product: str):
+    """Primeiro papel com rendimento calculado para o produto (como a lista da tela)."""
+    base = calc.base_product_name(product)
+    for (paper, prod), y in tables.paper_yield_index.items():
+        if prod == base and y.capas_por_folha:
+            return paper
+    raise LookupError(f"Nenhum papel com rendimento para {product}")
+
+def _calc_cases() -> list:
+    state = {}
+
+    def tables() -> quoting.ReferenceTables:
+        if "tables" not in state:
+            state["tables"] = quoting.load_reference_tables()
+        return state["tables"]
+
+    produto = "REVISTA 14X21 - POLICROMIA"
+    base = produto.replace(" - POLICROMIA", "")
+
+    def capa_offset():
+        t = tables()
+        paper, steps = _first_paper(t, produto), t.impression_steps[config.CSV_MAP_IMPRESSAO[base]]
+        return lambda: calc.calculate_offset_cover_cost(base, QUANTIDADE, paper, t.df_paper, steps, price_book=t.price_book)
+
+    def capa_digital():
+        t = tables()
+        paper = _first_paper(t, produto)
+        y = t.paper_yield_index.get((paper, calc.base_product_name(produto)))
+        return lambda: calc.calculate_digital_cover_cost(produto, paper, "Digital 4/1", QUANTIDADE, t.df_paper,
+                                                         paper_yield=y, price_book=t.price_book)
+
+    def capa_couro():
+        t = tables()
+        couro = ds.load_leather_materials(t.direct_purchases)[0]
+        produto_couro = "CADERNETA 14X21 - COURO SINTÉTICO"
+        return lambda: calc.calculate_synthetic_leather_cover_cost(produto_couro, couro, QUANTIDADE, t.direct_purchases)
+
+    def componente():
+        t = tables()
+        item_col = "Miolo"
+        df_items = t.component_tables[item_col]
+        item = df_items[item_col].iloc[0]
+        return lambda: calc.calculate_component_cost(item, df_items, t.df_paper, QUANTIDADE, item_col, price_book=t.price_book)
+
+    def hot_stamping():
+        return lambda: calc.calculate_hot_stamping_cost("Externo Pequeno", QUANTIDADE)
+
+    def laminacao():
+        t = tables()
+        paper = _first_paper(t, produto)
+        steps = t.impression_steps[config.CSV_MAP_IMPRESSAO[base]]
+        cover = calc.calculate_offset_cover_cost(base, QUANTIDADE, paper, t.df_paper, steps, price_book=t.price_book)
+        return lambda: calc.calculate_cover_lamination_cost(cover, "Offset", paper, QUANTIDADE, t.df_paper,
+                                                            product_name=produto, paper_spec=t.paper_index.get(paper))
+
+    def silk():
+        return lambda: calc.calculate_silk_cost("2/0", QUANTIDADE)
+
+    def personalizado():
+        return lambda: calc.calculate_custom_component_cost(500.0, 250.0, QUANTIDADE)
+
+    def compra_direta():
+        t = tables()
+        category = "ELASTICO" if "ELASTICO" in t.direct_purchases else sorted(t.direct_purchases)[0]
+        items = t.direct_purchases[category]
+        return lambda: calc.calculate_direct_purchase_cost(category, items[0]["NomeLimpo"], items, QUANTIDADE,
+                                                           wireo_map=t.wireo_map)
+
+    def preco_venda():
+        return lambda: calc.calculate_sale_price(12.34, config.MARKUP_PADRAO,
+                                                 config.COMISSAO_VENDEDOR_PADRAO + config.COMISSAO_PROMOTOR_PADRAO)
+
+    def encaixe_rolo_peca_pequena():
+        # Peça bem menor que as do catálogo: milhares de comprimentos candidatos no rolo.
+        # Sem cache, como no primeiro orçamento de um produto novo.
+        def encaixe():
+            imposition.roll_plan.cache_clear()
+            imposition.best_layout.cache_clear()
+            return imposition.roll_plan(config.ROLO_COURO_LARGURA_MM, 37, 53)
+        return encaixe
+
+    def cotacao_completa():
+        t = tables()
+        miolo = t.component_tables["Miolo"]["Miolo"].iloc[0]
+        selecoes = {
+            "sel_produto": produto, "sel_capa_papel": _first_paper(t, produto), "sel_capa_impressao": "Offset",
+            "selected_laminacao": "Laminação Fosca", "selected_silk": "2/0", "selected_hot_stamping": "Externo Pequeno",
+            "sel_miolo": miolo,
+        }
+        return lambda: quoting.quote_selections(selecoes, QUANTIDADE, t)
+
+    return [(f"calc/{fn.__name__}", fn) for fn in (
+        capa_offset, capa_digital, capa_couro, componente, hot_stamping, laminacao,
+        silk, personalizado, compra_direta, preco_venda, encaixe_rolo_peca_pequena, cotacao_completa,
+    )]
+
+def _budget_cases(escala: int, seed: int, tmpdir: str) -> list:
+    sufixo = f"@{escala}x"
+    n = 20 * escala  # ~ tamanho atual de data/orcamentos_novo.csv vezes a escala
+    cache = {}
+
+    def budgets() -> pd.DataFrame:
+        if "df" not in cache:
+            cache["df"] = gen.budgets(n, seed)
+        return cache["df"]
+
+    def save_csv():
+        df, path = budgets(), os.path.join(tmpdir, f"salvar_{escala}.csv")
+        return lambda: storage.save_csv(df, path)
+
+    def load_csv():
+        path = os.path.join(tmpdir, f"carregar_{escala}.csv")
+        storage.save_csv(budgets(), path)
+        return lambda: storage.load_csv(path, config.COLUNAS_ORCAMENTOS)
+
+    def tabela():
+        import ui_components as ui
+        df = budgets()
+        usuario = df["Usuario"].mode().iloc[0]
+        return lambda: ui.build_history_tables(df, usuario)
+
+    def versoes():
+        import ui_components as ui
+        df = budgets()
+        orcamento = df.loc[df["VersoesJSON"].str.len().idxmax()]
+        return lambda: ui.budget_versions(orcamento)
+
+    return [
+        (f"storage/save_csv{sufixo}", save_csv),
+        (f"storage/load_csv{sufixo}", load_csv),
+        (f"historico/tabela{sufixo}", tabela),
+        (f"historico/versoes{sufixo}", versoes),
+    ]
+
+def _pdf_cases(seed: int, tmpdir: str) -> list:
+    def _proposal_data() -> dict:
+        import ui_components as ui
+        orcamento = gen.budgets(1, seed).iloc[0]
+        return {
+            "data": "01/01/2025", "cliente": orcamento["Cliente"], "responsavel": "Contato",
+            "numero_orcamento": orcamento["ID"], "versao_orcamento": orcamento["VersoesOrcamento"],
+            "produto": orcamento["Produto"], "quantidade": int(orcamento["Quantidade"]),
+            "descrição": ui._monta_descricao_prototipo(orcamento),
+            "Unitario": float(orcamento["PrecoVenda"]), "total": float(orcamento["PrecoVenda"]) * int(orcamento["Quantidade"]),
+            "atendente": orcamento["NomeOrcamentista"], "validade": "15 dias", "prazo_de_entrega": "30 dias",
+        }
+
+    def proposta():
+        from generate_pdf import generate_proposal_pdf
+        data, path = _proposal_data(), os.path.join(tmpdir, "proposta.pdf")
+        return lambda: generate_proposal_pdf(data, path)
+
+    def ordem_prototipo():
+        from generate_ordem_prototipo import generate_ordem_prototipo_pdf
+        data, path = _proposal_data(), os.path.join(tmpdir, "ordem.pdf")
+        return lambda: generate_ordem_prototipo_pdf(data, path)
+
+    return [("pdf/proposta", proposta), ("pdf/ordem_prototipo", ordem_prototipo)]
+
+def build_cases(escalas: list, seed: int, tmpdir: str) -> list:
+    cases = []
+    for escala in escalas:
+        cases += _loader_cases(escala, seed)
+    cases += _calc_cases()
+    for escala in escalas:
+        cases += _budget_cases(escala, seed, tmpdir)
+    cases += _pdf_cases(seed, tmpdir)
+    return cases
+
+# ================== MEDIÇÃO ==================
+def measure(fn, repeticoes: int, orcamento_s: float = 2.0) -> dict:
+    """
+    Mediana e mínimo do tempo (após um aquecimento) e pico de memória alocada
+    em uma execução separada sob tracemalloc (que deixa o código mais lento).
+    Casos lentos rodam menos vezes: no máximo ~orcamento_s por caso, mínimo 3.
+    """
+    start = time.perf_counter()
+    fn()
+    aquecimento = time.perf_counter() - start
+    n = max(3, min(repeticoes, int(orcamento_s / max(aquecimento, 1e-6))))
+
+    tempos = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "mediana_ms": round(statistics.median(tempos), 4),
+        "min_ms": round(min(tempos), 4),
+        "pico_kb": round(pico / 1024, 1),
+        "repeticoes": n,
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=config.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def run(escalas: list, filtro: str = None, repeticoes: int = 20, seed: int = 0) -> dict:
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for nome, preparo in build_cases(escalas, seed, tmpdir):
+            if filtro and filtro not in nome:
+                continue
+            try:
+                resultados[nome] = measure(preparo(), repeticoes)
+            except Exception as e:  # um caso quebrado não invalida os outros
+                resultados[nome] = {"erro": f"{type(e).__name__}: {e}"}
+            r = resultados[nome]
+            print(f"{nome:45s} " + (f"{r['mediana_ms']:10.3f} ms {r['pico_kb']:10.1f} KB" if "erro" not in r else r["erro"]),
+                  file=sys.stderr)
+    return {
+        "meta": {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "escalas": escalas,
+            "semente": seed,
+        },
+        "casos": resultados,
+    }
+
+# ================== COMPARAÇÃO ==================
+def compare(anterior: dict, atual: dict, limite: float = 0.25) -> list:
+    """Linhas (caso, tempo antes, tempo agora, razão, pico antes, pico agora, regressão) dos casos em comum."""
+    linhas = []
+    for nome, agora in atual["casos"].items():
+        antes = anterior["casos"].get(nome)
+        if not antes or "erro" in antes or "erro" in agora:
+            continue
+        razao = agora["mediana_ms"] / antes["mediana_ms"] if antes["mediana_ms"] else float("inf")
+        lento = razao > 1 + limite and agora["mediana_ms"] - antes["mediana_ms"] > RUIDO_MS
+        memoria = (agora["pico_kb"] > antes["pico_kb"] * (1 + limite)
+                   and agora["pico_kb"] - antes["pico_kb"] > RUIDO_KB)
+        linhas.append({
+            "caso": nome, "antes_ms": antes["mediana_ms"], "agora_ms": agora["mediana_ms"], "razao": round(razao, 3),
+            "antes_kb": antes["pico_kb"], "agora_kb": agora["pico_kb"],
+            "regressao": ", ".join(m for m, r in (("tempo", lento), ("memória", memoria)) if r),
+        })
+    return linhas
+
+def _print_comparison(linhas: list, anterior: dict):
+    meta = anterior.get("meta", {})
+    print(f"\nComparação com {meta.get('data', '?')} (commit {meta.get('commit') or '?'}):")
+    print(f"{'caso':45s} {'antes ms':>10s} {'agora ms':>10s} {'razão':>7s} {'antes KB':>10s} {'agora KB':>10s}")
+    for l in linhas:
+        marca = f"  <-- {l['regressao']}" if l["regressao"] else ""
+        print(f"{l['caso']:45s} {l['antes_ms']:10.3f} {l['agora_ms']:10.3f} {l['razao']:7.2f} "
+              f"{l['antes_kb']:10.1f} {l['agora_kb']:10.1f}{marca}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS_PADRAO, help="Fatores de ampliação dos dados")
+    parser.add_argument("--filtro", help="Só os casos cujo nome contém o texto (ex: loaders, calc/, @10x)")
+    parser.add_argument("--repeticoes", type=int, default=20, help="Máximo de repetições por caso")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help=f"Arquivo JSON do resultado (padrão: {RESULTADOS_DIR}/<data>.json)")
+    parser.add_argument("--comparar", help="Resultado anterior (JSON) para comparar")
+    parser.add_argument("--limite", type=float, default=0.25, help="Piora relativa considerada regressão (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    resultado = run(args.escalas, args.filtro, args.repeticoes, args.semente)
+    saida = args.saida or os.path.join(RESULTADOS_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {saida}")
+
+    if not args.comparar:
+        return 0
+    with open(args.comparar, encoding="utf-8") as f:
+        anterior = json.load(f)
+    linhas = compare(anterior, resultado, args.limite)
+    _print_comparison(linhas, anterior)
+    regressoes = [l for l in linhas if l["regressao"]]
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima de {args.limite:.0%}.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# orcamento_pro/benchmarks/generators.py
+"""
+Geradores de dados sintéticos (com semente) para os benchmarks.
+
+Partem das tabelas reais do projeto e as ampliam por um fator: as linhas são
+sorteadas das reais, com datas, quantidades e preços perturbados, e parte dos
+itens vira variante de nome (outra gramatura, outro sufixo) para que o nº de
+itens distintos também cresça com o fator — senão os groupby por item ficariam
+artificialmente baratos. As compras e componentes saem como bytes no formato
+bruto das fontes, prontos para as funções de limpeza do data_services;
+clientes, usuários e orçamentos saem como DataFrames no formato de data/.
+"""
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+import config
+import snapshots
+
+ORCAMENTOS_REFERENCIA = config.ORCAMENTOS_FILE
+# Hash bcrypt de exemplo: os benchmarks não autenticam, só carregam e gravam
+HASH_EXEMPLO = "$2b$12$u8/6njSrzHt3XXmKIGu46esj6JHFgyUQ1NEOIhrIBdWET0RsWZV66"
+STATUS = ["Pendente", "Pendente", "Aprovado", "Suspenso", "Finalizado"]
+
+def _read_raw(url: str) -> pd.DataFrame:
+    """Fonte real como texto, sem conversões (para regravar no mesmo formato)."""
+    return snapshots.read_csv_bytes(snapshots.fetch_source(url), dtype=str, keep_default_na=False)
+
+def _to_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+def _sample(df: pd.DataFrame, fator: float, rng: np.random.Generator) -> pd.DataFrame:
+    n = max(1, int(round(len(df) * fator)))
+    return df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+
+def _variants(fator: float) -> int:
+    """Nº de variantes por item: cresce com o fator, mas menos que o nº de linhas."""
+    return max(1, int(np.ceil(np.sqrt(fator) * 2))) if fator > 1 else 1
+
+def _random_dates(n: int, rng: np.random.Generator, anos: int = 3) -> pd.Series:
+    hoje = pd.Timestamp.today().normalize()
+    return pd.Series(hoje - pd.to_timedelta(rng.integers(0, 365 * anos, n), unit="D"))
+
+# ================== COMPRAS E COMPONENTES (bytes brutos) ==================
+def paper_purchases_csv(fator: float = 1.0, seed: int = 0) -> bytes:
+    """compradepapel.csv ampliado: gramaturas variantes criam papéis novos com nome válido."""
+    rng = np.random.default_rng(seed)
+    df = _sample(_read_raw(config.URL_COMPRAS), fator, rng)
+    n = len(df)
+    variantes = _variants(fator)
+    if variantes > 1:
+        gramaturas = rng.choice(np.arange(60, 60 + 5 * variantes * 4, 5), n)
+        trocar = rng.random(n) < 0.5
+        df.iloc[:, 0] = [
+            re.sub(r'(\d+)(\s*[gG])', f"{g}\\2", nome, count=1) if t else nome
+            for nome, g, t in zip(df.iloc[:, 0], gramaturas, trocar)
+        ]
+    df.iloc[:, 1] = rng.integers(500, 30000, n).astype(str)
+    df.iloc[:, 5] = _random_dates(n, rng).dt.strftime('%d/%m/%Y')
+    precos = pd.to_numeric(df.iloc[:, 15].str.replace('R$', '', regex=False).str.replace(',', '.').str.strip(), errors='coerce')
+    df.iloc[:, 15] = [f"R$ {p:.2f}" if pd.notna(p) else "" for p in precos * rng.uniform(0.85, 1.15, n)]
+    return _to_bytes(df)
+
+def direct_purchases_csv(fator: float = 1.0, seed: int = 0) -> bytes:
+    """compradiretav2.csv ampliado, com variantes de item dentro de cada categoria."""
+    rng = np.random.default_rng(seed)
+    df = _sample(_read_raw(config.URL_COMPRA_DIRETA), fator, rng)
+    n = len(df)
+    variantes = rng.integers(0, _variants(fator), n)
+    df["DEMANDA"] = [d if v == 0 else f"{d} V{v}" for d, v in zip(df["DEMANDA"], variantes)]
+    df["QUANTIDADE"] = rng.integers(1, 5000, n).astype(str)
+    df["DATA_EMISSAO_NF"] = _random_dates(n, rng).dt.strftime('%Y-%m-%d')
+    precos = pd.to_numeric(df["VALOR_UNITARIO"], errors='coerce') * rng.uniform(0.85, 1.15, n)
+    df["VALOR_UNITARIO"] = precos.round(4).astype(str)
+    return _to_bytes(df)
+
+def component_csv(url: str, fator: float = 1.0, seed: int = 0) -> bytes:
+    """Tabela de uso de papel de um componente ampliada (itens com sufixo de variante)."""
+    rng = np.random.default_rng(seed)
+    df = _sample(_read_raw(url), fator, rng)
+    variantes = rng.integers(0, _variants(fator) * 4, len(df))
+    item_col = df.columns[0]
+    df[item_col] = [i if v == 0 else f"{i} #{v}" for i, v in zip(df[item_col], variantes)]
+    return _to_bytes(df)
+
+# ================== CADASTROS E ORÇAMENTOS (DataFrames) ==================
+def clients(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    cidades = [("Rio de Janeiro", "RJ"), ("São Paulo", "SP"), ("Belo Horizonte", "MG"), ("Curitiba", "PR")]
+    rows = []
+    for i in range(n):
+        cidade, uf = cidades[rng.integers(len(cidades))]
+        rows.append({
+            "Nome": f"Cliente {i}", "Razao Social": f"Empresa {i} Ltda", "CNPJ": f"{rng.integers(10**13, 10**14)}",
+            "Endereco": f"Rua {i}, {rng.integers(1, 999)}", "CEP": f"{rng.integers(10000, 99999)}-{rng.integers(100, 999)}",
+            "Cidade": cidade, "UF": uf, "Inscricao Estadual": "", "Email": f"cliente{i}@exemplo.com.br",
+            "Telefone": f"(21) 9{rng.integers(1000, 9999)}-{rng.integers(1000, 9999)}", "Forma de Pagamento": "PIX",
+            "Contato": f"Contato {i}", "Status": "Ativo",
+        })
+    return pd.DataFrame(rows, columns=config.COLUNAS_CLIENTES)
+
+def users(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    roles = rng.choice(["user", "user", "orcamentista", "admin"], n)
+    return pd.DataFrame({
+        "usuario": [f"usuario{i}" for i in range(n)],
+        "senha_hashed": HASH_EXEMPLO,
+        "nome_completo": [f"Usuário Número {i}" for i in range(n)],
+        "role": roles,
+        "status": "ativo",
+    }, columns=config.COLUNAS_USUARIOS)
+
+def budgets(n: int, seed: int = 0, n_users: int = 10, max_versoes: int = 3) -> pd.DataFrame:
+    """
+    Orçamentos com seleções reais (sorteadas de data/orcamentos_novo.csv) e
+    versões anteriores aninhadas como a edição pela tela grava: cada versão
+    guarda a linha inteira anterior, inclusive o VersoesJSON dela.
+    """
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(ORCAMENTOS_REFERENCIA).to_dict("records")
+    datas = _random_dates(n, rng, anos=1)
+    rows = []
+    for i in range(n):
+        modelo = base[rng.integers(len(base))]
+        usuario = int(rng.integers(n_users))
+        custo = float(modelo["CustoBase"]) * rng.uniform(0.9, 1.1)
+        row = {
+            **modelo,
+            "ID": f"ORC{i + 1}", "Usuario": f"usuario{usuario}", "NomeOrcamentista": f"Usuário Número {usuario}",
+            "Cliente": f"Cliente {rng.integers(max(n // 5, 1))}", "Quantidade": int(rng.choice([200, 500, 1500, 5000, 15000])),
+            "CustoBase": round(custo, 4), "PrecoVenda": round(custo * 2 / 0.968, 2),
+            "Data": datas[i].strftime("%d/%m/%Y"), "StatusOrcamento": STATUS[rng.integers(len(STATUS))],
+            "VersoesJSON": "[]", "VersoesOrcamento": 1,
+        }
+        versoes = []
+        for v in range(int(rng.integers(0, max_versoes + 1))):
+            versoes.append({"timestamp": f"2025-0{v + 1}-01 10:00:00", "data": dict(row)})
+            row["VersoesJSON"] = json.dumps(versoes)
+            row["VersoesOrcamento"] = len(versoes)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=config.COLUNAS_ORCAMENTOS)
+
+def templates(n: int, seed: int = 0) -> pd.DataFrame:
+    """Modelos de orçamento com as seleções dos modelos reais (data/templates.csv)."""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(config.TEMPLATES_FILE)
+    escolhidos = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    escolhidos["NomeTemplate"] = [f"{nome} #{i}" for i, nome in enumerate(escolhidos["NomeTemplate"])]
+    return escolhidos[config.COLUNAS_TEMPLATES]
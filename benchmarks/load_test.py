@@ -0,0 +1,397 @@
+# orcamento_pro/benchmarks/load_test.py
+"""
+Teste de carga: várias sessões simultâneas do app, sem navegador, com o
+streamlit.testing (AppTest). Cada sessão repete o fluxo de um orçamentista:
+login, carregar um modelo, mudar a quantidade, trocar o miolo, escolher o
+cliente, salvar (gera a proposta em PDF) e abrir o histórico.
+
+Mede a latência de cada rerun (p50/p95/p99 por passo), a memória por sessão
+e os erros (exceções do script, st.error e passos que não completaram).
+
+Roda sem rede: as tabelas de referência vêm dos arquivos locais (ou dos
+geradores sintéticos, com --escala), usuários/clientes/orçamentos/modelos e
+PDFs ficam em um diretório temporário, e a API do GitHub é trocada por um
+dublê com latência configurável. Qualquer outra chamada HTTP falha.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.load_test --sessoes 8 --iteracoes 2 [--escala 10] [--latencia-github 300]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+import streamlit.config
+import streamlit.logger
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+# Sem os avisos repetidos a cada rerun de cada sessão (cache sem runtime, widgets com valor no estado).
+# A opção vale para a configuração; set_log_level, para os loggers já criados.
+streamlit.config.set_option("logger.level", "error")
+streamlit.logger.set_log_level("error")
+
+import auth
+import config
+import data_services as ds
+import perf
+import snapshots
+import storage
+import warmup
+from benchmarks import generators as gen
+
+APP_FILE = os.path.join(config.BASE_DIR, "app.py")
+SENHA = "carga-123"
+TOKEN_GITHUB = "token-teste-de-carga"
+ORCAMENTOS_POR_ESCALA = 20
+N_CLIENTES = 50
+N_MODELOS = 10
+QUANTIDADES = [500, 1500, 5000, 15000]
+
+# ================== DUBLÊS (SEM REDE) ==================
+class _FakeResponse:
+    def __init__(self, status_code: int, payload: dict = None):
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+class FakeGitHub:
+    """
+    Dublê da API de conteúdo do GitHub: responde depois da latência
+    configurada (GET: arquivo inexistente, PUT: criado) e conta as chamadas.
+    Qualquer outra URL falha como se não houvesse rede.
+    """
+
+    def __init__(self, latencia_s: float):
+        self.latencia_s = latencia_s
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    def _responder(self, url: str, status: int, payload: dict = None) -> _FakeResponse:
+        if "api.github.com" not in str(url):
+            raise requests.ConnectionError(f"Sem rede no teste de carga: {url}")
+        time.sleep(self.latencia_s)
+        with self._lock:
+            self.chamadas += 1
+        return _FakeResponse(status, payload)
+
+    def get(self, url, *args, **kwargs):
+        return self._responder(url, 404)
+
+    def put(self, url, *args, **kwargs):
+        return self._responder(url, 201, {"content": {}})
+
+    def delete(self, url, *args, **kwargs):
+        return self._responder(url, 200)
+
+def _reference_urls() -> list:
+    urls = {config.URL_COMPRAS, config.URL_COMPRA_DIRETA, config.URL_TABELA_WIREO, config.URL_MOD_GGF}
+    urls.update(ds.COMPONENT_TABLES.values())
+    urls.update(config.CSV_MAP_IMPRESSAO.values())
+    return sorted(urls)
+
+def _write_reference_data(ref_dir: str, escala: int, seed: int):
+    """Copia as tabelas de referência locais; com escala > 1, compras e componentes vêm dos geradores."""
+    os.makedirs(ref_dir, exist_ok=True)
+    componentes = set(ds.COMPONENT_TABLES.values())
+    for url in _reference_urls():
+        if escala > 1 and url == config.URL_COMPRAS:
+            raw = gen.paper_purchases_csv(escala, seed)
+        elif escala > 1 and url == config.URL_COMPRA_DIRETA:
+            raw = gen.direct_purchases_csv(escala, seed)
+        elif escala > 1 and url in componentes:
+            raw = gen.component_csv(url, escala, seed)
+        else:
+            raw = snapshots.fetch_source(url)
+        file_name = os.path.basename(url)
+        with open(os.path.join(ref_dir, config.ARQUIVOS_LOCAIS_ALIAS.get(file_name, file_name)), "wb") as f:
+            f.write(raw)
+
+def _shared_runtime() -> mock.MagicMock:
+    """
+    Runtime único para todas as sessões, como num servidor de verdade. O AppTest
+    instala um Runtime falso no início de cada run e o remove no fim, o que entre
+    sessões simultâneas derruba o rerun das outras ("Runtime hasn't been created!").
+    """
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    return runtime
+
+@contextlib.contextmanager
+def offline_environment(escala: int, seed: int, n_usuarios: int, latencia_github_s: float):
+    """
+    Prepara o diretório temporário (tabelas, data/, snapshots, Propostas/) e
+    troca o GitHub pelo dublê enquanto o teste roda. Devolve o FakeGitHub.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="orcamento_carga_")
+    data_dir = os.path.join(tmpdir, "data")
+    os.makedirs(data_dir)
+    cwd = os.getcwd()
+    github = FakeGitHub(latencia_github_s)
+    # As fontes originais são lidas antes de trocar o diretório de referência
+    origem = config.DADOS_REFERENCIA_LOCAL or config.BASE_DIR
+    caminhos = {
+        "DADOS_REFERENCIA_LOCAL": os.path.join(tmpdir, "referencia"),
+        "SNAPSHOT_DIR": os.path.join(data_dir, "snapshots"),
+        "USERS_FILE": os.path.join(data_dir, "usuarios.csv"),
+        "CLIENTES_FILE": os.path.join(data_dir, "clientes.csv"),
+        "ORCAMENTOS_FILE": os.path.join(data_dir, "orcamentos_novo.csv"),
+        "TEMPLATES_FILE": os.path.join(data_dir, "templates.csv"),
+        "ORCAMENTOS_SEQ_FILE": os.path.join(data_dir, "orcamentos.seq"),
+    }
+    try:
+        with mock.patch.object(config, "DADOS_REFERENCIA_LOCAL", origem):
+            _write_reference_data(caminhos["DADOS_REFERENCIA_LOCAL"], escala, seed)
+            modelos = gen.templates(N_MODELOS, seed)
+        # Um hash de verdade (mesmo custo do bcrypt em produção), reaproveitado por todos os usuários
+        usuarios = gen.users(n_usuarios, seed).assign(
+            senha_hashed=auth._hash_password_sync(SENHA, config.BCRYPT_ROUNDS), status="ativo"
+        )
+        storage.save_csv(usuarios, caminhos["USERS_FILE"])
+        storage.save_csv(gen.clients(N_CLIENTES, seed), caminhos["CLIENTES_FILE"])
+        storage.save_csv(gen.budgets(ORCAMENTOS_POR_ESCALA * escala, seed, n_users=n_usuarios), caminhos["ORCAMENTOS_FILE"])
+        storage.save_csv(modelos, caminhos["TEMPLATES_FILE"])
+
+        with contextlib.ExitStack() as stack:
+            for nome, valor in caminhos.items():
+                stack.enter_context(mock.patch.object(config, nome, valor))
+            stack.enter_context(mock.patch.object(storage, "get_github_token", lambda: TOKEN_GITHUB))
+            for metodo in ("get", "put", "delete"):
+                stack.enter_context(mock.patch.object(requests, metodo, getattr(github, metodo)))
+            runtime = _shared_runtime()
+            stack.enter_context(mock.patch.object(Runtime, "instance", classmethod(lambda cls: runtime)))
+            stack.enter_context(mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)))
+            # Bytecode do app compilado uma vez para todas as sessões (o servidor também compartilha o cache).
+            # Compilar em várias threads ao mesmo tempo quebra o ast.parse do Python 3.11.
+            script_cache = ScriptCache()
+            # O AppTest liga global.appTest durante cada run e restaura o valor anterior no fim; com ela
+            # sempre ligada, o fim de um run não apaga o registro de widgets de outra sessão em andamento.
+            anterior = streamlit.config.get_option("global.appTest")
+            streamlit.config.set_option("global.appTest", True)
+            stack.callback(streamlit.config.set_option, "global.appTest", anterior)
+            for modulo in ("app_test", "local_script_runner"):
+                stack.enter_context(mock.patch(f"streamlit.testing.v1.{modulo}.ScriptCache", lambda: script_cache))
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            os.chdir(tmpdir)  # Propostas/ é relativo ao diretório atual
+            yield github
+    finally:
+        os.chdir(cwd)
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+# ================== SESSÕES ==================
+@dataclass
+class SessionResult:
+    sessao: int
+    medicoes: list = field(default_factory=list)   # (passo, ms)
+    erros: list = field(default_factory=list)      # (passo, mensagem)
+    memoria_estado_kb: float = 0.0
+    app: AppTest = None
+
+def _by_label(elements, label: str):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"Elemento '{label}' não encontrado na tela")
+
+def _session_state_kb(at: AppTest) -> float:
+    """Memória dos DataFrames guardados no estado da sessão (o grosso do que cada sessão mantém)."""
+    total = 0
+    for _, value in at.session_state.items():
+        if isinstance(value, pd.DataFrame):
+            total += int(value.memory_usage(deep=True).sum())
+    return total / 1024
+
+def run_session(n: int, iteracoes: int, n_usuarios: int, seed: int, timeout: float, atraso_s: float = 0.0) -> SessionResult:
+    """Executa o fluxo de um orçamentista `iteracoes` vezes em uma sessão nova."""
+    rng = random.Random(seed * 1000 + n)
+    result = SessionResult(sessao=n)
+    time.sleep(atraso_s)
+    at = result.app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+
+    atual = "abrir"
+
+    def passo(nome: str, acao):
+        nonlocal atual
+        atual = nome
+        start = time.perf_counter()
+        acao()
+        result.medicoes.append((nome, (time.perf_counter() - start) * 1000))
+        result.erros.extend((nome, str(e.value)) for e in at.exception)
+        result.erros.extend((nome, str(e.value)) for e in at.error)
+
+    def login():
+        at.sidebar.text_input[0].input(f"usuario{n % n_usuarios}")
+        at.sidebar.text_input[1].input(SENHA)
+        _by_label(at.button, "Entrar").click().run()
+        if not at.session_state["logged_in"]:
+            raise RuntimeError("login não concluído")
+
+    def navegar(pagina: str):
+        # O rádio de navegação muda de identidade quando a página muda (index=...), então o
+        # primeiro clique depois de uma troca se perde; o usuário clica de novo, e o teste também.
+        for _ in range(2):
+            _by_label(at.sidebar.radio, "Navegação").set_value(pagina).run()
+            if at.session_state["page"] == pagina:
+                return
+        raise RuntimeError(f"navegação para '{pagina}' não concluída")
+
+    def salvar():
+        _by_label(at.button, "💾 Salvar e Gerar Proposta de Orçamento").click().run()
+        if not any("salvo com sucesso" in s.value for s in at.success):
+            raise RuntimeError("orçamento não salvo")
+
+    try:
+        passo("abrir", at.run)
+        passo("login", login)
+        for _ in range(iteracoes):
+            modelo = rng.choice(at.selectbox(key="load_template_selector").options[1:])
+            passo("escolher_modelo", lambda: at.selectbox(key="load_template_selector").set_value(modelo).run())
+            passo("carregar_modelo", lambda: _by_label(at.button, "Carregar Modelo").click().run())
+            passo("quantidade", lambda: _by_label(at.number_input, "Quantidade total do orçamento:")
+                  .set_value(rng.choice(QUANTIDADES)).run())
+            miolo = at.selectbox(key="sel_miolo")
+            passo("componente", lambda: miolo.set_value(rng.choice(miolo.options[2:])).run())
+            cliente = _by_label(at.selectbox, "Selecione o Cliente")
+            passo("cliente", lambda: cliente.set_value(rng.choice(cliente.options[1:])).run())
+            passo("salvar", salvar)
+            passo("historico", lambda: navegar("Histórico de Orçamentos"))
+            passo("voltar_orcamento", lambda: navegar("Orçamento"))
+    except Exception as e:  # o passo não completou: registra e encerra esta sessão
+        result.erros.append((atual, f"{type(e).__name__}: {e}"))
+    result.memoria_estado_kb = _session_state_kb(at)
+    return result
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# ================== EXECUÇÃO E RELATÓRIO ==================
+def _percentis(valores: list) -> dict:
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {"n": len(valores), "p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1),
+            "max_ms": round(max(valores), 1)}
+
+def run(sessoes: int, iteracoes: int, escala: int = 1, latencia_github_ms: float = 300, rampa_s: float = 1.0,
+        seed: int = 0, timeout: float = 300) -> dict:
+    n_usuarios = max(1, sessoes)
+    with offline_environment(escala, seed, n_usuarios, latencia_github_ms / 1000) as github:
+        # Aquecimento (fora das estatísticas): as tabelas carregam em segundo plano, como no servidor,
+        # e uma primeira sessão completa passa por todo o resto que só roda uma vez por processo
+        start = time.perf_counter()
+        warmup.start()
+        warmup.wait(timeout)
+        aquecimento = run_session(-1, 1, n_usuarios, seed, timeout)
+        aquecimento_s = time.perf_counter() - start
+        aquecimento.app = None
+        perf.reset()
+
+        rng = random.Random(seed)
+        rss_antes = _rss_kb()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessoes, thread_name_prefix="sessao") as pool:
+            futures = [pool.submit(run_session, n, iteracoes, n_usuarios, seed, timeout, rng.uniform(0, rampa_s))
+                       for n in range(sessoes)]
+            resultados = [f.result() for f in futures]
+        duracao_s = time.perf_counter() - start
+        rss_depois = _rss_kb()  # as sessões (AppTest) ainda estão vivas aqui
+        chamadas_github = github.chamadas
+        spans = perf.summary_frame().head(10)
+
+    medicoes = [m for r in resultados for m in r.medicoes]
+    erros = [(r.sessao, passo, msg) for r in resultados for passo, msg in r.erros]
+    por_passo = {}
+    for passo, ms in medicoes:
+        por_passo.setdefault(passo, []).append(ms)
+    return {
+        "parametros": {"sessoes": sessoes, "iteracoes": iteracoes, "escala": escala,
+                       "latencia_github_ms": latencia_github_ms, "rampa_s": rampa_s, "semente": seed},
+        "aquecimento_s": round(aquecimento_s, 2),
+        "aquecimento_erros": aquecimento.erros,
+        "duracao_s": round(duracao_s, 2),
+        "reruns": len(medicoes),
+        "reruns_por_s": round(len(medicoes) / duracao_s, 2) if duracao_s else None,
+        "latencia": _percentis([ms for _, ms in medicoes]) if medicoes else {},
+        "latencia_por_passo": {p: _percentis(v) for p, v in por_passo.items()},
+        "memoria": {
+            "rss_por_sessao_kb": round((rss_depois - rss_antes) / sessoes, 1),
+            "estado_por_sessao_kb": round(statistics.mean(r.memoria_estado_kb for r in resultados), 1),
+        },
+        "sessoes_com_erro": len({s for s, _, _ in erros}),
+        "erros": [{"sessao": s, "passo": p, "mensagem": m} for s, p, m in erros],
+        "chamadas_github": chamadas_github,
+        "spans_mais_lentos": spans.round(1).to_dict("records"),
+    }
+
+def print_report(r: dict):
+    p = r["parametros"]
+    print(f"{p['sessoes']} sessões x {p['iteracoes']} iterações (escala {p['escala']}x, "
+          f"GitHub {p['latencia_github_ms']:.0f} ms) em {r['duracao_s']} s; aquecimento {r['aquecimento_s']} s")
+    print(f"{r['reruns']} reruns, {r['reruns_por_s']} reruns/s")
+    if r["latencia"]:
+        l = r["latencia"]
+        print(f"Latência do rerun: p50 {l['p50_ms']} ms, p95 {l['p95_ms']} ms, p99 {l['p99_ms']} ms, máx {l['max_ms']} ms")
+    print(f"\n{'passo':18s} {'n':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'máx ms':>9s}")
+    for passo, l in r["latencia_por_passo"].items():
+        print(f"{passo:18s} {l['n']:5d} {l['p50_ms']:9.1f} {l['p95_ms']:9.1f} {l['p99_ms']:9.1f} {l['max_ms']:9.1f}")
+    m = r["memoria"]
+    print(f"\nMemória por sessão: {m['rss_por_sessao_kb']:.0f} KB de RSS, {m['estado_por_sessao_kb']:.0f} KB em DataFrames no estado")
+    print(f"Chamadas ao GitHub (dublê): {r['chamadas_github']}")
+    print(f"Erros: {len(r['erros'])} em {r['sessoes_com_erro']} sessões")
+    for e in r["erros"][:10]:
+        print(f"  sessão {e['sessao']} / {e['passo']}: {e['mensagem'][:200]}")
+    if r["aquecimento_erros"]:
+        print(f"Erros no aquecimento: {r['aquecimento_erros'][:3]}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessoes", type=int, default=8, help="Sessões simultâneas")
+    parser.add_argument("--iteracoes", type=int, default=2, help="Repetições do fluxo por sessão")
+    parser.add_argument("--escala", type=int, default=1, help="Fator de ampliação das compras e do histórico")
+    parser.add_argument("--latencia-github", type=float, default=300, help="Latência simulada da API do GitHub (ms)")
+    parser.add_argument("--rampa", type=float, default=1.0, help="Janela (s) em que as sessões começam")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300, help="Tempo máximo de um rerun (s)")
+    parser.add_argument("--saida", help="Grava o relatório completo em JSON")
+    args = parser.parse_args(argv)
+
+    resultado = run(args.sessoes, args.iteracoes, args.escala, args.latencia_github, args.rampa, args.semente, args.timeout)
+    print_report(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False, default=str)
+    return 1 if resultado["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# orcamento_pro/benchmarks/startup_profile.py
+"""
+Perfil de inicialização: quanto tempo a primeira sessão leva até o
+formulário de login aparecer, e quais imports pesam nesse caminho.
+
+Cada medição roda em um processo novo (imports frios, como no primeiro
+acesso depois de subir o servidor), com `python -X importtime`:
+    streamlit   import do Streamlit e do AppTest (o servidor já tem isso carregado)
+    primeiro_run  execução do app.py até renderizar o login: imports do
+                  projeto, estado inicial da sessão e a tela
+Os imports feitos durante o primeiro run são listados em árvore (dois
+níveis) com o tempo acumulado, e os módulos pesados (PDF, HTTP, bcrypt,
+serviços de dados) que já estavam carregados ao fim do run são apontados.
+
+O primeiro run é medido com ORCAMENTO_AQUECIMENTO=0: a thread de
+aquecimento (warmup.py) começa depois do formulário de login e importa os
+serviços de dados em paralelo, o que misturaria os dois custos. Ela é
+medida à parte, em outro processo novo:
+    aquecimento   warmup.start() até a primeira rodada de cargas terminar
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.startup_profile [--repeticoes 5] [--saida inicio.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+MARCA = "### primeiro run ###"
+# Só deveriam ser carregados quando a página que precisa deles é usada
+PESADOS = [
+    "fpdf", "generate_pdf", "generate_ordem_prototipo", "requests", "bcrypt",
+    "data_services", "snapshots", "calculations", "optimizer", "crossover", "risk", "pricing",
+    "descriptions", "product_catalog", "multiprocessing",
+]
+_LINHA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+# ================== PROCESSO FILHO ==================
+def _child():
+    inicio = time.perf_counter()
+    import streamlit.config
+    import streamlit.logger
+    from streamlit.testing.v1 import AppTest
+    streamlit.config.set_option("logger.level", "error")
+    streamlit.logger.set_log_level("error")
+    streamlit_ms = (time.perf_counter() - inicio) * 1000
+
+    sys.stderr.write(MARCA + "\n")
+    sys.stderr.flush()
+    inicio = time.perf_counter()
+    at = AppTest.from_file(APP_FILE, default_timeout=120).run()
+    primeiro_run_ms = (time.perf_counter() - inicio) * 1000
+
+    print(json.dumps({
+        "streamlit_ms": streamlit_ms,
+        "primeiro_run_ms": primeiro_run_ms,
+        "login_renderizado": any(b.label == "Entrar" for b in at.button),
+        "erros": [str(e.value) for e in at.exception],
+        "pesados_carregados": [m for m in PESADOS if m in sys.modules],
+    }))
+
+def _child_warmup():
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    import warmup
+    inicio = time.perf_counter()
+    warmup.start()
+    warmup.wait()
+    print(json.dumps({"aquecimento_ms": (time.perf_counter() - inicio) * 1000, "erros": list(warmup._errors.values())}))
+
+def _import_tree(stderr: str) -> list:
+    """Imports feitos depois da marca: (nível, módulo, acumulado em ms), na ordem do -X importtime."""
+    depois = stderr.split(MARCA, 1)[-1]
+    linhas = []
+    for linha in depois.splitlines():
+        m = _LINHA.match(linha)
+        if m:
+            linhas.append(((len(m.group(3)) - 1) // 2, m.group(4), int(m.group(2)) / 1000))
+    return linhas
+
+def _run_child(*args: str, **env: str) -> subprocess.CompletedProcess:
+    proc = subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, cwd=os.path.dirname(APP_FILE),
+        env={**os.environ, **env},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"processo de medição falhou:\n{proc.stderr[-2000:]}")
+    return proc
+
+def _measure_once() -> dict:
+    proc = _run_child("-X", "importtime", "-m", "benchmarks.startup_profile", "--filho", ORCAMENTO_AQUECIMENTO="0")
+    resultado = json.loads(proc.stdout.strip().splitlines()[-1])
+    resultado["imports"] = _import_tree(proc.stderr)
+    return resultado
+
+def _measure_warmup() -> dict:
+    proc = _run_child("-m", "benchmarks.startup_profile", "--filho-aquecimento", ORCAMENTO_AQUECIMENTO="1")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# ================== EXECUÇÃO E RELATÓRIO ==================
+def run(repeticoes: int) -> dict:
+    medicoes = [_measure_once() for _ in range(repeticoes)]
+    aquecimentos = [_measure_warmup() for _ in range(repeticoes)]
+    # A árvore de imports vem da medição mediana do primeiro run
+    mediana = sorted(medicoes, key=lambda m: m["primeiro_run_ms"])[len(medicoes) // 2]
+    por_modulo = {}
+    for m in medicoes:
+        for nivel, nome, ms in m["imports"]:
+            if nivel <= 1:
+                por_modulo.setdefault(nome, []).append(ms)
+    arvore = [
+        {"nivel": nivel, "modulo": nome, "acumulado_ms": round(statistics.median(por_modulo[nome]), 1)}
+        for nivel, nome, _ in mediana["imports"] if nivel <= 1
+    ]
+    return {
+        "repeticoes": repeticoes,
+        "streamlit_ms": round(statistics.median(m["streamlit_ms"] for m in medicoes), 1),
+        "primeiro_run_ms": round(statistics.median(m["primeiro_run_ms"] for m in medicoes), 1),
+        "primeiro_run_min_ms": round(min(m["primeiro_run_ms"] for m in medicoes), 1),
+        "imports_primeiro_run_ms": round(sum(i["acumulado_ms"] for i in arvore if i["nivel"] == 0), 1),
+        "login_renderizado": all(m["login_renderizado"] for m in medicoes),
+        "erros": mediana["erros"],
+        "pesados_carregados": mediana["pesados_carregados"],
+        "imports": arvore,
+        "aquecimento_ms": round(statistics.median(a["aquecimento_ms"] for a in aquecimentos), 1),
+        "erros_aquecimento": sorted({e for a in aquecimentos for e in a["erros"]}),
+    }
+
+def print_report(r: dict, minimo_ms: float = 1.0):
+    print(f"Import do Streamlit/AppTest: {r['streamlit_ms']} ms (fora do tempo até o login)")
+    print(f"Primeiro run até o login: {r['primeiro_run_ms']} ms (mediana de {r['repeticoes']}, mín {r['primeiro_run_min_ms']} ms)")
+    print(f"  dos quais imports: {r['imports_primeiro_run_ms']} ms")
+    if not r["login_renderizado"]:
+        print("  ATENÇÃO: o formulário de login não foi renderizado")
+    for erro in r["erros"]:
+        print(f"  erro: {erro[:200]}")
+    print(f"\nImports durante o primeiro run (>= {minimo_ms:g} ms):")
+    for i in r["imports"]:
+        if i["acumulado_ms"] >= minimo_ms:
+            print(f"  {i['acumulado_ms']:8.1f} ms  {'  ' * i['nivel']}{i['modulo']}")
+    pesados = ", ".join(r["pesados_carregados"]) or "nenhum"
+    print(f"\nMódulos pesados já carregados na tela de login: {pesados}")
+    print(f"\nAquecimento (thread iniciada depois do login, primeira rodada): {r['aquecimento_ms']} ms")
+    for erro in r["erros_aquecimento"]:
+        print(f"  erro: {erro[:200]}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos medidos (usa a mediana)")
+    parser.add_argument("--saida", help="Grava o perfil completo em JSON")
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--filho-aquecimento", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.filho:
+        _child()
+        return 0
+    if args.filho_aquecimento:
+        _child_warmup()
+        return 0
+
+    resultado = run(args.repeticoes)
+    print_report(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    return 0 if resultado["login_renderizado"] and not resultado["erros"] and not resultado["erros_aquecimento"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# orcamento_pro/budget_fields.py
+"""
+Leitura sob demanda das colunas JSON do histórico de orçamentos
+(SelecoesJSON, AjustesJSON e VersoesJSON).
+
+    selecoes = budget_fields.selecoes(orcamento)   # linha do df_orcamentos ou dict de uma versão
+
+O DataFrame continua guardando o texto, como é salvo no CSV; só as linhas
+que a tela realmente abre são interpretadas, e cada campo é lido uma única
+vez por (ID, versão do orçamento, conteúdo) e fica em um LRU limitado. As
+listagens não usam este módulo: elas não precisam de nenhum campo JSON.
+
+Os valores devolvidos são compartilhados entre os reruns e as sessões:
+não alterar. Quem vai modificar (ex: carregar seleções e ajustes para
+edição) trabalha sobre uma cópia (copy.deepcopy ou list(...)).
+"""
+import json
+from functools import lru_cache
+
+import pandas as pd
+
+# Coluna -> tipo esperado (campo vazio, inválido ou de outro tipo vira um valor vazio desse tipo)
+CAMPOS_JSON = {"SelecoesJSON": dict, "AjustesJSON": list, "VersoesJSON": list}
+
+@lru_cache(maxsize=1024)
+def _parse(budget_id: str, versao: str, coluna: str, texto: str):
+    tipo = CAMPOS_JSON[coluna]
+    try:
+        valor = json.loads(texto)
+    except Exception:
+        return tipo()
+    return valor if isinstance(valor, tipo) else tipo()
+
+def field(orcamento, coluna: str):
+    """
+    Valor de uma coluna JSON de um orçamento, lido uma vez por (ID, versão, conteúdo).
+
+    Args:
+        orcamento: Linha do df_orcamentos (pd.Series) ou o dict "data" de uma versão salva.
+        coluna (str): Uma das chaves de CAMPOS_JSON.
+    """
+    texto = orcamento.get(coluna)
+    if not isinstance(texto, str) or not texto:
+        return CAMPOS_JSON[coluna]()
+    versao = orcamento.get("VersoesOrcamento", 1)
+    versao = "" if pd.isna(versao) else str(versao)
+    return _parse(str(orcamento.get("ID", "")), versao, coluna, texto)
+
+def selecoes(orcamento) -> dict:
+    """Seleções salvas do orçamento (SelecoesJSON)."""
+    return field(orcamento, "SelecoesJSON")
+
+def ajustes(orcamento) -> list:
+    """Ajustes manuais do orçamento (AjustesJSON)."""
+    return field(orcamento, "AjustesJSON")
+
+def versoes(orcamento) -> list:
+    """Versões anteriores do orçamento (VersoesJSON), da mais antiga para a mais recente."""
+    return field(orcamento, "VersoesJSON")
+
+def cache_info():
+    """Estatísticas do LRU (hits = leituras de JSON evitadas)."""
+    return _parse.cache_info()
@@ -3,12 +3,165 @@
 Módulo para a lógica de negócios principal (cálculos de custos).
 Inclui a nova lógica para cálculo de componentes personalizados.
 """
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 import re
+import config
+import imposition
+import product_catalog
+
+# ================== LINHAS DE CUSTO ==================
+# Categorias usadas no resumo financeiro
+CATEGORIA_MATERIAL = "Papel/Material"
+CATEGORIA_SERVICOS = "Impressão/Serviços"
+CATEGORIA_AVIAMENTOS = "Aviamentos"
+CATEGORIA_MOD_GGF = "MOD+GGF"
+
+@dataclass(slots=True)
+class CostLine:
+    """
+    Uma linha do detalhamento de custos.
+    unit_cost é o custo por unidade do orçamento; quantity é o quanto o
+    componente consome no orçamento inteiro, medido em unit.
+    price_key/purchase_price: item de compra cujo preço entrou em unit_cost
+    (proporcionalmente) e o preço usado — base da análise de risco (risk.py).
+    """
+    component: str
+    category: str
+    unit_cost: float
+    quantity: float | None = None
+    unit: str = ""
+    details: str = ""
+    price_key: tuple | None = None
+    purchase_price: float | None = None
+
+# Origem do preço de compra (price_key = (fonte, item))
+FONTE_PAPEL = "papel"                  # item = PapelLimpo
+FONTE_COMPRA_DIRETA = "compra_direta"  # item = (CATEGORIA_MATERIAL_PCP, NomeLimpo)
+
+# Esquema fixo da tabela de detalhes (e de qualquer análise sobre ela)
+COST_LINE_COLUMNS = ("component", "quantity", "unit", "unit_cost", "details", "category")
+
+def cost_lines_to_frame(lines) -> pd.DataFrame:
+    """Monta o DataFrame das linhas de custo em uma única construção colunar."""
+    lines = list(lines)
+    return pd.DataFrame({
+        "component": pd.Series([l.component for l in lines], dtype=object),
+        "quantity": pd.Series([l.quantity for l in lines], dtype="float64"),
+        "unit": pd.Series([l.unit for l in lines], dtype=object),
+        "unit_cost": pd.Series([l.unit_cost for l in lines], dtype="float64"),
+        "details": pd.Series([str(l.details) for l in lines], dtype=object),
+        "category": pd.Series([l.category for l in lines], dtype=object),
+    }, columns=list(COST_LINE_COLUMNS))
+
+# Laminação fosca, em R$ por m² de folha laminada
+LAMINACAO_PRECO_M2 = 1.60
+
+# ================== FORMATOS DOS PRODUTOS ==================
+# Geometria e preços de impressão digital vêm do catálogo (product_catalog)
+base_product_name = product_catalog.base_product_name
+
+def parse_paper_dimensions(paper_name: str) -> tuple[float, float] | None:
+    """
+    Dimensões (cm) no nome do papel, na ordem em que aparecem, ou None.
+    Alguns cadastros vêm em milímetros (ex: '660 X 960'): medidas a partir de
+    200 são convertidas, pois nenhuma folha de impressão passa de 2 m.
+    """
+    match = re.search(r'(\d+)\s*[xX×]\s*(\d+)', paper_name.replace('g/m2', '').replace('gsm', ''))
+    if not match:
+        return None
+    dims = float(match.group(1)), float(match.group(2))
+    if min(dims) >= 200:
+        dims = dims[0] / 10, dims[1] / 10
+    return dims
+
+@dataclass(frozen=True, slots=True)
+class PaperSpec:
+    """Dados de um papel extraídos na carga das compras (ver ds.load_paper_index)."""
+    nome: str
+    familia: str
+    gramatura: float | None
+    largura_cm: float | None
+    altura_cm: float | None
+    preco_medio: float
+
+    @property
+    def has_dimensions(self) -> bool:
+        """Sem dimensões o papel não serve para imposição (capa digital) nem laminação offset."""
+        return self.largura_cm is not None and self.altura_cm is not None
+
+    @property
+    def dimensions(self) -> tuple[float, float] | None:
+        return (self.largura_cm, self.altura_cm) if self.has_dimensions else None
+
+# ================== RENDIMENTO PAPEL x PRODUTO ==================
+@dataclass(frozen=True, slots=True)
+class PaperYield:
+    """Rendimento de um papel na capa digital de um produto (pré-calculado na carga)."""
+    paper: str
+    product: str
+    formato_util: str
+    capas_por_folha_util: int
+    folhas_uteis_por_papel: int
+    capas_por_folha: int
+    desperdicio_pct: float
+    preco_folha: float
+    custo_papel_por_capa: float | None
+    layout_capas: imposition.Layout
+    layout_papel: imposition.Layout
+
+def compute_paper_yield(base_product: str, paper_name: str, paper_dims: tuple[float, float], preco_folha: float) -> PaperYield | None:
+    """
+    Calcula o rendimento do papel para a capa do produto: capas por folha útil,
+    folhas úteis por folha de papel, capas por folha e desperdício de área.
+    Retorna None se o produto não estiver no catálogo.
+    """
+    produto = product_catalog.get_catalog().get(base_product)
+    if produto is None:
+        return None
+    util = produto.formato_util
+    util_l, util_a = util.largura_cm, util.altura_cm
+    papel_l, papel_a = max(paper_dims), min(paper_dims)
+
+    layout_capas = imposition.best_layout(
+        imposition.cm_to_mm(util_l), imposition.cm_to_mm(util_a),
+        imposition.cm_to_mm(produto.largura_aberta_cm), imposition.cm_to_mm(produto.altura_aberta_cm)
+    )
+    # Folhas úteis são cortadas do papel sem sangria nem espaçamento
+    layout_papel = imposition.best_layout(
+        imposition.cm_to_mm(papel_l), imposition.cm_to_mm(papel_a),
+        imposition.cm_to_mm(util_l), imposition.cm_to_mm(util_a), bleed=0, gutter=0
+    )
+    capas_por_folha = layout_capas.count * layout_papel.count
+    area_papel = papel_l * papel_a
+    area_capa = produto.largura_aberta_cm * produto.altura_aberta_cm
+    desperdicio = 1 - capas_por_folha * area_capa / area_papel if area_papel else 1.0
+    return PaperYield(
+        paper=paper_name,
+        product=produto.nome,
+        formato_util=util.nome,
+        capas_por_folha_util=layout_capas.count,
+        folhas_uteis_por_papel=layout_papel.count,
+        capas_por_folha=capas_por_folha,
+        desperdicio_pct=round(desperdicio * 100, 2),
+        preco_folha=preco_folha,
+        custo_papel_por_capa=preco_folha / capas_por_folha if capas_por_folha else None,
+        layout_capas=layout_capas,
+        layout_papel=layout_papel,
+    )
 
 # ================== FUNÇÕES AUXILIARES ==================
-def get_average_paper_price(paper_name: str, df_paper_purchases: pd.DataFrame) -> tuple[float | None, str | None]:
+def get_average_paper_price(paper_name: str, df_paper_purchases: pd.DataFrame, price_book=None) -> tuple[float | None, str | None]:
+    """
+    Preço do papel: média das 3 últimas compras ou, com price_book (pricing.PriceBook),
+    o preço da estratégia escolhida para o orçamento.
+    """
+    if price_book is not None:
+        price = price_book.price(paper_name)
+        if price is None:
+            return None, f"Papel '{paper_name}' não foi encontrado nos registros de compra."
+        return price, None
     df_specific_paper = df_paper_purchases[df_paper_purchases['PapelLimpo'] == paper_name]
     if df_specific_paper.empty:
         return None, f"Papel '{paper_name}' não foi encontrado nos registros de compra."
@@ -16,6 +169,56 @@ def get_average_paper_price(paper_name: str, df_paper_purchases: pd.DataFrame) -
     average_price = last_3_purchases['ValorUnitario'].mean()
     return average_price, None
 
+# ================== TABELAS DE IMPRESSÃO OFFSET ==================
+@dataclass(frozen=True, slots=True, eq=False)
+class ImpressionSteps:
+    """
+    Tabela de impressão offset compilada em arrays ordenados por LAMINAS.
+    O degrau de uma quantidade é a primeira linha com LAMINAS >= quantidade;
+    acima da tabela, vale a última linha. Os arrays são somente leitura
+    (o objeto é compartilhado pelo cache).
+    """
+    laminas: np.ndarray
+    qtd_fls: np.ndarray
+    valor: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ImpressionSteps":
+        df = df.sort_values('LAMINAS', kind="stable")
+        arrays = [df[col].to_numpy(dtype=float, copy=True) for col in ('LAMINAS', 'QTD_FLS', 'VALOR ML (R$)')]
+        for a in arrays:
+            a.setflags(write=False)
+        return cls(*arrays)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.laminas) == 0
+
+    def step_index(self, quantity):
+        """Posição do degrau de cada quantidade (escalar ou array), por busca binária."""
+        return np.minimum(np.searchsorted(self.laminas, quantity, side="left"), len(self.laminas) - 1)
+
+    def lookup(self, quantity):
+        """(folhas, valor do serviço) do degrau da quantidade; aceita escalar ou array."""
+        idx = self.step_index(quantity)
+        return self.qtd_fls[idx], self.valor[idx]
+
+def impression_steps(table) -> ImpressionSteps:
+    """Aceita a tabela já compilada ou o DataFrame de ds.load_impression_table."""
+    return table if isinstance(table, ImpressionSteps) else ImpressionSteps.from_frame(table)
+
+def offset_cover_costs(quantities, steps: ImpressionSteps, paper_price: float) -> dict:
+    """
+    Custos da capa offset para um array de quantidades, sem laços (varreduras em lote).
+    Mesmas fórmulas de calculate_offset_cover_cost.
+    """
+    q = np.asarray(quantities, dtype=float)
+    folhas, valor = steps.lookup(q)
+    papel_total = folhas * paper_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_unit = np.where(q > 0, (papel_total + valor) / q, 0.0)
+    return {"folhas": folhas, "papel_total": papel_total, "impressao_total": valor, "total_cost_unit": total_unit}
+
 # ================== CÁLCULO DA CAPA ==================
 # orcamento_pro/calculations.py
 def calculate_offset_cover_cost(
@@ -23,29 +226,38 @@ def calculate_offset_cover_cost(
     quantity: int,
     paper_name: str,
     df_paper_purchases: pd.DataFrame,
-    df_impression_table: pd.DataFrame
+    df_impression_table,
+    price_book=None
 ) -> dict:
-    if df_impression_table.empty:
+    """
+    Custo da capa offset: degrau da tabela de impressão + folhas de papel.
+    df_impression_table: ImpressionSteps (ds.load_impression_steps) ou o DataFrame da tabela.
+    """
+    steps = impression_steps(df_impression_table)
+    if steps.empty:
         return {"error": f"Tabela de impressão para '{product_name}' não encontrada ou vazia."}
-    try:
-        service_row = df_impression_table[df_impression_table['LAMINAS'] >= quantity].iloc[0]
-    except IndexError:
-        service_row = df_impression_table.iloc[-1]
-    
-    total_sheets = int(service_row['QTD_FLS'])
-    impression_cost_total = service_row['VALOR ML (R$)']
-    paper_avg_price, error = get_average_paper_price(paper_name, df_paper_purchases)
+    folhas, valor = steps.lookup(quantity)
+    total_sheets = int(folhas)
+    impression_cost_total = float(valor)
+    paper_avg_price, error = get_average_paper_price(paper_name, df_paper_purchases, price_book)
     if error: return {"error": error}
     paper_cost_total = paper_avg_price * total_sheets
     total_cost_unit = (paper_cost_total + impression_cost_total) / quantity if quantity > 0 else 0
+    paper_cost_unit = paper_cost_total / quantity if quantity > 0 else 0
+    service_cost_unit = impression_cost_total / quantity if quantity > 0 else 0
     
     return {
         "total_cost_unit": total_cost_unit,
-        "paper_cost_unit": paper_cost_total / quantity if quantity > 0 else 0,
-        "service_cost_unit": impression_cost_total / quantity if quantity > 0 else 0,
+        "paper_cost_unit": paper_cost_unit,
+        "service_cost_unit": service_cost_unit,
         "total_sheets": total_sheets,
         "paper_name": paper_name,
         "quantity": total_sheets,  # ← Nova linha: quantidade de folhas usadas
+        "lines": [
+            CostLine("Capa - Papel/Material", CATEGORIA_MATERIAL, paper_cost_unit, total_sheets, "folhas", paper_name,
+                     (FONTE_PAPEL, paper_name), paper_avg_price),
+            CostLine("Capa - Impressão", CATEGORIA_SERVICOS, service_cost_unit, quantity, "un", "Serviço de impressão da capa"),
+        ],
         "error": None
     }
 
@@ -62,6 +274,8 @@ def calculate_leather_cover_cost(material_name: str, direct_purchases_cats: dict
                     "service_cost_unit": 0,
                     "paper_name": material_name,
                     "quantity": 1,  # ← Nova linha: quantidade de folhas usadas
+                    "lines": [CostLine("Capa - Papel/Material", CATEGORIA_MATERIAL, item["VALOR_UNITARIO"], 1, "un", material_name,
+                                       (FONTE_COMPRA_DIRETA, ("COURO", material_name)), item["VALOR_UNITARIO"])],
                     "error": None
                 }
     return {"error": f"Material de couro '{material_name}' não encontrado."}
@@ -71,40 +285,20 @@ def calculate_digital_cover_cost(
     paper_name: str,
     impression_type: str,
     budget_quantity: int,
-    df_paper_purchases: pd.DataFrame
+    df_paper_purchases: pd.DataFrame,
+    paper_yield: PaperYield = None,
+    price_book=None
 ) -> dict:
     """
     Calcula o custo unitário da capa para produtos de policromia (Digital).
+    paper_yield: rendimento pré-calculado (ds.load_paper_yield_index); se
+    ausente, é calculado a partir do nome do papel.
+    price_book: preços na estratégia do orçamento (padrão: média das 3 últimas compras).
     """
-    # Dimensões do produto
-    formatos_abertos = {
-        'CADERNETA 9X13': {'larg': 22, 'alt': 15.8},
-        'CADERNETA 14X21': {'larg': 33.7, 'alt': 24.2},
-        'REVISTA 9X13': {'larg': 19, 'alt': 14},
-        'REVISTA 14X21': {'larg': 29, 'alt': 22},
-        'REVISTA 19X25': {'larg': 40, 'alt': 26},
-        'CADERNO WIRE-O 17X24': {'larg': 43.8, 'alt': 27.8},
-        'CADERNO WIRE-O 20X28': {'larg': 49.2, 'alt': 31.3},
-        'PLANNER WIRE-O A5': {'larg': 41, 'alt': 24.7},
-        'BLOCO WIRE-O 12X20': {'larg': 31.4, 'alt': 23},
-        'FICHARIO A6': {'larg': 35, 'alt': 19.5},
-        'FICHARIO A5': {'larg': 45, 'alt': 26},
-        'FICHARIO 17X24': {'larg': 49.2, 'alt': 28.4},
-        'CADERNO ORGANIZADOR A5': {'larg': 41.5, 'alt': 24.7},
-        'CADERNO ORGANIZADOR 17X24': {'larg': 46, 'alt': 27.7}
-    }
-    base_product = product_name.replace(" - POLICROMIA", "").strip()
-    if base_product not in formatos_abertos:
+    base_product = base_product_name(product_name)
+    produto = product_catalog.get_catalog().get(base_product)
+    if produto is None:
         return {"error": f"Formato do produto '{base_product}' não encontrado."}
-    larg_capa, alt_capa = formatos_abertos[base_product]['larg'], formatos_abertos[base_product]['alt']
-    
-    # Determinar o formato útil de impressão
-    if "17X24" in base_product or "20X28" in base_product:
-        util_l, util_a = 56, 33
-        formato_preco = '56x33'
-    else:
-        util_l, util_a = 47, 33
-        formato_preco = '47x33'
     
     # Determinar o tipo de impressão
     tipo_impressao = None
@@ -114,31 +308,23 @@ def calculate_digital_cover_cost(
             break
     if not tipo_impressao:
         return {"error": "Tipo de impressão digital não especificado."}
-    
+
+    if paper_yield is None:
+        paper_avg_price, error = get_average_paper_price(paper_name, df_paper_purchases, price_book)
+        if error:
+            return {"error": error}
+        paper_dims = parse_paper_dimensions(paper_name)
+        if not paper_dims:
+            return {"error": "Dimensões do papel não encontradas no nome do papel."}
+        paper_yield = compute_paper_yield(base_product, paper_name, paper_dims, paper_avg_price)
+
     # Preço unitário da impressão digital
-    PRECO_DIGITAL = {
-        '47x33': {
-            '4/0': 1.16,
-            '4/1': 1.40,
-            '1/0': 0.24,
-            '1/1': 0.48
-        },
-        '56x33': {
-            '4/0': 2.32,
-            '4/1': 2.80,
-            '1/0': 0.48,
-            '1/1': 0.96
-        }
-    }
-    preco_unitario = PRECO_DIGITAL[formato_preco][tipo_impressao]
+    preco_unitario = produto.formato_util.preco(tipo_impressao)
+    if preco_unitario is None:
+        return {"error": f"Sem preço de impressão {tipo_impressao} para o formato {produto.formato_util.nome}."}
     
-    # Calcular o número de capas por folha útil
-    def max_por_folha(folha_l, folha_a, peca_l, peca_a):
-        h1 = (folha_l // peca_l) * (folha_a // peca_a)
-        h2 = (folha_l // peca_a) * (folha_a // peca_l)
-        return max(h1, h2) if h1 > 0 or h2 > 0 else 0
-    
-    capas_por_folha_util = max_por_folha(util_l, util_a, larg_capa, alt_capa)
+    # Número de capas por folha útil (arranjo em guilhotina, orientações mistas)
+    capas_por_folha_util = paper_yield.capas_por_folha_util
     if capas_por_folha_util == 0:
         return {"error": "Não é possível encaixar capas na folha útil."}
     
@@ -150,26 +336,17 @@ def calculate_digital_cover_cost(
     custo_impressao_unitario = custo_impressao_total / budget_quantity
     
     # Custo do papel
-    df_paper = df_paper_purchases[df_paper_purchases['PapelLimpo'] == paper_name]
-    if df_paper.empty:
-        return {"error": f"Papel '{paper_name}' não encontrado nos registros de compra."}
-    paper_avg_price, error = get_average_paper_price(paper_name, df_paper_purchases)
-    if error:
-        return {"error": error}
-
-    match = re.search(r'(\d+)\s*[xX×]\s*(\d+)', paper_name.replace('g/m2', '').replace('gsm', ''))
-    if not match:
-        return {"error": "Dimensões do papel não encontradas no nome do papel."}
-    
-    papel_l, papel_a = float(match.group(1)), float(match.group(2))
-    if papel_l < papel_a: papel_l, papel_a = papel_a, papel_l
-    
-    pecas_por_folha_de_papel = max_por_folha(papel_l, papel_a, util_l, util_a)
+    pecas_por_folha_de_papel = paper_yield.folhas_uteis_por_papel
     if pecas_por_folha_de_papel == 0:
         return {"error": "Não é possível encaixar folhas úteis no papel."}
         
     folhas_papel_necessarias = int(np.ceil(folhas_uteis_necessarias / pecas_por_folha_de_papel))
-    custo_papel_total = folhas_papel_necessarias * paper_avg_price
+    preco_folha = paper_yield.preco_folha
+    if price_book is not None:
+        preco_folha, error = get_average_paper_price(paper_name, df_paper_purchases, price_book)
+        if error:
+            return {"error": error}
+    custo_papel_total = folhas_papel_necessarias * preco_folha
     custo_papel_unitario = custo_papel_total / budget_quantity if budget_quantity > 0 else 0
     
     # Custo total
@@ -182,13 +359,21 @@ def calculate_digital_cover_cost(
         "paper_name": paper_name,
         "quantity": folhas_papel_necessarias,  # ← Nova linha: quantidade de folhas usadas
         "folhas_uteis_necessarias": folhas_uteis_necessarias,  # NOVO: quantidade de folhas úteis necessárias
+        "layout_capas": paper_yield.layout_capas,
+        "layout_papel": paper_yield.layout_papel,
+        "lines": [
+            CostLine("Capa - Papel/Material", CATEGORIA_MATERIAL, custo_papel_unitario, folhas_papel_necessarias, "folhas", paper_name,
+                     (FONTE_PAPEL, paper_name), preco_folha),
+            CostLine("Capa - Impressão", CATEGORIA_SERVICOS, custo_impressao_unitario, budget_quantity, "un", "Serviço de impressão da capa"),
+        ],
         "error": None
     }
 
 # ================== CÁLCULO DE COMPONENTES ==================
 def calculate_component_cost(
     item_name: str, df_component_data: pd.DataFrame,
-    df_paper_purchases: pd.DataFrame, budget_quantity: int, component_type: str
+    df_paper_purchases: pd.DataFrame, budget_quantity: int, component_type: str,
+    price_book=None
 ) -> dict:
     """
     Calcula o custo de um componente padrão (ex: Miolo Pautado).
@@ -200,7 +385,7 @@ def calculate_component_cost(
         approved_quantity = item_row.get('QuantidadeAprovada', 1)
         if approved_quantity <= 0: approved_quantity = 1
 
-        paper_avg_price, error = get_average_paper_price(paper_needed, df_paper_purchases)
+        paper_avg_price, error = get_average_paper_price(paper_needed, df_paper_purchases, price_book)
         if error: return {"error": error}
 
         paper_cost_per_unit = (paper_avg_price * total_paper_sheets) / approved_quantity
@@ -226,6 +411,11 @@ def calculate_component_cost(
             "paper_name": paper_needed,
             "last_nf_date": last_nf_date,
             "quantity": budget_quantity,  # ← Nova linha: quantidade de folhas usadas
+            "lines": [
+                CostLine(f"{item_name} - Material", CATEGORIA_MATERIAL, paper_cost_per_unit, budget_quantity, "un", f"Papel: {paper_needed}",
+                         (FONTE_PAPEL, paper_needed), paper_avg_price),
+                CostLine(f"{item_name} - Serviço", CATEGORIA_SERVICOS, service_cost_per_unit, budget_quantity, "un", "Custo de serviço do componente"),
+            ],
             "error": None
         }
     except Exception as e:
@@ -251,7 +441,7 @@ def calculate_hot_stamping_cost(
         cost_per_thousand = 1500.0
     else:
         # Se for 'Nenhum' ou 'Interno', o custo adicional é zero.
-        return {"total_cost_unit": 0, "details": hot_stamping_type, "error": None}
+        return {"total_cost_unit": 0, "details": hot_stamping_type, "lines": [], "error": None}
 
     # --- LÓGICA CORRIGIDA AQUI ---
     # Calcular por milheiro: 2.000 = 2 milheiros (arredondando para cima)
@@ -261,10 +451,12 @@ def calculate_hot_stamping_cost(
     
     # O custo unitário é sempre o custo total dividido pela quantidade.
     cost_per_unit = total_cost / budget_quantity
+    details = f"{hot_stamping_type} (R$ {total_cost:,.2f} total)"
 
     return {
         "total_cost_unit": cost_per_unit,
-        "details": f"{hot_stamping_type} (R$ {total_cost:,.2f} total)",
+        "details": details,
+        "lines": [CostLine("Acabamento - Hot Stamping", CATEGORIA_SERVICOS, cost_per_unit, budget_quantity, "un", details)],
         "error": None
     }
 
@@ -275,7 +467,8 @@ def calculate_lamination_cost(
     df_paper_purchases: pd.DataFrame,
     offset_sheets: int = None,
     digital_sheets: int = None,
-    product_name: str = None
+    product_name: str = None,
+    paper_spec: PaperSpec = None
 ) -> dict:
     """
     Calcula o custo de laminação para Offset ou Digital.
@@ -283,15 +476,15 @@ def calculate_lamination_cost(
     - Digital: usa quantidade de folhas úteis e formato útil baseado no tipo de produto.
       Se o produto for 17x24 ou 20x28, usa formato útil 56x33, senão usa 47x33.
       Para digital, a quantidade de folhas é igual à quantidade de folhas úteis necessárias para imprimir o produto.
-    Fórmula: (altura_m * largura_m) * 1.60 * quantidade de folhas
+    Fórmula: (altura_m * largura_m) * LAMINACAO_PRECO_M2 * quantidade de folhas
+    paper_spec: dados do papel já extraídos na carga; sem ele, as dimensões vêm do nome.
     """
     # Offset: usa formato do papel selecionado
     if "Offset" in impression_type:
-        match = re.search(r'(\d+)\s*[xX×]\s*(\d+)', paper_name.replace('g/m2', '').replace('gsm', ''))
-        if not match:
+        dims = paper_spec.dimensions if paper_spec is not None else parse_paper_dimensions(paper_name)
+        if not dims:
             return {"error": "Dimensões do papel não encontradas no nome do papel."}
-        largura = float(match.group(1))
-        altura = float(match.group(2))
+        largura, altura = dims
         largura_m = largura / 100
         altura_m = altura / 100
         # Divide a altura por 2 (sempre pela altura)
@@ -302,17 +495,10 @@ def calculate_lamination_cost(
 
     # Digital: lógica por tipo de produto
     else:
-        # Define formato útil conforme o tipo de produto
-        formato_util = "47x33"
-        if product_name:
-            base_product = product_name.replace(" - POLICROMIA", "").strip().upper()
-            if "17X24" in base_product or "20X28" in base_product:
-                formato_util = "56x33"
-        match = re.search(r'(\d+)\s*[xX×]\s*(\d+)', formato_util)
-        if not match:
-            return {"error": "Dimensões do formato útil não encontradas."}
-        largura = float(match.group(1))
-        altura = float(match.group(2))
+        # Define formato útil conforme o produto (catálogo)
+        formato_util = product_catalog.get_catalog().useful_format_for(product_name)
+        largura = formato_util.largura_cm
+        altura = formato_util.altura_cm
         largura_m = largura / 100
         altura_m = altura / 100
         largura_laminacao_m = largura_m
@@ -320,16 +506,43 @@ def calculate_lamination_cost(
         # Para digital, a quantidade de folhas é a quantidade de folhas úteis necessárias
         qtd_folhas = digital_sheets if digital_sheets is not None else quantity
 
-    custo_laminacao_total = largura_laminacao_m * altura_laminacao_m * 1.60 * qtd_folhas
+    custo_laminacao_total = largura_laminacao_m * altura_laminacao_m * LAMINACAO_PRECO_M2 * qtd_folhas
     custo_laminacao_unit = custo_laminacao_total / quantity if quantity > 0 else 0
+    details = f"Laminação ({largura_laminacao_m:.2f}m x {altura_laminacao_m:.2f}m) x {qtd_folhas} folhas"
 
     return {
         "total_cost_unit": custo_laminacao_unit,
         "total_cost": custo_laminacao_total,
-        "details": f"Laminação ({largura_laminacao_m:.2f}m x {altura_laminacao_m:.2f}m) x {qtd_folhas} folhas",
+        "details": details,
+        "lines": [CostLine("Acabamento - Laminação", CATEGORIA_SERVICOS, custo_laminacao_unit, quantity, "un", details)],
         "error": None
     }
 
+def calculate_cover_lamination_cost(
+    cover_result: dict,
+    impression_type: str,
+    paper_name: str,
+    quantity: int,
+    df_paper_purchases: pd.DataFrame,
+    product_name: str = None,
+    paper_spec: PaperSpec = None
+) -> dict:
+    """
+    Laminação sobre o resultado do cálculo da capa: no Digital usa as folhas
+    úteis da capa; no Offset, as folhas de papel.
+    """
+    if "Digital" in impression_type:
+        return calculate_lamination_cost(
+            impression_type, paper_name, quantity, df_paper_purchases,
+            digital_sheets=cover_result.get("folhas_uteis_necessarias"),
+            product_name=product_name, paper_spec=paper_spec
+        )
+    return calculate_lamination_cost(
+        impression_type, paper_name, quantity, df_paper_purchases,
+        offset_sheets=cover_result.get("quantity"),
+        product_name=product_name, paper_spec=paper_spec
+    )
+
 def calculate_silk_cost(silk_type: str, budget_quantity: int) -> dict:
     """
     Calcula o custo de impressão Silk na capa.
@@ -371,11 +584,13 @@ def calculate_silk_cost(silk_type: str, budget_quantity: int) -> dict:
         total_cost = base_price_1_0 + (budget_quantity - 100) * price_per_piece
 
     cost_per_unit = total_cost / budget_quantity if budget_quantity > 0 else 0
+    details = f"Silk {silk_type} ({budget_quantity} un.)"
 
     return {
         "total_cost_unit": cost_per_unit,
         "total_cost": total_cost,
-        "details": f"Silk {silk_type} ({budget_quantity} un.)",
+        "details": details,
+        "lines": [CostLine(f"Acabamento - Silk {silk_type}", CATEGORIA_SERVICOS, cost_per_unit, budget_quantity, "un", details)],
         "error": None
     }
     
@@ -383,7 +598,9 @@ def calculate_silk_cost(silk_type: str, budget_quantity: int) -> dict:
 def calculate_custom_component_cost(
     total_material_cost: float,
     total_service_cost: float,
-    budget_quantity: int
+    budget_quantity: int,
+    label: str = "Personalizado",
+    material_name: str = "Material Personalizado"
 ) -> dict:
     """
     Calcula o custo de um componente personalizado com base nos custos totais informados.
@@ -401,9 +618,69 @@ def calculate_custom_component_cost(
         "paper_cost_unit": material_cost_unit,
         "service_cost_unit": service_cost_unit,
         "quantity": budget_quantity,
+        "lines": [
+            CostLine(f"{label} - Material", CATEGORIA_MATERIAL, material_cost_unit, budget_quantity, "un", f"Papel: {material_name}"),
+            CostLine(f"{label} - Serviço", CATEGORIA_SERVICOS, service_cost_unit, budget_quantity, "un", "Custo de serviço do componente"),
+        ],
         "error": None
     }
 
+# ================== COMPRAS DIRETAS ==================
+# Caixa de WIRE-O sem cadastro na tabela de anéis por caixa
+WIREO_ANEIS_POR_CAIXA_PADRAO = 6000
+
+def calculate_direct_purchase_cost(
+    category: str,
+    selected_item: str,
+    items: list,
+    budget_quantity: int,
+    util: float = 1.0,
+    wireo_map: dict = None,
+    custom_unit_price: float = 1.0
+) -> dict:
+    """
+    Custo de um item de compra direta (aviamento) por unidade do orçamento.
+
+    Args:
+        category (str): Categoria (ex: 'ELASTICO', 'WIRE-O').
+        selected_item (str): NomeLimpo do item, 'Personalizado' ou 'Nenhum'.
+        items (list): Itens da categoria (ds.load_direct_purchases).
+        util (float): Aproveitamento; no WIRE-O, o nº de anéis por unidade.
+        wireo_map (dict): Anéis por caixa de cada WIRE-O (ds.load_wireo_table).
+        custom_unit_price (float): Valor unitário do item personalizado.
+
+    Returns:
+        dict: cost, details, util, price (preço de compra usado) e line (CostLine ou None).
+    """
+    cost_info = {"cost": 0.0, "details": "Nenhum", "util": util, "price": None}
+    if selected_item == "Personalizado":
+        cost_info["cost"] = custom_unit_price * util
+        cost_info["details"] = f"Personalizado (R$ {custom_unit_price:.2f} * {util}) = R$ {cost_info['cost']:.4f}"
+    elif selected_item != "Nenhum":
+        item_data = next((i for i in items if i['NomeLimpo'] == selected_item), None)
+        if item_data:
+            price = item_data['VALOR_UNITARIO']
+            if category == "WIRE-O":
+                qty_box = (wireo_map or {}).get(selected_item, WIREO_ANEIS_POR_CAIXA_PADRAO)
+                cost_info["cost"] = (price / qty_box) * util if qty_box > 0 else 0
+            else:
+                cost_info["cost"] = price * util
+            cost_info["details"] = f"{selected_item} (NF: {item_data['ULTIMA_NF']})"
+            cost_info["price"] = price
+
+    cost_info["line"] = None
+    if cost_info["cost"] > 0:
+        # Quantidade consumida no orçamento: aproveitamento (ou nº de anéis do wire-o) x quantidade
+        unit = "anéis" if category == "WIRE-O" and selected_item != "Personalizado" else "un"
+        # Itens do histórico levam a referência do preço de compra (personalizado não tem histórico)
+        price_key = (FONTE_COMPRA_DIRETA, (category, selected_item)) if cost_info["price"] else None
+        cost_info["line"] = CostLine(
+            category, CATEGORIA_AVIAMENTOS, cost_info["cost"],
+            util * budget_quantity, unit, cost_info["details"],
+            price_key, cost_info["price"]
+        )
+    return cost_info
+
 def calculate_synthetic_leather_cover_cost(
     product_name: str,
     leather_material_name: str,
@@ -411,52 +688,16 @@ def calculate_synthetic_leather_cover_cost(
     direct_purchases_cats: dict
 ) -> dict:
     """
-    Calcula o custo do couro sintético considerando o aproveitamento da faca.
-    - largura_bobina: 130cm (fixo)
-    - altura_faca: conforme produto
-    - Aproveitamento: quantos produtos cabem em cada corte de faca
-    - Calcula área total de couro necessária e custo total
-    """
-    # Tabela de altura da faca por produto
-    altura_faca_map = {
-        'CADERNETA 9X13': 40,
-        'CADERNETA 14X21': 40,
-        'REVISTA 9X13': 40,
-        'REVISTA 14X21': 40,
-        'REVISTA 19X25': 47,
-        'CADERNO WIRE-O 17X24': 53,
-        'CADERNO WIRE-O 20X28': 53,
-        'PLANNER WIRE-O A5': 47,
-        'BLOCO WIRE-O 12X20': 40,
-        'FICHARIO A6': 40,
-        'FICHARIO A5': 50,
-        'FICHARIO 17X24': 53,
-        'CADERNO ORGANIZADOR A5': 50,
-        'CADERNO ORGANIZADOR 17X24': 53
-    }
-    formatos_abertos = {
-        'CADERNETA 9X13': {'larg': 22, 'alt': 15.8},
-        'CADERNETA 14X21': {'larg': 33.7, 'alt': 24.5},
-        'REVISTA 9X13': {'larg': 19, 'alt': 14},
-        'REVISTA 14X21': {'larg': 29, 'alt': 22},
-        'REVISTA 19X25': {'larg': 40, 'alt': 26},
-        'CADERNO WIRE-O 17X24': {'larg': 43.8, 'alt': 27.8},
-        'CADERNO WIRE-O 20X28': {'larg': 49.2, 'alt': 31.3},
-        'PLANNER WIRE-O A5': {'larg': 41, 'alt': 24.7},
-        'BLOCO WIRE-O 12X20': {'larg': 31.4, 'alt': 23},
-        'FICHARIO A6': {'larg': 35, 'alt': 19.5},
-        'FICHARIO A5': {'larg': 45, 'alt': 26},
-        'FICHARIO 17X24': {'larg': 49.2, 'alt': 28.4},
-        'CADERNO ORGANIZADOR A5': {'larg': 41.5, 'alt': 24.7},
-        'CADERNO ORGANIZADOR 17X24': {'larg': 46, 'alt': 27.7}
-    }
-    largura_bobina = 130  # cm
-
-    base_product = product_name.replace(" - POLICROMIA", "").replace(" - COURO SINTÉTICO", "").strip().upper()
-    altura_faca = altura_faca_map.get(base_product)
-    formato = formatos_abertos.get(base_product)
-    if not altura_faca or not formato:
-        return {"error": f"Altura da faca ou formato aberto não definido para o produto '{base_product}'."}
+    Calcula o custo do couro sintético pelo encaixe das capas no rolo.
+    - Rolo de config.ROLO_COURO_LARGURA_MM de largura, comprimento contínuo
+    - Capas em orientações mistas na largura (imposition.roll_plan); o plano é
+      calculado uma vez por produto e o comprimento de cada quantidade é imediato
+    - Cobra os metros exatos de rolo consumidos, sem arredondar para tiras inteiras
+    """
+    base_product = base_product_name(product_name)
+    produto = product_catalog.get_catalog().get(base_product)
+    if produto is None:
+        return {"error": f"Formato aberto não definido para o produto '{base_product}'."}
 
     # Busca preço do couro
     preco_couro = None
@@ -468,27 +709,19 @@ def calculate_synthetic_leather_cover_cost(
     if preco_couro is None:
         return {"error": f"Material de couro '{leather_material_name}' não encontrado."}
 
-    # Aproveitamento: quantas capas cabem em cada tira (pedaço 40x130)
-    capa_larg = formato['larg']
-    capa_alt = formato['alt']
-    tira_larg = largura_bobina
-    tira_alt = altura_faca
-
-    def max_por_tira(tira_l, tira_a, capa_l, capa_a):
-        # Tenta encaixar capas tanto na orientação normal quanto girada
-        h1 = int(tira_l // capa_l) * int(tira_a // capa_a)
-        h2 = int(tira_l // capa_a) * int(tira_a // capa_l)
-        return max(h1, h2)
-
-    capas_por_tira = max_por_tira(tira_larg, tira_alt, capa_larg, capa_alt)
-    if capas_por_tira == 0:
-        return {"error": "Não é possível encaixar capas na tira do couro."}
-
-    # Quantidade de tiras necessárias
-    tiras_necessarias = int(np.ceil(budget_quantity / capas_por_tira))
+    # Encaixe no rolo (em cache por geometria)
+    plano = imposition.roll_plan(
+        config.ROLO_COURO_LARGURA_MM,
+        imposition.cm_to_mm(produto.largura_aberta_cm),
+        imposition.cm_to_mm(produto.altura_aberta_cm)
+    )
+    if plano.per_period == 0:
+        return {"error": "Não é possível encaixar capas na largura do rolo de couro."}
+    comprimento_m = plano.length_mm(budget_quantity) / 1000
+    largura_m = config.ROLO_COURO_LARGURA_MM / 1000
 
     # Área total de couro necessária (em m2)
-    area_total_m2 = tiras_necessarias * (tira_larg / 100) * (tira_alt / 100)
+    area_total_m2 = comprimento_m * largura_m
 
     # Custo total do couro
     custo_total_couro = area_total_m2 * preco_couro
@@ -500,6 +733,25 @@ def calculate_synthetic_leather_cover_cost(
         "service_cost_unit": 0,
         "paper_name": leather_material_name,
         "quantity": area_total_m2,
-        "details": f"{tiras_necessarias} tiras de {tira_alt}x{tira_larg}cm, {capas_por_tira} capas por tira, área total {area_total_m2:.2f}m²",
+        "roll_plan": plano,
+        "lines": [CostLine("Capa - Papel/Material", CATEGORIA_MATERIAL, custo_unitario, area_total_m2, "m²", leather_material_name,
+                           (FONTE_COMPRA_DIRETA, ("COURO", leather_material_name)), preco_couro)],
+        "details": (f"{comprimento_m:.2f}m de rolo de {largura_m * 100:g}cm, {plano.per_period} capas a cada "
+                    f"{plano.period_mm / 10:g}cm de rolo, área total {area_total_m2:.2f}m²"),
         "error": None
-    }
\ No newline at end of file
+    }
+
+# ================== PREÇO DE VENDA ==================
+def calculate_sale_price(adjusted_cost: float, markup: float, commission_pct: float) -> dict:
+    """
+    Preço de venda unitário do "Resumo Financeiro": custo ajustado x markup,
+    com as comissões por dentro (não alteram o custo).
+
+    Returns:
+        dict: preco_base, preco_venda e error (comissões de 100% ou mais: preço sem comissão).
+    """
+    preco_base = adjusted_cost * markup
+    if commission_pct >= 100:
+        return {"preco_base": preco_base, "preco_venda": preco_base,
+                "error": "Total de comissões não pode ser 100% ou mais!"}
+    return {"preco_base": preco_base, "preco_venda": preco_base / (1 - commission_pct / 100), "error": None}
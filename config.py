@@ -13,6 +13,17 @@ USERS_FILE = os.path.join(DATA_DIR, "usuarios.csv")
 CLIENTES_FILE = os.path.join(DATA_DIR, "clientes.csv")
 ORCAMENTOS_FILE = os.path.join(DATA_DIR, "orcamentos_novo.csv")
 TEMPLATES_FILE = os.path.join(DATA_DIR, "templates.csv")
+# Último número de orçamento emitido (sequência ORC<n>)
+ORCAMENTOS_SEQ_FILE = os.path.join(DATA_DIR, "orcamentos.seq")
+# Catálogo de geometria dos produtos e formatos úteis de impressão digital (versionados com o código)
+CATALOGO_PRODUTOS_FILE = os.path.join(BASE_DIR, "catalogo_produtos.csv")
+CATALOGO_FORMATOS_FILE = os.path.join(BASE_DIR, "catalogo_formatos_uteis.csv")
+
+# ================== AUTENTICAÇÃO ==================
+# Fator de custo do bcrypt para novas senhas (hashes existentes guardam o próprio fator)
+BCRYPT_ROUNDS = int(os.environ.get("ORCAMENTO_BCRYPT_ROUNDS", "12"))
+# Máximo de hashes bcrypt simultâneos por processo
+AUTH_HASH_WORKERS = int(os.environ.get("ORCAMENTO_AUTH_WORKERS", "2"))
 
 # ================== COLUNAS DOS ARQUIVOS CSV ==================
 # Colunas atualizadas para incluir o sistema de aprovação de usuários
@@ -46,6 +57,92 @@ URL_TABELA_WIREO = f"{BASE_URL_GITHUB}tabelawireo.csv"
 # URL para a nova tabela de Mão de Obra e Gastos Gerais de Fabricação
 URL_MOD_GGF = f"{BASE_URL_GITHUB}df_MOD_GGF.csv"
 
+# Diretório com cópias locais das tabelas acima (ex: a raiz do projeto). Quando definido,
+# os arquivos são lidos dele em vez do GitHub — útil offline e em scripts.
+DADOS_REFERENCIA_LOCAL = os.environ.get("ORCAMENTO_DADOS_LOCAIS", "")
+# Arquivos cujo nome local difere do publicado
+ARQUIVOS_LOCAIS_ALIAS = {
+    "tabelaimpressaoA5.csv": "tabela_impressao_A5.csv",
+    "tabelaimpressao19x25.csv": "tabela_impressao_19x25.csv",
+}
+
+# ================== SNAPSHOTS DAS TABELAS DE REFERÊNCIA ==================
+# Versões já limpas e tipadas (Arrow IPC), chaveadas pelo hash do CSV de origem
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+USAR_SNAPSHOTS = os.environ.get("ORCAMENTO_SNAPSHOTS", "1") != "0"
+
+# ================== VALIDADE E AQUECIMENTO DAS TABELAS DE REFERÊNCIA (warmup.py) ==================
+# Vencido esse tempo, a tabela é recarregada em segundo plano; enquanto isso vale a versão em cache
+REFERENCIA_TTL_S = int(os.environ.get("ORCAMENTO_REFERENCIA_TTL", "3600"))
+# ORCAMENTO_AQUECIMENTO=0 desliga a carga antecipada (cada tabela carrega no primeiro uso)
+AQUECIMENTO_ATIVO = os.environ.get("ORCAMENTO_AQUECIMENTO", "1") != "0"
+
+# ================== PREÇOS DE COMPRA ==================
+# Estratégia de preço padrão e parâmetros das alternativas (ver pricing.py)
+PRECO_ESTRATEGIA_PADRAO = os.environ.get("ORCAMENTO_PRECO_ESTRATEGIA", "media_3")
+PRECO_JANELA_COMPRAS = 3        # compras mais recentes usadas nas médias simples e ponderada
+PRECO_EWMA_MEIA_VIDA = 2.0      # meia-vida da média exponencial, em compras
+PRECO_FIFO_DIAS_ESTOQUE = 90    # PEPS: estoque supostamente coberto pelas compras desses últimos dias
+
+# ================== RESUMO FINANCEIRO ==================
+# Valores iniciais de markup e comissões (%) na tela e na cotação via API
+MARKUP_PADRAO = 2.0
+COMISSAO_VENDEDOR_PADRAO = 1.5
+COMISSAO_PROMOTOR_PADRAO = 1.7
+
+# ================== SERVIÇO HTTP DE COTAÇÃO ==================
+# Cálculos simultâneos por processo (use uvicorn --workers para mais processos)
+SERVICO_WORKERS = int(os.environ.get("ORCAMENTO_API_WORKERS", "4"))
+# Se definido, as chamadas precisam do cabeçalho "Authorization: Bearer <token>".
+# /recarregar sempre exige o token (sem ele, a rota fica desligada)
+SERVICO_TOKEN = os.environ.get("ORCAMENTO_API_TOKEN", "")
+# Interface de "python -m service"; fora do localhost só sobe com SERVICO_TOKEN definido
+SERVICO_HOST = os.environ.get("ORCAMENTO_API_HOST", "127.0.0.1")
+SERVICO_PORTA = int(os.environ.get("ORCAMENTO_API_PORTA", "8600"))
+
+# ================== RISCO DE PREÇO (MONTE CARLO) ==================
+RISCO_SIMULACOES = 20000        # reprecificações do orçamento por análise
+RISCO_JANELA_COMPRAS = 12       # compras mais recentes de cada item usadas como amostra de preço
+RISCO_SEMENTE = 42              # semente fixa: o resultado não oscila a cada rerun
+RISCO_PERCENTIL = 90            # percentil de custo que o markup sugerido deve cobrir
+
+# ================== IMPOSIÇÃO DAS CAPAS ==================
+# Sangria (por lado) e espaçamento entre capas na folha útil, em milímetros
+IMPOSICAO_SANGRIA_MM = int(os.environ.get("ORCAMENTO_SANGRIA_MM", "0"))
+IMPOSICAO_ESPACAMENTO_MM = int(os.environ.get("ORCAMENTO_ESPACAMENTO_MM", "0"))
+# Couro sintético: largura útil do rolo e maior bloco repetível testado no encaixe, em mm
+ROLO_COURO_LARGURA_MM = 1300
+ROLO_BLOCO_MAX_MM = 1500
+# Limites da busca completa, em cortes testados (cerca de 1 a 3 µs cada), por folha e por encaixe no rolo
+# (todos os comprimentos candidatos). Passou disso (peças pequenas), vale a busca reduzida:
+# grade simples ou duas faixas
+IMPOSICAO_BUSCA_MAX = 200_000
+ROLO_BUSCA_MAX = 500_000
+
+# ================== BUSCA DA CAPA MAIS BARATA ==================
+# Quantas opções mostrar e quantos processos usar (1 = no próprio processo)
+OTIMIZADOR_TOP_N = 5
+OTIMIZADOR_WORKERS = int(os.environ.get("ORCAMENTO_OTIMIZADOR_WORKERS", "1"))
+# Abaixo disso por processo, o custo de iniciar os processos supera o ganho
+OTIMIZADOR_MIN_PAPEIS_POR_PROCESSO = 50
+
+# ================== COTAÇÃO EM LOTE (python -m batch) ==================
+# Processos de cálculo (padrão: todos os núcleos) e linhas enviadas por vez a cada processo
+LOTE_WORKERS = int(os.environ.get("ORCAMENTO_LOTE_WORKERS", "0")) or (os.cpu_count() or 1)
+LOTE_TAMANHO_BLOCO = 50
+
+# ================== REPRECIFICAÇÃO DE ORÇAMENTOS ABERTOS (python -m repricing) ==================
+REPRECIFICACAO_STATUS = ("Pendente", "Aprovado")
+# Variação (%) abaixo da qual um componente ou orçamento é considerado inalterado
+REPRECIFICACAO_TOLERANCIA_PCT = 0.1
+
+# ================== INSTRUMENTAÇÃO DE DESEMPENHO (perf.py) ==================
+# ORCAMENTO_DESEMPENHO=0 desliga a coleta de tempos
+DESEMPENHO_ATIVO = os.environ.get("ORCAMENTO_DESEMPENHO", "1") != "0"
+# Medições guardadas por span (janela móvel de onde saem p50/p95) e reruns recentes guardados
+DESEMPENHO_JANELA = 1000
+DESEMPENHO_RERUNS = 200
+
 # ================== MAPEAMENTOS E LISTAS DE PRODUTOS ==================
 PRODUTOS_BASE = [
     "CADERNETA 9X13 - POLICROMIA", "CADERNETA 14X21 - POLICROMIA", "REVISTA 9X13 - POLICROMIA",
@@ -0,0 +1,166 @@
+# orcamento_pro/crossover.py
+"""
+Ponto de virada entre Offset e Digital ao longo da quantidade.
+
+O custo total do Offset é constante dentro de cada degrau da tabela de
+impressão (LAMINAS), enquanto o do Digital só cresce com a quantidade. Então,
+dentro de um degrau, a diferença Digital - Offset é monótona e o método mais
+barato troca no máximo uma vez. A busca avalia uma grade de quantidades
+(vetorizada, incluindo o fim e o início de cada degrau, para que nenhum
+intervalo da grade atravesse uma borda) e refina cada troca por bisseção
+sobre inteiros, o que dá a quantidade exata da virada.
+
+As fórmulas são as mesmas de calculate_offset_cover_cost,
+calculate_digital_cover_cost e calculate_lamination_cost, em forma de array.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import calculations as calc
+import product_catalog
+
+METODO_OFFSET = "Offset"
+
+# Pontos da grade inicial (além das bordas de degrau)
+PONTOS_GRADE = 200
+
+@dataclass(frozen=True, slots=True)
+class Faixa:
+    """Intervalo de quantidades [inicio, fim] em que um método é o mais barato."""
+    inicio: int
+    fim: int
+    metodo: str
+    custo_unit_inicio: float
+    custo_unit_fim: float
+
+@dataclass(frozen=True, slots=True)
+class Crossover:
+    """Faixas do método mais barato e as curvas de custo unitário avaliadas na grade."""
+    faixas: tuple
+    quantidades: np.ndarray
+    custo_offset_unit: np.ndarray
+    custo_digital_unit: np.ndarray
+    metodo_digital: str
+
+    @property
+    def viradas(self) -> tuple:
+        """Quantidades a partir das quais o método mais barato muda."""
+        return tuple(f.inicio for f in self.faixas[1:])
+
+# ================== CUSTOS VETORIZADOS ==================
+def offset_totals(q: np.ndarray, steps: calc.ImpressionSteps, preco_folha: float, lam_m2_por_folha: float = 0.0) -> np.ndarray:
+    """Custo total do Offset (papel + impressão + laminação) para cada quantidade de q."""
+    custos = calc.offset_cover_costs(q, steps, preco_folha)
+    return custos["papel_total"] + custos["impressao_total"] + custos["folhas"] * lam_m2_por_folha * calc.LAMINACAO_PRECO_M2
+
+def digital_totals(q: np.ndarray, paper_yield: calc.PaperYield, preco_impressao: float, preco_folha: float,
+                   lam_m2_por_folha_util: float = 0.0) -> np.ndarray:
+    """Custo total do Digital (papel + impressão + laminação) para cada quantidade de q."""
+    folhas_uteis = np.ceil(q / paper_yield.capas_por_folha_util)
+    folhas_papel = np.ceil(folhas_uteis / paper_yield.folhas_uteis_por_papel)
+    return (folhas_uteis * preco_impressao + folhas_papel * preco_folha
+            + folhas_uteis * lam_m2_por_folha_util * calc.LAMINACAO_PRECO_M2)
+
+# ================== BUSCA ==================
+def find_crossovers(
+    product_name: str,
+    paper_name: str,
+    steps: calc.ImpressionSteps,
+    paper_yield: calc.PaperYield,
+    preco_folha: float,
+    digital_type: str = "Digital 4/0",
+    laminacao: bool = False,
+    q_min: int = 1,
+    q_max: int = None
+) -> Crossover | None:
+    """
+    Faixas de quantidade em que Offset ou o Digital informado é mais barato.
+
+    Args:
+        product_name (str): Produto (com ou sem sufixo).
+        paper_name (str): Papel da capa (só para as mensagens).
+        steps (calc.ImpressionSteps): Tabela de impressão offset do produto (ds.load_impression_steps).
+        paper_yield (calc.PaperYield): Rendimento do papel no produto.
+        preco_folha (float): Preço da folha na estratégia do orçamento.
+        digital_type (str): Tipo digital a comparar (ex: 'Digital 4/1').
+        laminacao (bool): Inclui a laminação fosca nos dois métodos.
+        q_min, q_max (int): Intervalo de quantidades (padrão até o último degrau da tabela).
+
+    Returns:
+        Crossover | None: None se algum dos métodos não puder ser calculado.
+    """
+    if steps is None or steps.empty or paper_yield is None:
+        return None
+    if not paper_yield.capas_por_folha_util or not paper_yield.folhas_uteis_por_papel:
+        return None
+    formato_util = product_catalog.get_catalog().useful_format_for(product_name)
+    tipo = digital_type.replace("Digital", "").strip()
+    preco_impressao = formato_util.preco(tipo)
+    if preco_impressao is None:
+        return None
+
+    lam_offset = lam_digital = 0.0
+    if laminacao:
+        dims = calc.parse_paper_dimensions(paper_name)
+        if not dims:
+            return None
+        # Offset: cada folha vira 2 meias folhas laminadas = a área da folha inteira
+        lam_offset = (dims[0] / 100) * (dims[1] / 100)
+        lam_digital = (formato_util.largura_cm / 100) * (formato_util.altura_cm / 100)
+
+    def offset(q):
+        return offset_totals(q, steps, preco_folha, lam_offset)
+
+    def digital(q):
+        return digital_totals(q, paper_yield, preco_impressao, preco_folha, lam_digital)
+
+    def offset_wins(q):
+        # Empate fica com o Offset
+        return offset(q) <= digital(q)
+
+    laminas = steps.laminas.astype(np.int64)
+    q_min = max(int(q_min), 1)
+    q_max = max(int(q_max or laminas[-1]), q_min)
+
+    # Grade: pontos geométricos + fim e início de cada degrau (q = LAMINAS e LAMINAS + 1) + extremos.
+    # Com as duas bordas, todo intervalo da grade fica dentro de um só degrau (ou é [LAMINAS, LAMINAS + 1])
+    grade = np.geomspace(q_min, q_max, PONTOS_GRADE).round().astype(np.int64)
+    bordas = np.concatenate([laminas, laminas + 1])
+    q = np.unique(np.concatenate([[q_min, q_max], grade, bordas[(bordas >= q_min) & (bordas <= q_max)]]))
+    wins = offset_wins(q)
+
+    # Refina cada troca: dentro de um degrau a troca é única, então a bisseção é exata
+    starts = [q_min]
+    for i in np.flatnonzero(wins[1:] != wins[:-1]):
+        lo, hi = int(q[i]), int(q[i + 1])  # método de lo != método de hi
+        alvo = wins[i + 1]
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if offset_wins(np.array([mid]))[0] == alvo:
+                hi = mid
+            else:
+                lo = mid
+        starts.append(hi)
+
+    starts = np.array(starts, dtype=np.int64)
+    ends = np.append(starts[1:] - 1, q_max)
+    winners = offset_wins(starts)
+    custo_inicio = np.where(winners, offset(starts), digital(starts)) / starts
+    custo_fim = np.where(offset_wins(ends), offset(ends), digital(ends)) / ends
+    faixas = tuple(
+        Faixa(int(a), int(b), METODO_OFFSET if w else digital_type, float(ci), float(cf))
+        for a, b, w, ci, cf in zip(starts, ends, winners, custo_inicio, custo_fim)
+    )
+    return Crossover(faixas, q, offset(q) / q, digital(q) / q, digital_type)
+
+def faixas_to_frame(crossover: Crossover) -> pd.DataFrame:
+    """Tabela das faixas para exibição."""
+    return pd.DataFrame({
+        "De (un)": [f.inicio for f in crossover.faixas],
+        "Até (un)": [f.fim for f in crossover.faixas],
+        "Mais barato": [f.metodo for f in crossover.faixas],
+        "Custo capa no início (R$/un)": [f.custo_unit_inicio for f in crossover.faixas],
+        "Custo capa no fim (R$/un)": [f.custo_unit_fim for f in crossover.faixas],
+    })
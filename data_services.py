@@ -3,11 +3,36 @@
 Módulo para carregar e processar dados de fontes externas (GitHub).
 Cada função de carregamento principal é individualmente cacheada para otimização,
 evitando recargas desnecessárias de dados.
+
+Os caches das tabelas de referência vencem em config.REFERENCIA_TTL_S e são
+renovados em segundo plano (quem lê recebe a versão anterior enquanto isso),
+por isso as funções cacheadas não usam st.*: erros sobem como exceção e quem
+mostra a mensagem é o wrapper sem cache (ex: load_direct_purchases).
+O aquecimento em segundo plano está em warmup.py.
 """
 import pandas as pd
 import streamlit as st
 import re
 import config
+import snapshots
+import calculations as calc
+import pricing
+import risk
+import product_catalog
+import perf
+
+# Colunas padrão das tabelas de uso de papel por componente
+COLUNAS_COMPONENTE = ['Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada']
+# Colunas das compras que algum cálculo usa (preços, índices, risco, reprecificação); o resto do CSV é descartado
+COLUNAS_COMPRAS_PAPEL = ['PapelLimpo', 'Familia', 'ValorUnitario', 'Quantidade', 'DataEmissaoNF', 'LarguraCm', 'AlturaCm', 'Gramatura']
+COLUNAS_COMPRAS_DIRETAS = ['CATEGORIA_MATERIAL_PCP', 'NomeLimpo', 'VALOR_UNITARIO', 'QUANTIDADE', 'DATA_EMISSAO_NF']
+
+class MissingColumnsError(ValueError):
+    """Colunas obrigatórias ausentes em um CSV de referência."""
+    def __init__(self, missing: list, found: list):
+        super().__init__(f"Colunas não encontradas no CSV: {missing}")
+        self.missing = missing
+        self.found = found
 
 # --- FUNÇÕES DE LIMPEZA AUXILIARES ---
 def _clean_paper_name(name: str) -> str:
@@ -24,11 +49,31 @@ def _clean_paper_name(name: str) -> str:
     name = re.sub(r'\s+', ' ', name).strip()
     return name.title()
 
-# --- FUNÇÕES DE CARREGAMENTO COM CACHE ---
-@st.cache_data
-def load_paper_purchases():
-    """Carrega e processa os dados de compra de papel."""
-    df = pd.read_csv(config.URL_COMPRAS, encoding='utf-8')
+def _compact(df: pd.DataFrame, columns: list = None, categories: tuple = (), integers: tuple = ()) -> pd.DataFrame:
+    """
+    Reduz a memória de uma tabela já limpa: mantém só as colunas listadas,
+    guarda texto repetido (nomes de papel, categorias) como categoria e
+    inteiros no menor tipo que os comporta. Preços e medidas continuam
+    float64: em float32 os custos mudariam nos centavos. O texto restante
+    já fica no tipo str do pandas 3, guardado em Arrow (requirements.txt
+    exige pandas>=3).
+    """
+    df = df[columns].copy() if columns is not None else df.copy()
+    for col in categories:
+        df[col] = df[col].astype('category')
+    for col in integers:
+        df[col] = pd.to_numeric(df[col], errors='coerce', downcast='integer')
+    return df
+
+# --- FUNÇÕES DE LIMPEZA (CSV BRUTO -> TABELA TIPADA) ---
+# Recebem os bytes do CSV e são usadas pelos snapshots (ver snapshots.load_table).
+# As versões _clean_* devolvem a tabela com todas as colunas do CSV (ver memory_report).
+def _parse_paper_purchases(raw: bytes) -> pd.DataFrame:
+    return _compact(_clean_paper_purchases(raw), COLUNAS_COMPRAS_PAPEL,
+                    categories=('PapelLimpo', 'Familia'), integers=('Quantidade',))
+
+def _clean_paper_purchases(raw: bytes) -> pd.DataFrame:
+    df = snapshots.read_csv_bytes(raw)
     df.columns = [
         'Demanda', 'Quantidade', 'DataSolicitacao', 'PrazoDesejado', 'DataAprovacao',
         'DataEmissaoNF', 'PrevisaoEntrega', 'NumeroNF', 'Fornecedor', 'ValorTotal',
@@ -49,12 +94,31 @@ def load_paper_purchases():
     df = df.dropna(subset=['ValorUnitario', 'PapelLimpo'])
     df = df[df['PapelLimpo'] != ""]
     df = df.sort_values('DataEmissaoNF', ascending=False)
+    return _add_paper_spec_columns(df)
+
+def _add_paper_spec_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extrai do nome do papel, uma única vez e de forma vetorizada, as colunas
+    tipadas LarguraCm, AlturaCm, Gramatura e Familia (NaN quando ausentes).
+    Mesma regra de calc.parse_paper_dimensions: medidas >= 200 estão em mm.
+    """
+    nomes = df['PapelLimpo'].str.replace('g/m2', '', regex=False).str.replace('gsm', '', regex=False)
+    dims = nomes.str.extract(r'(\d+)\s*[xX×]\s*(\d+)').astype('float64')
+    em_mm = dims.min(axis=1) >= 200
+    dims[em_mm] = dims[em_mm] / 10
+    df = df.copy()
+    df['LarguraCm'] = dims[0]
+    df['AlturaCm'] = dims[1]
+    df['Gramatura'] = df['PapelLimpo'].str.extract(r'(\d+)\s*G', flags=re.IGNORECASE)[0].astype('float64')
+    familia = df['PapelLimpo'].str.extract(r'^(.*?)\s*\d+\s*G', flags=re.IGNORECASE)[0].str.strip(' -')
+    df['Familia'] = familia.where(familia.notna() & (familia != ""), df['PapelLimpo'])
     return df
 
-@st.cache_data
-def load_component_data(url: str, columns: list):
-    """Função genérica para carregar dados de componentes (miolo, bolsa, etc.)."""
-    df = pd.read_csv(url, encoding='utf-8')
+def _parse_component_data(raw: bytes, columns: list) -> pd.DataFrame:
+    return _compact(_clean_component_data(raw, columns), categories=(columns[0], 'Papel'))
+
+def _clean_component_data(raw: bytes, columns: list) -> pd.DataFrame:
+    df = snapshots.read_csv_bytes(raw)
     df.columns = columns
     # A primeira coluna é o nome do item (ex: 'Miolo', 'Bolsa')
     item_col = columns[0]
@@ -67,72 +131,32 @@ def load_component_data(url: str, columns: list):
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
     return df
 
-@st.cache_data
-def load_direct_purchases():
-    """Carrega e processa os dados de compras diretas, com tratamento de erro aprimorado."""
-    try:
-        df = pd.read_csv(config.URL_COMPRA_DIRETA, encoding='utf-8')
-        
-        # Lista de colunas esperadas
-        expected_cols = ['CATEGORIA_MATERIAL_PCP', 'DATA_EMISSAO_NF', 'VALOR_UNITARIO', 'DEMANDA']
-        
-        # Verifica se todas as colunas esperadas existem
-        missing_cols = [col for col in expected_cols if col not in df.columns]
-        if missing_cols:
-            st.error(f"❌ Erro em 'Compras Diretas': Colunas não encontradas no CSV: {missing_cols}")
-            st.info(f"Colunas que foram encontradas: {df.columns.tolist()}")
-            return {}
+def _parse_direct_purchases(raw: bytes) -> pd.DataFrame:
+    # Só itens categorizados: o loader devolve o snapshot como está, sem filtrar (e copiar) depois
+    return _compact(_clean_direct_purchases(raw).dropna(subset=['CATEGORIA_MATERIAL_PCP']), COLUNAS_COMPRAS_DIRETAS,
+                    categories=('CATEGORIA_MATERIAL_PCP', 'NomeLimpo'), integers=('QUANTIDADE',))
 
-        df['DATA_EMISSAO_NF'] = pd.to_datetime(df['DATA_EMISSAO_NF'], errors='coerce')
-        df['VALOR_UNITARIO'] = pd.to_numeric(df['VALOR_UNITARIO'], errors='coerce')
-        df = df.dropna(subset=['DATA_EMISSAO_NF', 'VALOR_UNITARIO', 'DEMANDA'])
-
-        df['NomeLimpo'] = df['DEMANDA'].apply(lambda x: re.sub(r'^(MP\d{3}\s*|UNICA-[A-Z0-9\-]+\s*)', '', str(x)).strip())
-
-        categorias_cd = {}
-        for cat in df['CATEGORIA_MATERIAL_PCP'].dropna().unique():
-            # ... (o resto da lógica de processamento continua igual) ...
-            itens_cat = df[df['CATEGORIA_MATERIAL_PCP'] == cat].sort_values('DATA_EMISSAO_NF', ascending=False)
-            for nome in itens_cat['NomeLimpo'].unique():
-                item_data = itens_cat[itens_cat['NomeLimpo'] == nome]
-                ultimas_3 = item_data.head(3)
-                preco_medio = ultimas_3['VALOR_UNITARIO'].mean()
-                ultima_nf_date = item_data.iloc[0]['DATA_EMISSAO_NF']
-                ultima_nf = ultima_nf_date.strftime('%d/%m/%Y') if pd.notna(ultima_nf_date) else 'N/A'
-
-                if cat not in categorias_cd:
-                    categorias_cd[cat] = []
-                categorias_cd[cat].append({
-                    'NomeLimpo': nome,
-                    'VALOR_UNITARIO': preco_medio,
-                    'ULTIMA_NF': ultima_nf
-                })
-        return categorias_cd
-    except Exception as e:
-        # Agora a mensagem de erro será muito mais específica!
-        st.error(f"❌ Falha ao processar 'Compras Diretas': {e}")
-        st.warning("Verifique se o link está correto e se as colunas do arquivo CSV correspondem ao esperado pelo código.")
-        return {}
+def _clean_direct_purchases(raw: bytes) -> pd.DataFrame:
+    df = snapshots.read_csv_bytes(raw)
 
+    # Lista de colunas esperadas
+    expected_cols = ['CATEGORIA_MATERIAL_PCP', 'DATA_EMISSAO_NF', 'VALOR_UNITARIO', 'QUANTIDADE', 'DEMANDA']
 
-@st.cache_data
-def load_wireo_table():
-    """Carrega a tabela de mapeamento de WIRE-O para quantidade por caixa."""
-    try:
-        df = pd.read_csv(config.URL_TABELA_WIREO, encoding='utf-8')
-        df.columns = ['Nome', 'QtdPorCaixa']
-        df['Nome'] = df['Nome'].astype(str).str.strip()
-        df['QtdPorCaixa'] = pd.to_numeric(df['QtdPorCaixa'], errors='coerce')
-        return dict(zip(df['Nome'], df['QtdPorCaixa']))
-    except Exception:
-        st.warning("⚠️ Não foi possível carregar a tabela de WIRE-O. Usando valor padrão.")
-        return {}
+    # Verifica se todas as colunas esperadas existem
+    missing_cols = [col for col in expected_cols if col not in df.columns]
+    if missing_cols:
+        raise MissingColumnsError(missing_cols, df.columns.tolist())
+
+    df['DATA_EMISSAO_NF'] = pd.to_datetime(df['DATA_EMISSAO_NF'], errors='coerce')
+    df['VALOR_UNITARIO'] = pd.to_numeric(df['VALOR_UNITARIO'], errors='coerce')
+    df = df.dropna(subset=['DATA_EMISSAO_NF', 'VALOR_UNITARIO', 'DEMANDA'])
+
+    df['NomeLimpo'] = df['DEMANDA'].apply(lambda x: re.sub(r'^(MP\d{3}\s*|UNICA-[A-Z0-9\-]+\s*)', '', str(x)).strip())
+    return df
+
+def _parse_impression_table(raw: bytes) -> pd.DataFrame:
+    df = snapshots.read_csv_bytes(raw)
 
-@st.cache_data
-def load_impression_table(url: str):
-    """Carrega uma tabela de custos de impressão/serviço a partir de uma URL."""
-    df = pd.read_csv(url, encoding='utf-8')
-    
     # --- A CORREÇÃO ESTÁ AQUI ---
     # Renomeamos a coluna para corresponder EXATAMENTE ao que a função de cálculo espera.
     df.columns = ['LAMINAS', 'VALOR ML (R$)', 'QTD_FLS'][:len(df.columns)]
@@ -151,19 +175,240 @@ def load_impression_table(url: str):
     df = df.dropna(subset=['LAMINAS', 'QTD_FLS', 'VALOR ML (R$)']).sort_values('LAMINAS')
     return df
 
+def _table_slug(url: str) -> str:
+    """Nome estável de snapshot a partir do arquivo da URL (ex: 'tabela_impressao_14x21')."""
+    return re.sub(r'\W+', '_', url.rsplit('/', 1)[-1].rsplit('.', 1)[0]).strip('_').lower()
+
+# --- FUNÇÕES DE CARREGAMENTO COM CACHE ---
+# Vencida, a tabela continua servindo enquanto a nova versão carrega (uma recarga por vez, por tabela).
+# Sem spinner: as cargas frias rodam no aquecimento, fora de sessão, e a página mostra o progresso dele.
+_REFERENCIA = dict(ttl=config.REFERENCIA_TTL_S, refresh_mode="background", show_spinner=False)
+# As tabelas que vêm dos snapshots ficam em st.cache_resource: st.cache_data guardaria uma
+# cópia serializada (e devolveria outra a cada chamada), perdendo o memory-map. São
+# compartilhadas entre as sessões e somente leitura: filtrar/ordenar gera cópias, não alterar.
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_paper_purchases():
+    """Carrega e processa os dados de compra de papel (compartilhado, somente leitura)."""
+    return snapshots.load_table("compras_papel", config.URL_COMPRAS, _parse_paper_purchases)
+
+def build_paper_index(df_paper: pd.DataFrame) -> dict:
+    """
+    Monta o índice papel -> calc.PaperSpec com as colunas tipadas do papel e o
+    preço médio das 3 últimas compras (mesma regra de get_average_paper_price).
+    """
+    ultimas = df_paper.groupby('PapelLimpo', sort=False, observed=True).head(3)
+    precos = ultimas.groupby('PapelLimpo', observed=True)['ValorUnitario'].mean()
+    # O DataFrame já vem ordenado da compra mais recente para a mais antiga
+    atributos = df_paper.drop_duplicates('PapelLimpo').set_index('PapelLimpo')
+
+    def _num(value):
+        return None if pd.isna(value) else float(value)
+
+    index = {}
+    for paper, row in atributos.iterrows():
+        index[paper] = calc.PaperSpec(
+            nome=paper,
+            familia=row['Familia'],
+            gramatura=_num(row['Gramatura']),
+            largura_cm=_num(row['LarguraCm']),
+            altura_cm=_num(row['AlturaCm']),
+            preco_medio=float(precos[paper]),
+        )
+    return index
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_paper_index() -> dict:
+    """
+    Índice papel -> calc.PaperSpec, calculado uma vez a partir das compras de papel.
+    Os registros são imutáveis, então o índice é compartilhado sem cópia entre as sessões.
+    """
+    return build_paper_index(load_paper_purchases())
+
+def build_paper_yield_index(paper_index: dict) -> dict:
+    """
+    Monta o índice (papel, produto base) -> calc.PaperYield para todo papel com
+    dimensões e todo produto de config.PRODUTOS_BASE presente no catálogo.
+    """
+    produtos = sorted({calc.base_product_name(p) for p in config.PRODUTOS_BASE} & product_catalog.get_catalog().produtos.keys())
+    index = {}
+    for paper, spec in paper_index.items():
+        if not spec.has_dimensions:
+            continue
+        for produto in produtos:
+            index[(paper, produto)] = calc.compute_paper_yield(produto, paper, spec.dimensions, spec.preco_medio)
+    return index
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_paper_yield_index() -> dict:
+    """Tabela de rendimento papel x produto, calculada uma vez (registros imutáveis, sem cópia)."""
+    return build_paper_yield_index(load_paper_index())
+
+def paper_cost_per_cover(y, price_book: pricing.PriceBook = None) -> float | None:
+    """Custo de papel por capa de um rendimento, no preço da estratégia do livro (se houver)."""
+    if y is None or not y.capas_por_folha:
+        return None
+    if price_book is None:
+        return y.custo_papel_por_capa
+    preco = price_book.price(y.paper)
+    return preco / y.capas_por_folha if preco is not None else None
+
+def rank_papers_by_cover_cost(papers, yield_index: dict, product_name: str, price_book: pricing.PriceBook = None) -> list:
+    """
+    Ordena os papéis pelo custo de papel por capa do produto (mais barato primeiro).
+    Papéis sem rendimento calculável vão para o fim, em ordem alfabética.
+    """
+    base_product = calc.base_product_name(product_name)
+    def sort_key(paper):
+        custo = paper_cost_per_cover(yield_index.get((paper, base_product)), price_book)
+        return (custo is None, custo if custo is not None else 0.0, paper)
+    return sorted(papers, key=sort_key)
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_component_data(url: str, columns: list):
+    """Função genérica para carregar dados de componentes (miolo, bolsa, etc.; compartilhado, somente leitura)."""
+    return snapshots.load_table(
+        f"componente_{_table_slug(url)}", url,
+        lambda raw: _parse_component_data(raw, columns),
+        variant="|".join(columns)
+    )
+
+def build_paper_price_book(df_paper: pd.DataFrame) -> pricing.PriceBook:
+    """Livro de preços dos papéis a partir do histórico de compras (qualquer recorte dele)."""
+    table = pricing.build_price_table(df_paper, 'PapelLimpo', 'ValorUnitario', 'Quantidade', 'DataEmissaoNF')
+    return pricing.PriceBook.from_table(table)
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_paper_price_book() -> pricing.PriceBook:
+    """Todas as estratégias de preço de cada papel, calculadas uma vez (ver pricing.py)."""
+    return build_paper_price_book(load_paper_purchases())
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_direct_purchases_frame() -> pd.DataFrame:
+    """Histórico de compras diretas já limpo, só com itens categorizados (compartilhado, somente leitura)."""
+    return snapshots.load_table("compras_diretas", config.URL_COMPRA_DIRETA, _parse_direct_purchases)
+
+def build_direct_purchases_price_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabela larga de preços das compras diretas, indexada por (categoria, item)."""
+    return pricing.build_price_table(df, ['CATEGORIA_MATERIAL_PCP', 'NomeLimpo'], 'VALOR_UNITARIO', 'QUANTIDADE', 'DATA_EMISSAO_NF')
+
+@st.cache_data(**_REFERENCIA)
+@perf.timed
+def load_direct_purchases_price_table() -> pd.DataFrame:
+    """Tabela larga de preços das compras diretas, indexada por (categoria, item)."""
+    return build_direct_purchases_price_table(load_direct_purchases_frame())
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_price_histories() -> dict:
+    """Preços recentes de cada papel e item de compra direta, por fonte (amostras do risk.py)."""
+    return {
+        calc.FONTE_PAPEL: risk.build_price_history(load_paper_purchases(), 'PapelLimpo', 'ValorUnitario', 'DataEmissaoNF'),
+        calc.FONTE_COMPRA_DIRETA: risk.build_price_history(
+            load_direct_purchases_frame(), ['CATEGORIA_MATERIAL_PCP', 'NomeLimpo'], 'VALOR_UNITARIO', 'DATA_EMISSAO_NF'
+        ),
+    }
+
+def build_direct_purchases(table: pd.DataFrame) -> dict:
+    """Categoria -> itens de compra direta, a partir da tabela de preços (load_direct_purchases_price_table)."""
+    # Uma linha por (categoria, item) já com todas as estratégias de preço
+    ultima_nf = table['ULTIMA_NF'].dt.strftime('%d/%m/%Y').fillna('N/A')
+    precos = table[list(pricing.ESTRATEGIAS)].to_dict('index')
+    categorias_cd = {}
+    for (cat, nome), nf in ultima_nf.items():
+        item_precos = precos[(cat, nome)]
+        categorias_cd.setdefault(cat, []).append({
+            'NomeLimpo': nome,
+            'VALOR_UNITARIO': item_precos[config.PRECO_ESTRATEGIA_PADRAO],
+            'ULTIMA_NF': nf,
+            'PRECOS': item_precos
+        })
+    return categorias_cd
+
+@st.cache_data(**_REFERENCIA)
+@perf.timed
+def load_direct_purchases_categories() -> dict:
+    """Categoria -> itens de compra direta (sem tratamento de erro: ver load_direct_purchases)."""
+    return build_direct_purchases(load_direct_purchases_price_table())
+
+def load_direct_purchases():
+    """Carrega e processa os dados de compras diretas, com tratamento de erro aprimorado."""
+    try:
+        try:
+            return load_direct_purchases_categories()
+        except MissingColumnsError as e:
+            st.error(f"❌ Erro em 'Compras Diretas': Colunas não encontradas no CSV: {e.missing}")
+            st.info(f"Colunas que foram encontradas: {e.found}")
+            return {}
+    except Exception as e:
+        # Agora a mensagem de erro será muito mais específica!
+        st.error(f"❌ Falha ao processar 'Compras Diretas': {e}")
+        st.warning("Verifique se o link está correto e se as colunas do arquivo CSV correspondem ao esperado pelo código.")
+        return {}
+
+def apply_price_strategy(direct_purchases_cats: dict, strategy: str) -> dict:
+    """Cópia das compras diretas com VALOR_UNITARIO da estratégia escolhida (só consulta)."""
+    if strategy == config.PRECO_ESTRATEGIA_PADRAO:
+        return direct_purchases_cats
+    return {
+        cat: [{**item, 'VALOR_UNITARIO': item['PRECOS'][strategy]} for item in items]
+        for cat, items in direct_purchases_cats.items()
+    }
+
+@st.cache_data(**_REFERENCIA)
+@perf.timed
+def load_wireo_map() -> dict:
+    """Nome do WIRE-O -> quantidade por caixa (sem tratamento de erro: ver load_wireo_table)."""
+    df = snapshots.read_csv_bytes(snapshots.fetch_source(config.URL_TABELA_WIREO))
+    df.columns = ['Nome', 'QtdPorCaixa']
+    df['Nome'] = df['Nome'].astype(str).str.strip()
+    df['QtdPorCaixa'] = pd.to_numeric(df['QtdPorCaixa'], errors='coerce')
+    return dict(zip(df['Nome'], df['QtdPorCaixa']))
+
+def load_wireo_table():
+    """Carrega a tabela de mapeamento de WIRE-O para quantidade por caixa."""
+    try:
+        return load_wireo_map()
+    except Exception:
+        st.warning("⚠️ Não foi possível carregar a tabela de WIRE-O. Usando valor padrão.")
+        return {}
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_impression_table(url: str):
+    """Carrega uma tabela de custos de impressão/serviço a partir de uma URL (compartilhado, somente leitura)."""
+    return snapshots.load_table(f"impressao_{_table_slug(url)}", url, _parse_impression_table)
+
+@st.cache_resource(**_REFERENCIA)
+@perf.timed
+def load_impression_steps(url: str) -> calc.ImpressionSteps:
+    """Tabela de impressão compilada em arrays para busca binária (uma por URL, compartilhada)."""
+    return calc.ImpressionSteps.from_frame(load_impression_table(url))
+
+@st.cache_data(**_REFERENCIA)
+@perf.timed
+def load_mod_ggf_table() -> pd.DataFrame:
+    """Tabela de custos de MOD/GGF por produto (sem tratamento de erro: ver load_mod_ggf_data)."""
+    df = snapshots.read_csv_bytes(snapshots.fetch_source(config.URL_MOD_GGF))
+
+    # LIMPEZA APRIMORADA:
+    # 1. Remove espaços no início e no fim (.str.strip())
+    # 2. Converte para maiúsculas para garantir consistência (.str.upper())
+    # 3. Substitui múltiplos espaços por um único espaço (.str.replace)
+    df['PRODUTO'] = df['PRODUTO'].str.strip().str.upper().str.replace(r'\s+', ' ', regex=True)
+
+    return df.set_index('PRODUTO')
+
 def load_mod_ggf_data():
     """Carrega a tabela de custos de MOD/GGF com limpeza de dados aprimorada."""
     try:
-        df = pd.read_csv(config.URL_MOD_GGF, encoding='utf-8')
-        
-        # LIMPEZA APRIMORADA:
-        # 1. Remove espaços no início e no fim (.str.strip())
-        # 2. Converte para maiúsculas para garantir consistência (.str.upper())
-        # 3. Substitui múltiplos espaços por um único espaço (.str.replace)
-        df['PRODUTO'] = df['PRODUTO'].str.strip().str.upper().str.replace(r'\s+', ' ', regex=True)
-        
-        return df.set_index('PRODUTO')
-        
+        return load_mod_ggf_table()
     except Exception as e:
         st.error(f"❌ Falha ao carregar a tabela de MOD/GGF: {e}")
         return pd.DataFrame()
@@ -176,4 +421,77 @@ def load_leather_materials(direct_purchases_cats: dict) -> list:
     if "COURO" in direct_purchases_cats:
         return sorted([item['NomeLimpo'] for item in direct_purchases_cats["COURO"]])
     return []
-      
\ No newline at end of file
+
+# Tabelas de uso de papel por componente: (URL, nome da coluna do item)
+COMPONENT_TABLES = {
+    "Miolo": config.URL_USO_PAPEL_MIOLO,
+    "Bolsa": config.URL_USO_PAPEL_BOLSA,
+    "Divisoria": config.URL_USO_PAPEL_DIVISORIA,
+    "Adesivo": config.URL_USO_PAPEL_ADESIVO,
+    "Item": config.URL_GUARDA_FORRO,
+    "GuardaVerso": config.URL_GUARDA_VERSO,
+}
+
+def load_component_table(item_col: str):
+    """Atalho para load_component_data com as colunas padrão do componente."""
+    return load_component_data(COMPONENT_TABLES[item_col], [item_col] + COLUNAS_COMPONENTE)
+
+def reference_table_loaders() -> dict:
+    """
+    Todos os carregamentos de tabelas de referência, como funções sem argumentos.
+    São as versões cacheadas e sem st.* (erros sobem como exceção), que podem
+    rodar fora de uma sessão, como no aquecimento (warmup.py).
+    """
+    loaders = {
+        "compras_papel": load_paper_purchases,
+        "indice_papel": load_paper_index,
+        "rendimento_papel": load_paper_yield_index,
+        "precos_papel": load_paper_price_book,
+        "compras_diretas": load_direct_purchases_categories,
+        "historicos_preco": load_price_histories,
+        "wireo": load_wireo_map,
+        "mod_ggf": load_mod_ggf_table,
+    }
+    for item_col in COMPONENT_TABLES:
+        loaders[f"componente_{item_col}"] = lambda item_col=item_col: load_component_table(item_col)
+    for url in sorted(set(config.CSV_MAP_IMPRESSAO.values())):
+        loaders[f"impressao_{_table_slug(url)}"] = lambda url=url: load_impression_steps(url)
+    return loaders
+      
+def memory_report() -> pd.DataFrame:
+    """
+    Memória (memory_usage(deep=True)) das tabelas de histórico de compras e
+    de componentes: só limpas, com todas as colunas do CSV (antes), e como
+    ficam em cache depois de _compact (depois). Relê as fontes, por isso é
+    só para a tela de administração, sob demanda.
+    """
+    tabelas = {
+        "compras_papel": (_clean_paper_purchases, config.URL_COMPRAS, load_paper_purchases),
+        "compras_diretas": (
+            lambda raw: _clean_direct_purchases(raw).dropna(subset=['CATEGORIA_MATERIAL_PCP']),
+            config.URL_COMPRA_DIRETA, load_direct_purchases_frame,
+        ),
+    }
+    for item_col, url in COMPONENT_TABLES.items():
+        columns = [item_col] + COLUNAS_COMPONENTE
+        tabelas[f"componente_{item_col}"] = (
+            lambda raw, columns=columns: _clean_component_data(raw, columns), url,
+            lambda item_col=item_col: load_component_table(item_col),
+        )
+
+    rows = []
+    for nome, (clean, url, load) in tabelas.items():
+        antes = clean(snapshots.fetch_source(url))
+        depois = load()
+        kb_antes = antes.memory_usage(deep=True).sum() / 1024
+        kb_depois = depois.memory_usage(deep=True).sum() / 1024
+        rows.append({
+            "Tabela": nome,
+            "Linhas": len(depois),
+            "Colunas (antes)": antes.shape[1],
+            "Colunas (depois)": depois.shape[1],
+            "Antes (KB)": kb_antes,
+            "Depois (KB)": kb_depois,
+            "Redução (%)": (1 - kb_depois / kb_antes) * 100 if kb_antes else 0.0,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,113 @@
+# orcamento_pro/descriptions.py
+"""
+Montagem das descrições técnicas do produto (proposta em PDF e ordem de protótipo).
+
+Um único classificador mapeia palavras-chave para seções. As seções são
+conjuntos ordenados, então não há buscas lineares para evitar repetições.
+O JSON de seleções é lido uma vez por orçamento e o resultado fica em cache.
+"""
+import json
+import unicodedata
+from functools import lru_cache
+
+# Ordem em que as seções aparecem nos documentos
+SECOES = (
+    "Capa", "Guarda", "Miolo", "Bolsa", "Divisória", "Adesivo", "ELASTICO", "FITA DE CETIM",
+    "FERRAGEM", "ILHOS", "PENDENTE", "REBITE", "SACO ADESIVADO", "WIRE-O", "PAPELAO", "Acabamento"
+)
+
+# Palavra-chave (normalizada) -> seção. A ordem é a prioridade: vale a primeira que aparecer no texto.
+PALAVRAS_CHAVE = (
+    ("capa", "Capa"),
+    ("guarda", "Guarda"),
+    ("forro", "Guarda"),
+    ("miolo", "Miolo"),
+    ("bolsa", "Bolsa"),
+    ("divisoria", "Divisória"),
+    ("adesivo", "Adesivo"),
+    ("ferragem", "FERRAGEM"),
+    ("ilhos", "ILHOS"),
+    ("pendente", "PENDENTE"),
+    ("rebite", "REBITE"),
+    ("saco adesivado", "SACO ADESIVADO"),
+    ("wire-o", "WIRE-O"),
+    ("elastico", "ELASTICO"),
+    ("cetim", "FITA DE CETIM"),
+    ("papelao", "PAPELAO"),
+    ("acabamento", "Acabamento"),
+)
+
+def _normalize(text: str) -> str:
+    """Remove acentos e caixa para a comparação das palavras-chave."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ASCII", "ignore").decode("ASCII")
+    return text.casefold()
+
+@lru_cache(maxsize=4096)
+def classify_section(text: str) -> str | None:
+    """Seção de um nome de item ou chave de seleção, ou None se nenhuma palavra-chave casar."""
+    norm = _normalize(text)
+    for keyword, section in PALAVRAS_CHAVE:
+        if keyword in norm:
+            return section
+    return None
+
+def _render(sections: dict, extra_before_acabamento: dict = None) -> list:
+    """Seções não vazias na ordem canônica (grupos extras entram antes do Acabamento)."""
+    ordered = [(s, sections.get(s)) for s in SECOES if s != "Acabamento"]
+    ordered += list((extra_before_acabamento or {}).items())
+    ordered.append(("Acabamento", sections.get("Acabamento")))
+    return [(name, list(items)) for name, items in ordered if items]
+
+# ================== ORDEM DE PROTÓTIPO ==================
+@lru_cache(maxsize=1024)
+def parse_selecoes(budget_id, selecoes_json) -> tuple:
+    """Itens do SelecoesJSON de um orçamento, lidos uma única vez por (ID, conteúdo)."""
+    try:
+        selecoes = json.loads(selecoes_json)
+    except Exception:
+        selecoes = {}
+    return tuple(selecoes.items()) if isinstance(selecoes, dict) else ()
+
+@lru_cache(maxsize=1024)
+def prototype_description(budget_id, selecoes_json, produto: str = "") -> str:
+    """Descrição técnica da ordem de protótipo a partir das seleções salvas do orçamento."""
+    sections = {}
+    for k, v in parse_selecoes(budget_id, selecoes_json):
+        k_clean = k.replace('cd_', '').replace('util_', '').replace('sel', '').strip().capitalize()
+        section = classify_section(k_clean)
+        if section is None:
+            continue
+        entries = v.items() if isinstance(v, dict) else [(k_clean, v)]
+        for label, value in entries:
+            if str(value).strip() != 'Nenhum':
+                sections.setdefault(section, {})[f"{label}: {value}"] = None
+
+    # Monta o texto final igual ao PDF
+    descricao_final = []
+    for secao, itens in _render(sections):
+        descricao_final.append(f"{secao}:")
+        descricao_final.extend(itens)
+        descricao_final.append("")
+
+    # Se não houver nada, retorna nome do produto
+    if not descricao_final:
+        return produto
+    return "\n".join(descricao_final)
+
+# ================== PROPOSTA ==================
+def proposal_description(items) -> str:
+    """
+    Descrição da proposta a partir das linhas de custo do orçamento.
+
+    Args:
+        items: Iterável de pares (nome do item, detalhes).
+    """
+    sections, extras = {}, {}
+    for nome, detalhes in items:
+        nome = (nome or "").strip()
+        if "mod + ggf" in nome.lower():
+            continue
+        section = classify_section(nome)
+        target = sections.setdefault(section, {}) if section else extras.setdefault(nome, {})
+        target[f"{nome}: {detalhes}"] = None
+    return "\n\n".join(f"{grupo}:\n" + "\n".join(linhas) for grupo, linhas in _render(sections, extras))
@@ -1,9 +1,11 @@
 from fpdf import FPDF
 from datetime import datetime, timedelta
+import perf
 
 def format_brl(value):
     return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
+@perf.timed("pdf.ordem_prototipo")
 def generate_ordem_prototipo_pdf(proposal_data, output_path):
     pdf = FPDF()
     pdf.add_page()
@@ -1,5 +1,6 @@
 from fpdf import FPDF
 import os
+import perf
 
 def get_multicell_height(pdf, w, h, text):
     # Cria uma página temporária para calcular a altura
@@ -14,6 +15,7 @@ def format_brl(value):
     """Formata um número float para o padrão brasileiro: 1.234,56"""
     return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
+@perf.timed("pdf.proposta")
 def generate_proposal_pdf(proposal_data, output_path):
     pdf = FPDF()
     pdf.add_page()
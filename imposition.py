@@ -0,0 +1,312 @@
+# orcamento_pro/imposition.py
+"""
+Imposição de peças retangulares em folhas (capas na folha útil, folhas úteis no papel).
+
+Procura o melhor arranjo em guilhotina com orientações mistas: a folha é
+cortada recursivamente em duas faixas, e cada retângulo final é uma grade de
+peças, todas na mesma orientação. Os cortes só são tentados nas combinações
+inteiras das medidas da peça (padrões normais), o que mantém a busca pequena.
+Os resultados ficam em cache pelas dimensões.
+
+Também encaixa peças em rolo (largura fixa, comprimento contínuo), para o
+couro sintético: ver roll_plan.
+
+Internamente todas as medidas são inteiras, em milímetros.
+"""
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+import config
+
+def cm_to_mm(value_cm: float) -> int:
+    """Converte centímetros (como nas tabelas de formatos) para milímetros inteiros."""
+    return int(round(float(value_cm) * 10))
+
+@dataclass(frozen=True, slots=True)
+class Block:
+    """Grade de peças na mesma orientação, com origem (x, y) em mm na folha."""
+    x: int
+    y: int
+    cols: int
+    rows: int
+    rotated: bool
+
+    @property
+    def count(self) -> int:
+        return self.cols * self.rows
+
+@dataclass(frozen=True, slots=True)
+class Layout:
+    """Melhor arranjo encontrado para uma peça em uma folha."""
+    sheet_mm: tuple[int, int]
+    piece_mm: tuple[int, int]
+    count: int
+    blocks: tuple[Block, ...]
+
+    def describe(self) -> str:
+        """Resumo legível do arranjo, para o detalhamento de custos."""
+        if not self.count:
+            return "nenhuma peça cabe na folha"
+        girada = sum(b.count for b in self.blocks if b.rotated)
+        normal = self.count - girada
+        partes = []
+        if normal:
+            partes.append(f"{normal} na orientação normal")
+        if girada:
+            partes.append(f"{girada} girada{'s' if girada > 1 else ''}")
+        peca = f"{self.piece_mm[0] / 10:g}x{self.piece_mm[1] / 10:g}"
+        folha = f"{self.sheet_mm[0] / 10:g}x{self.sheet_mm[1] / 10:g}"
+        return f"{self.count} x {peca}cm por folha {folha}cm ({' + '.join(partes)})"
+
+# ================== BUSCA ==================
+@lru_cache(maxsize=1024)
+def _patterns(length: int, a: int, b: int) -> tuple:
+    """Comprimentos i*a + j*b <= length (padrões normais), em ordem crescente."""
+    result = set()
+    for i in range(length // a + 1):
+        rest = length - i * a
+        for j in range(rest // b + 1):
+            result.add(i * a + j * b)
+    result.discard(0)
+    return tuple(sorted(result))
+
+def _floor_pattern(length: int, a: int, b: int) -> int:
+    """Maior padrão normal que cabe em length (sobra além dele é desperdício)."""
+    # Sem montar a lista de padrões: para cada nº de peças a, completa com b
+    return max(i * a + (length - i * a) // b * b for i in range(length // a + 1)) if length > 0 else 0
+
+class _SearchBudgetExceeded(Exception):
+    """A busca completa passou do limite de cortes testados (ver _search_budget)."""
+
+_budget = threading.local()  # cortes restantes da busca em andamento nesta thread (None = sem limite)
+
+@contextmanager
+def _search_budget(cuts: int):
+    """Limita os cortes testados por _solve dentro do bloco; estourado, levanta _SearchBudgetExceeded."""
+    previous = getattr(_budget, "remaining", None)
+    _budget.remaining = cuts
+    try:
+        yield
+    finally:
+        _budget.remaining = previous
+
+def _spend(cuts: int):
+    remaining = getattr(_budget, "remaining", None)
+    if remaining is None:
+        return
+    _budget.remaining = remaining - cuts
+    if _budget.remaining < 0:
+        raise _SearchBudgetExceeded()
+
+@lru_cache(maxsize=65536)
+def _solve(W: int, H: int, w: int, h: int) -> tuple:
+    """
+    Melhor contagem e plano de corte para a folha W x H (W e H já reduzidos a padrões normais).
+    Plano: ("grid", cols, rows, rotated) | ("v", x, esquerda, direita) | ("h", y, baixo, cima).
+    """
+    best_count, best_plan = _grid(W, H, w, h)
+    if best_count == 0 or best_count == (W * H) // (w * h):
+        return best_count, best_plan  # nada cabe, ou a grade já atinge o limite de área
+    # Subproblemas já resolvidos ficam no cache mesmo se a busca for interrompida aqui
+    _spend(len(_patterns(W, w, h)) + len(_patterns(H, w, h)))
+
+    # Basta cortar até a metade: o corte em x e em W - x geram as mesmas duas faixas
+    for x in _patterns(W, w, h):
+        if x > W // 2:
+            break
+        left = _solve(x, H, w, h)
+        right = _solve(_floor_pattern(W - x, w, h), H, w, h)
+        if left[0] + right[0] > best_count:
+            best_count, best_plan = left[0] + right[0], ("v", x, left[1], right[1])
+    for y in _patterns(H, w, h):
+        if y > H // 2:
+            break
+        bottom = _solve(W, y, w, h)
+        top = _solve(W, _floor_pattern(H - y, w, h), w, h)
+        if bottom[0] + top[0] > best_count:
+            best_count, best_plan = bottom[0] + top[0], ("h", y, bottom[1], top[1])
+    return best_count, best_plan
+
+def _grid(W: int, H: int, w: int, h: int) -> tuple:
+    """Melhor grade simples (uma orientação só) na folha W x H."""
+    best_count, best_plan = 0, None
+    for rotated, (pw, ph) in ((False, (w, h)), (True, (h, w))):
+        cols, rows = W // pw, H // ph
+        if cols * rows > best_count:
+            best_count, best_plan = cols * rows, ("grid", cols, rows, rotated)
+    return best_count, best_plan
+
+@lru_cache(maxsize=4096)
+def _solve_simple(W: int, H: int, w: int, h: int) -> tuple:
+    """
+    Busca reduzida, para peças pequenas em folhas grandes: a melhor grade simples
+    ou duas grades separadas por um único corte (faixas em orientações diferentes).
+    Mesmo formato de plano de _solve.
+
+    A primeira faixa é uma grade, então basta cortar nos múltiplos de uma das
+    medidas da peça: custo linear em W/w + H/h, sem tabelas de padrões.
+    """
+    best_count, best_plan = _grid(W, H, w, h)
+    for x in sorted({k * p for p in (w, h) for k in range(1, W // p + 1)}):
+        left, right = _grid(x, H, w, h), _grid(W - x, H, w, h)
+        if left[0] + right[0] > best_count:
+            best_count, best_plan = left[0] + right[0], ("v", x, left[1], right[1])
+    for y in sorted({k * p for p in (w, h) for k in range(1, H // p + 1)}):
+        bottom, top = _grid(W, y, w, h), _grid(W, H - y, w, h)
+        if bottom[0] + top[0] > best_count:
+            best_count, best_plan = bottom[0] + top[0], ("h", y, bottom[1], top[1])
+    return best_count, best_plan
+
+def _blocks(plan, x: int, y: int, out: list):
+    """Converte o plano de corte em blocos posicionados."""
+    if plan is None:
+        return
+    if plan[0] == "grid":
+        _, cols, rows, rotated = plan
+        if cols and rows:
+            out.append(Block(x, y, cols, rows, rotated))
+    elif plan[0] == "v":
+        _, cut, left, right = plan
+        _blocks(left, x, y, out)
+        _blocks(right, x + cut, y, out)
+    else:
+        _, cut, bottom, top = plan
+        _blocks(bottom, x, y, out)
+        _blocks(top, x, y + cut, out)
+
+@lru_cache(maxsize=4096)
+def best_layout(sheet_w: int, sheet_h: int, piece_w: int, piece_h: int,
+                bleed: int = None, gutter: int = None, exact: bool = None) -> Layout:
+    """
+    Melhor arranjo em guilhotina (orientações mistas) da peça na folha.
+
+    Args:
+        sheet_w, sheet_h (int): Folha, em mm.
+        piece_w, piece_h (int): Peça acabada, em mm.
+        bleed (int): Sangria por lado, em mm (padrão: config.IMPOSICAO_SANGRIA_MM).
+        gutter (int): Espaçamento entre peças, em mm (padrão: config.IMPOSICAO_ESPACAMENTO_MM).
+        exact (bool): Busca completa (True) ou reduzida a grades e um corte (False). Padrão:
+            completa, trocada pela reduzida se passar de config.IMPOSICAO_BUSCA_MAX cortes
+            (peças pequenas em folhas grandes).
+
+    Returns:
+        Layout: Contagem e blocos; count == 0 se a peça não couber.
+    """
+    bleed = config.IMPOSICAO_SANGRIA_MM if bleed is None else bleed
+    gutter = config.IMPOSICAO_ESPACAMENTO_MM if gutter is None else gutter
+    # Com espaçamento g, n peças ocupam n*(p+g) - g: soma-se g à folha e a cada peça
+    w = piece_w + 2 * bleed + gutter
+    h = piece_h + 2 * bleed + gutter
+    W, H = sheet_w + gutter, sheet_h + gutter
+    if w <= 0 or h <= 0 or min(w, h) > max(W, H):
+        return Layout((sheet_w, sheet_h), (piece_w, piece_h), 0, ())
+
+    W, H = _floor_pattern(W, w, h), _floor_pattern(H, w, h)
+    if exact is None:
+        try:
+            with _search_budget(config.IMPOSICAO_BUSCA_MAX):
+                count, plan = _solve(W, H, w, h)
+        except _SearchBudgetExceeded:
+            count, plan = _solve_simple(W, H, w, h)
+    else:
+        count, plan = (_solve if exact else _solve_simple)(W, H, w, h)
+    blocks = []
+    _blocks(plan, 0, 0, blocks)
+    return Layout((sheet_w, sheet_h), (piece_w, piece_h), count, tuple(blocks))
+
+# ================== ROLO (COMPRIMENTO CONTÍNUO) ==================
+@dataclass(frozen=True, slots=True)
+class RollPlan:
+    """
+    Encaixe de peças em um rolo: um bloco de period_mm de comprimento com
+    per_period peças se repete ao longo do rolo, e o que sobra da quantidade
+    vai no menor comprimento que comporta essas peças.
+    """
+    roll_width_mm: int
+    piece_mm: tuple[int, int]
+    period_mm: int
+    per_period: int
+    gutter_mm: int
+    period_layout: Layout
+    # Comprimentos candidatos (até 2 blocos) e quantas peças cabem em cada um, em ordem crescente
+    lengths_mm: tuple[int, ...]
+    counts: tuple[int, ...]
+
+    def _min_length(self, quantity: int) -> int | None:
+        i = bisect_left(self.counts, quantity)
+        return self.lengths_mm[i] if i < len(self.counts) else None
+
+    def length_mm(self, quantity: int) -> int:
+        """Comprimento de rolo, em mm, para a quantidade de peças (0 se nada couber)."""
+        if quantity <= 0 or not self.per_period:
+            return 0
+        pitch = self.period_mm + self.gutter_mm
+        k = quantity // self.per_period
+        best = k * pitch - self.gutter_mm if quantity == k * self.per_period else None
+        # Blocos cheios + o resto no menor comprimento da tabela; com menos blocos o resto às
+        # vezes encaixa melhor (com zero blocos, é o encaixe direto das quantidades pequenas)
+        while k >= 0:
+            extra = self._min_length(quantity - k * self.per_period)
+            if extra is None:
+                break
+            total = k * pitch + extra
+            best = total if best is None else min(best, total)
+            k -= 1
+        return best
+
+@lru_cache(maxsize=256)
+def roll_plan(roll_width: int, piece_w: int, piece_h: int, bleed: int = None, gutter: int = None,
+              max_period: int = None) -> RollPlan:
+    """
+    Melhor bloco repetível de peças no rolo (orientações mistas na largura) e a
+    tabela de comprimentos para o resto. Calculado uma vez por geometria; depois
+    disso o comprimento de qualquer quantidade sai em O(log n).
+
+    Args:
+        roll_width (int): Largura útil do rolo, em mm.
+        piece_w, piece_h (int): Peça acabada, em mm.
+        bleed, gutter (int): Como em best_layout (padrão: config).
+        max_period (int): Maior bloco testado, em mm (padrão: config.ROLO_BLOCO_MAX_MM).
+    """
+    bleed = config.IMPOSICAO_SANGRIA_MM if bleed is None else bleed
+    gutter = config.IMPOSICAO_ESPACAMENTO_MM if gutter is None else gutter
+    max_period = max_period or config.ROLO_BLOCO_MAX_MM
+    w = piece_w + 2 * bleed + gutter
+    h = piece_h + 2 * bleed + gutter
+
+    # Comprimentos que valem a pena: combinações inteiras das medidas da peça (padrões normais)
+    candidatos = [p - gutter for p in _patterns(2 * max_period + gutter, w, h) if p - gutter > 0]
+    # Cada candidato é uma imposição: se a busca completa de todos passar de
+    # config.ROLO_BUSCA_MAX cortes (peças pequenas), todos usam a busca reduzida,
+    # para o primeiro orçamento do produto não travar a página
+    exact = True
+    try:
+        with _search_budget(config.ROLO_BUSCA_MAX):
+            contagens = [best_layout(roll_width, length, piece_w, piece_h, bleed, gutter, True).count
+                         for length in candidatos]
+    except _SearchBudgetExceeded:
+        exact = False
+        contagens = [best_layout(roll_width, length, piece_w, piece_h, bleed, gutter, False).count
+                     for length in candidatos]
+
+    # Bloco de maior densidade (peças por mm de rolo, contando o espaçamento até o próximo bloco)
+    period, per_period, densidade = 0, 0, 0.0
+    for length, count in zip(candidatos, contagens):
+        if length > max_period:
+            break
+        if count and count / (length + gutter) > densidade:
+            period, per_period, densidade = length, count, count / (length + gutter)
+
+    # Tabela monótona para o resto: comprimento mínimo que comporta n peças
+    lengths, counts, maior = [], [], 0
+    for length, count in zip(candidatos, contagens):
+        if count > maior:
+            lengths.append(length)
+            counts.append(count)
+            maior = count
+    layout = best_layout(roll_width, period, piece_w, piece_h, bleed, gutter, exact) if period else \
+        Layout((roll_width, 0), (piece_w, piece_h), 0, ())
+    return RollPlan(roll_width, (piece_w, piece_h), period, per_period, gutter, layout, tuple(lengths), tuple(counts))
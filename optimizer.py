@@ -0,0 +1,195 @@
+# orcamento_pro/optimizer.py
+"""
+Busca da configuração de capa mais barata para um produto de policromia.
+
+Avalia, em uma passada, todo papel x tipo de impressão (Offset e Digital
+4/0, 4/1, 1/0, 1/1) x laminação, usando as mesmas funções de cálculo da tela
+de orçamento. O custo da capa é calculado uma vez por (papel, impressão) e a
+laminação é somada por cima, então as variantes com e sem laminação saem do
+mesmo cálculo. Combinações inviáveis (papel sem compras, sem dimensões no
+cadastro, capa que não cabe na folha) são descartadas.
+
+Para catálogos grandes a busca pode ser dividida entre processos
+(config.OTIMIZADOR_WORKERS); cada processo recebe só os papéis e rendimentos
+da sua parte.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+import config
+import calculations as calc
+
+# Opções como aparecem nos seletores da tela de orçamento
+IMPRESSOES_CAPA = ("Offset", "Digital 4/0", "Digital 4/1", "Digital 1/0", "Digital 1/1")
+LAMINACOES = ("Nenhum", "Laminação Fosca")
+
+@dataclass(frozen=True, slots=True)
+class CoverOption:
+    """Uma configuração de capa viável e suas linhas de custo (capa + laminação)."""
+    paper: str
+    impression: str
+    laminacao: str
+    total_cost_unit: float
+    lines: tuple
+
+    def cost_by_category(self, category: str) -> float:
+        return sum(line.unit_cost for line in self.lines if line.category == category)
+
+    @property
+    def paper_cost_unit(self) -> float:
+        return self.cost_by_category(calc.CATEGORIA_MATERIAL)
+
+    @property
+    def lamination_cost_unit(self) -> float:
+        return sum(line.unit_cost for line in self.lines if line.component == "Acabamento - Laminação")
+
+    @property
+    def impression_cost_unit(self) -> float:
+        return self.cost_by_category(calc.CATEGORIA_SERVICOS) - self.lamination_cost_unit
+
+@dataclass(frozen=True, slots=True)
+class CoverSearch:
+    """Resultado da busca: as melhores opções, do mais barato para o mais caro."""
+    options: tuple
+    avaliadas: int
+    descartadas: int
+
+# ================== AVALIAÇÃO ==================
+def evaluate_cover_options(
+    product_name: str,
+    quantity: int,
+    papers,
+    df_paper: pd.DataFrame,
+    paper_index: dict,
+    paper_yield_index: dict,
+    price_book=None,
+    impression_steps: calc.ImpressionSteps = None,
+    impressions=IMPRESSOES_CAPA,
+    laminacoes=LAMINACOES
+) -> tuple[list, int]:
+    """
+    Avalia todas as combinações papel x impressão x laminação.
+
+    Args:
+        product_name (str): Produto com sufixo (ex: 'REVISTA 14X21 - POLICROMIA').
+        quantity (int): Quantidade do orçamento.
+        papers: Papéis candidatos.
+        impression_steps: Tabela de impressão offset do produto (ds.load_impression_steps); sem ela, Offset é ignorado.
+        impressions, laminacoes: Opções a variar (padrão: todas).
+
+    Returns:
+        tuple: (lista de CoverOption viáveis, nº de combinações avaliadas).
+    """
+    base_product = calc.base_product_name(product_name)
+    product_base = product_name.replace(" - POLICROMIA", "")
+    if impression_steps is None:
+        impressions = [i for i in impressions if "Offset" not in i]
+
+    options, avaliadas = [], 0
+    for paper in papers:
+        spec = paper_index.get(paper)
+        paper_yield = paper_yield_index.get((paper, base_product))
+        for impression in impressions:
+            avaliadas += len(laminacoes)
+            if paper_yield is None or not paper_yield.capas_por_folha:
+                continue  # papel sem dimensões (não dá para conferir se a capa cabe) ou capa que não cabe
+            if "Offset" in impression:
+                cover = calc.calculate_offset_cover_cost(product_base, quantity, paper, df_paper, impression_steps, price_book=price_book)
+            else:
+                cover = calc.calculate_digital_cover_cost(
+                    product_name, paper, impression, quantity, df_paper,
+                    paper_yield=paper_yield, price_book=price_book
+                )
+            if cover.get("error"):
+                continue
+            cover_lines = tuple(line for line in cover["lines"] if line.unit_cost > 0)
+            for laminacao in laminacoes:
+                lines = cover_lines
+                if laminacao != "Nenhum":
+                    lam = calc.calculate_cover_lamination_cost(cover, impression, paper, quantity, df_paper, product_name, spec)
+                    if lam.get("error"):
+                        continue
+                    lines = cover_lines + tuple(lam["lines"])
+                total = sum(line.unit_cost for line in lines)
+                options.append(CoverOption(paper, impression, laminacao, total, lines))
+    return options, avaliadas
+
+def _evaluate_chunk(args) -> tuple[list, int]:
+    """Ponto de entrada dos processos auxiliares (precisa ser uma função de módulo)."""
+    return evaluate_cover_options(*args)
+
+def _sort_key(option: CoverOption):
+    return (option.total_cost_unit, option.paper, option.impression, option.laminacao)
+
+def find_cheapest_covers(
+    product_name: str,
+    quantity: int,
+    papers,
+    df_paper: pd.DataFrame,
+    paper_index: dict,
+    paper_yield_index: dict,
+    price_book=None,
+    impression_steps: calc.ImpressionSteps = None,
+    impressions=IMPRESSOES_CAPA,
+    laminacoes=LAMINACOES,
+    top_n: int = None,
+    workers: int = None
+) -> CoverSearch:
+    """
+    As top_n configurações de capa mais baratas (custo unitário de capa + laminação).
+
+    Args:
+        top_n (int): Quantas opções devolver (padrão: config.OTIMIZADOR_TOP_N).
+        workers (int): Processos para dividir os papéis (padrão: config.OTIMIZADOR_WORKERS).
+            Com 1, ou com poucos papéis, roda no próprio processo.
+
+    Returns:
+        CoverSearch: Opções ordenadas e contagem de combinações avaliadas/descartadas.
+    """
+    top_n = top_n or config.OTIMIZADOR_TOP_N
+    workers = workers or config.OTIMIZADOR_WORKERS
+    papers = list(dict.fromkeys(papers))
+    base_product = calc.base_product_name(product_name)
+
+    if workers <= 1 or len(papers) < config.OTIMIZADOR_MIN_PAPEIS_POR_PROCESSO * 2:
+        options, avaliadas = evaluate_cover_options(
+            product_name, quantity, papers, df_paper, paper_index, paper_yield_index,
+            price_book, impression_steps, impressions, laminacoes
+        )
+    else:
+        n_chunks = min(workers, len(papers) // config.OTIMIZADOR_MIN_PAPEIS_POR_PROCESSO)
+        chunks = [papers[i::n_chunks] for i in range(n_chunks)]
+        tasks = []
+        for chunk in chunks:
+            # Cada processo recebe só a sua parte das tabelas
+            chunk_set = set(chunk)
+            tasks.append((
+                product_name, quantity, chunk,
+                df_paper[df_paper['PapelLimpo'].isin(chunk_set)],
+                {p: paper_index[p] for p in chunk if p in paper_index},
+                {(p, base_product): paper_yield_index[(p, base_product)] for p in chunk if (p, base_product) in paper_yield_index},
+                price_book, impression_steps, tuple(impressions), tuple(laminacoes)
+            ))
+        # "spawn": não herda as threads do servidor do Streamlit
+        with ProcessPoolExecutor(max_workers=n_chunks, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_evaluate_chunk, tasks))
+        options = [o for chunk_options, _ in results for o in chunk_options]
+        avaliadas = sum(n for _, n in results)
+
+    options.sort(key=_sort_key)
+    return CoverSearch(tuple(options[:top_n]), avaliadas, avaliadas - len(options))
+
+def options_to_frame(options) -> pd.DataFrame:
+    """Tabela das opções para exibição (custos por unidade)."""
+    return pd.DataFrame({
+        "Papel": [o.paper for o in options],
+        "Impressão": [o.impression for o in options],
+        "Laminação": [o.laminacao for o in options],
+        "Papel (R$/un)": [o.paper_cost_unit for o in options],
+        "Impressão (R$/un)": [o.impression_cost_unit for o in options],
+        "Laminação (R$/un)": [o.lamination_cost_unit for o in options],
+        "Total capa (R$/un)": [o.total_cost_unit for o in options],
+    })
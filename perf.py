@@ -0,0 +1,193 @@
+# orcamento_pro/perf.py
+"""
+Instrumentação leve de desempenho: tempo de cada trecho ("span") e de cada rerun.
+
+    with perf.span("orcamento.capa"):
+        ...
+
+    @perf.timed("pdf.proposta")
+    def generate_proposal_pdf(...):
+        ...
+
+Cada span alimenta um histograma móvel do processo (as últimas
+config.DESEMPENHO_JANELA medições de cada nome), de onde saem p50/p95.
+Os spans medidos dentro de `with perf.rerun(pagina)` também ficam no
+registro daquele rerun, e os reruns recentes alimentam a aba "Desempenho"
+do painel admin. O custo é de poucos microssegundos por span;
+ORCAMENTO_DESEMPENHO=0 desliga a coleta.
+"""
+import collections
+import functools
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import config
+
+enabled = config.DESEMPENHO_ATIVO
+
+_lock = threading.Lock()
+_samples = {}   # nome -> deque das últimas durações (ms)
+_totals = {}    # nome -> [contagem, soma em ms] desde o início do processo
+_reruns = collections.deque(maxlen=config.DESEMPENHO_RERUNS)
+# Cada sessão do Streamlit roda o script na sua própria thread: o rerun em andamento é por thread
+_local = threading.local()
+
+@dataclass(frozen=True, slots=True)
+class RerunRecord:
+    """Um rerun da página: duração total e tempo somado de cada span medido nele."""
+    pagina: str
+    inicio: float        # time.time() do início
+    duracao_ms: float
+    spans: dict          # nome -> ms
+    interrompido: bool   # terminou com st.rerun/st.stop ou exceção
+
+def record(name: str, ms: float):
+    """Registra uma medição (ms) no histograma do span e no rerun em andamento."""
+    with _lock:
+        amostras = _samples.get(name)
+        if amostras is None:
+            amostras = _samples[name] = collections.deque(maxlen=config.DESEMPENHO_JANELA)
+            _totals[name] = [0, 0.0]
+        amostras.append(ms)
+        total = _totals[name]
+        total[0] += 1
+        total[1] += ms
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + ms
+
+class _Span:
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if enabled:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._start is not None:
+            record(self.name, (time.perf_counter() - self._start) * 1000)
+        return False
+
+def span(name: str) -> _Span:
+    """Context manager que mede o bloco com o nome dado (ex: "orcamento.capa")."""
+    return _Span(name)
+
+def timed(name=None):
+    """
+    Decorator que mede cada chamada da função. Sem nome, usa "<módulo>.<função>".
+    Embaixo de @st.cache_data/@st.cache_resource mede só as cargas de verdade (não os acertos do cache).
+    """
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, (time.perf_counter() - start) * 1000)
+        return wrapper
+
+    if callable(name):  # usado como @perf.timed, sem parênteses
+        func, name = name, None
+        return decorator(func)
+    return decorator
+
+class _Rerun:
+    __slots__ = ("pagina", "_start", "_inicio", "_anterior")
+
+    def __init__(self, pagina: str):
+        self.pagina = pagina
+        self._start = None
+
+    def __enter__(self):
+        if enabled:
+            self._anterior = getattr(_local, "spans", None)
+            _local.spans = {}
+            self._inicio = time.time()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._start is None:
+            return False
+        ms = (time.perf_counter() - self._start) * 1000
+        spans, _local.spans = _local.spans, self._anterior
+        record(f"rerun.{self.pagina}", ms)
+        with _lock:
+            _reruns.append(RerunRecord(self.pagina, self._inicio, ms, spans, exc_type is not None))
+        return False
+
+def rerun(pagina: str) -> _Rerun:
+    """Context manager em volta da renderização de uma página: registra o rerun e os spans dele."""
+    return _Rerun(pagina)
+
+# ================== CONSULTAS (aba "Desempenho") ==================
+def summary_frame() -> pd.DataFrame:
+    """p50/p95/máximo de cada span na janela móvel, mais lentos (p95) primeiro."""
+    with _lock:
+        dados = {name: (np.fromiter(amostras, dtype=float, count=len(amostras)), _totals[name][0])
+                 for name, amostras in _samples.items()}
+    rows = []
+    for name, (amostras, contagem) in dados.items():
+        p50, p95 = np.percentile(amostras, [50, 95])
+        rows.append({"Span": name, "Medições": contagem, "p50 (ms)": p50, "p95 (ms)": p95,
+                     "Máximo (ms)": amostras.max(), "Janela": len(amostras)})
+    df = pd.DataFrame(rows, columns=["Span", "Medições", "p50 (ms)", "p95 (ms)", "Máximo (ms)", "Janela"])
+    return df.sort_values("p95 (ms)", ascending=False, ignore_index=True)
+
+def slowest_reruns(n: int = 10) -> list:
+    """Os n reruns recentes mais lentos (RerunRecord), do mais lento para o mais rápido."""
+    with _lock:
+        reruns = list(_reruns)
+    return sorted(reruns, key=lambda r: r.duracao_ms, reverse=True)[:n]
+
+def reruns_frame(reruns: list, top_spans: int = 3) -> pd.DataFrame:
+    """Tabela dos reruns com os spans que mais pesaram em cada um."""
+    rows = []
+    for r in reruns:
+        principais = sorted(r.spans.items(), key=lambda kv: kv[1], reverse=True)[:top_spans]
+        rows.append({
+            "Início": time.strftime("%d/%m %H:%M:%S", time.localtime(r.inicio)),
+            "Página": r.pagina,
+            "Duração (ms)": r.duracao_ms,
+            "Interrompido": r.interrompido,
+            "Maiores spans": ", ".join(f"{name} {ms:.0f} ms" for name, ms in principais),
+        })
+    return pd.DataFrame(rows, columns=["Início", "Página", "Duração (ms)", "Interrompido", "Maiores spans"])
+
+def export_text() -> str:
+    """Métricas em texto puro (formato de exposição do Prometheus, tipo summary)."""
+    with _lock:
+        dados = {name: (np.fromiter(amostras, dtype=float, count=len(amostras)), *_totals[name])
+                 for name, amostras in sorted(_samples.items())}
+    linhas = [
+        "# HELP orcamento_span_ms Duração dos spans em ms (quantis da janela móvel do processo)",
+        "# TYPE orcamento_span_ms summary",
+    ]
+    for name, (amostras, contagem, soma) in dados.items():
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for q, v in zip(("0.5", "0.95"), np.percentile(amostras, [50, 95])):
+            linhas.append(f'orcamento_span_ms{{span="{label}",quantile="{q}"}} {v:.3f}')
+        linhas.append(f'orcamento_span_ms_sum{{span="{label}"}} {soma:.3f}')
+        linhas.append(f'orcamento_span_ms_count{{span="{label}"}} {contagem}')
+    return "\n".join(linhas) + "\n"
+
+def reset():
+    """Descarta todas as medições do processo."""
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+        _reruns.clear()
@@ -0,0 +1,103 @@
+# orcamento_pro/pricing.py
+"""
+Modelos de preço de compra (papéis e compras diretas).
+
+Todas as estratégias são calculadas de uma vez, em um único groupby
+vetorizado sobre o histórico de compras, e ficam em uma tabela larga
+(um item por linha, uma estratégia por coluna). Trocar a estratégia de um
+orçamento é só uma consulta no PriceBook, sem recalcular nada.
+"""
+from dataclasses import dataclass, replace
+
+import pandas as pd
+
+import config
+
+# Estratégia -> rótulo exibido na tela
+ESTRATEGIAS = {
+    "media_3": "Média das últimas compras",
+    "ultima": "Última compra",
+    "media_ponderada": "Média ponderada pela quantidade",
+    "ewma": "Média exponencial (compras recentes pesam mais)",
+    "fifo": "PEPS (lote mais antigo em estoque)",
+}
+
+def build_price_table(df: pd.DataFrame, key, price_col: str, qty_col: str, date_col: str,
+                      janela: int = None, meia_vida: float = None, dias_estoque: int = None) -> pd.DataFrame:
+    """
+    Calcula todas as estratégias de preço para todos os itens em uma passada.
+
+    Args:
+        df: Histórico de compras.
+        key: Coluna (ou lista de colunas) que identifica o item.
+        price_col, qty_col, date_col: Colunas de valor unitário, quantidade e data da NF.
+        janela: Nº de compras recentes das médias simples e ponderada (padrão: config).
+        meia_vida: Meia-vida da média exponencial, em compras (padrão: config).
+        dias_estoque: Janela do PEPS, em dias antes da última compra (padrão: config).
+
+    Returns:
+        pd.DataFrame: Índice = item; colunas = uma por estratégia, mais COMPRAS e ULTIMA_NF.
+    """
+    janela = janela or config.PRECO_JANELA_COMPRAS
+    meia_vida = meia_vida or config.PRECO_EWMA_MEIA_VIDA
+    dias_estoque = config.PRECO_FIFO_DIAS_ESTOQUE if dias_estoque is None else dias_estoque
+    keys = [key] if isinstance(key, str) else list(key)
+    # observed=True: as chaves podem ser categóricas (ver data_services._compact) e
+    # itens que só existiam em linhas filtradas não devem virar linhas vazias
+    d = df[keys + [price_col, qty_col, date_col]].copy()
+    d[qty_col] = pd.to_numeric(d[qty_col], errors="coerce")
+    # Mais recente primeiro dentro de cada item (datas ausentes por último, como no filtro original)
+    d = d.sort_values(date_col, ascending=False, kind="stable")
+    d["_ordem"] = d.groupby(keys, sort=False, observed=True).cumcount()  # 0 = compra mais recente
+
+    g = d.groupby(keys, sort=False, observed=True)
+    ultima_data = g[date_col].transform("first")
+
+    # Média simples e ponderada das últimas compras
+    recentes = d[d["_ordem"] < janela]
+    recentes_vq = (recentes[price_col] * recentes[qty_col]).groupby([recentes[k] for k in keys], observed=True).sum(min_count=1)
+    recentes_q = recentes[qty_col].where(recentes[qty_col] > 0).groupby([recentes[k] for k in keys], observed=True).sum(min_count=1)
+    media_n = recentes.groupby(keys, observed=True)[price_col].mean()
+
+    # Média exponencial: peso 0.5 ** (ordem / meia-vida), ordem 0 = compra mais recente
+    peso = 0.5 ** (d["_ordem"] / meia_vida)
+    ewma = (d[price_col] * peso).groupby([d[k] for k in keys], observed=True).sum() / peso.groupby([d[k] for k in keys], observed=True).sum()
+
+    # PEPS: o próximo consumo sai do lote mais antigo ainda em estoque, supondo
+    # que o estoque é o que foi comprado nos últimos dias_estoque dias
+    em_estoque = (d[date_col] >= ultima_data - pd.Timedelta(days=dias_estoque)) | (d["_ordem"] == 0)
+    fifo = d[em_estoque].groupby(keys, observed=True)[price_col].last()
+
+    table = pd.DataFrame({
+        "media_3": media_n,
+        "ultima": g[price_col].first(),
+        "media_ponderada": (recentes_vq / recentes_q).fillna(media_n),
+        "ewma": ewma,
+        "fifo": fifo,
+        "COMPRAS": g[price_col].size(),
+        "ULTIMA_NF": g[date_col].first(),
+    })
+    return table
+
+@dataclass(frozen=True, slots=True)
+class PriceBook:
+    """Tabela larga de preços + dicionários de consulta por estratégia."""
+    table: pd.DataFrame
+    lookup: dict  # estratégia -> {item: preço}; não alterar (compartilhado entre as cópias)
+    strategy: str = config.PRECO_ESTRATEGIA_PADRAO
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, strategy: str = None) -> "PriceBook":
+        lookup = {s: table[s].to_dict() for s in ESTRATEGIAS}
+        return cls(table, lookup, strategy or config.PRECO_ESTRATEGIA_PADRAO)
+
+    def with_strategy(self, strategy: str) -> "PriceBook":
+        """Mesmo livro de preços com outra estratégia ativa (nada é recalculado)."""
+        if strategy not in ESTRATEGIAS:
+            raise ValueError(f"Estratégia de preço desconhecida: '{strategy}'.")
+        return self if strategy == self.strategy else replace(self, strategy=strategy)
+
+    def price(self, item, strategy: str = None) -> float | None:
+        """Preço do item na estratégia ativa (ou na informada), ou None se não houver compras."""
+        value = self.lookup[strategy or self.strategy].get(item)
+        return None if value is None or pd.isna(value) else float(value)
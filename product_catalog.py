@@ -0,0 +1,98 @@
+# orcamento_pro/product_catalog.py
+"""
+Catálogo de geometria dos produtos: formato aberto da capa, altura da faca
+do couro, formato útil de impressão digital e a tabela de preços desse formato.
+
+É lido uma única vez dos CSVs versionados (config.CATALOGO_PRODUTOS_FILE e
+config.CATALOGO_FORMATOS_FILE) para registros imutáveis. Para cadastrar um
+produto novo basta acrescentar uma linha no CSV.
+"""
+import csv
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+import config
+
+# Formato útil usado quando o produto não está no catálogo (ex: laminação)
+FORMATO_UTIL_PADRAO = "47x33"
+
+# Tipos de impressão digital com preço na tabela de formatos úteis
+TIPOS_IMPRESSAO_DIGITAL = ("4/0", "4/1", "1/0", "1/1")
+
+@dataclass(frozen=True, slots=True)
+class UsefulFormat:
+    """Formato útil de impressão digital e o preço por folha útil de cada tipo."""
+    nome: str
+    largura_cm: float
+    altura_cm: float
+    precos: tuple[tuple[str, float], ...]
+
+    def preco(self, tipo_impressao: str) -> float | None:
+        """Preço da folha útil para o tipo de impressão (ex: '4/0')."""
+        for tipo, valor in self.precos:
+            if tipo == tipo_impressao:
+                return valor
+        return None
+
+@dataclass(frozen=True, slots=True)
+class ProductGeometry:
+    """Geometria de um produto base (sem o sufixo de acabamento)."""
+    nome: str
+    largura_aberta_cm: float
+    altura_aberta_cm: float
+    altura_faca_cm: float
+    formato_util: UsefulFormat
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    produtos: MappingProxyType
+    formatos: MappingProxyType
+
+    def get(self, product_name: str) -> ProductGeometry | None:
+        """Geometria do produto, aceitando o nome com sufixo (ex: ' - POLICROMIA')."""
+        return self.produtos.get(base_product_name(product_name))
+
+    def useful_format_for(self, product_name: str) -> UsefulFormat:
+        """Formato útil do produto, ou o formato padrão se ele não estiver no catálogo."""
+        produto = self.get(product_name) if product_name else None
+        return produto.formato_util if produto else self.formatos[FORMATO_UTIL_PADRAO]
+
+def base_product_name(product_name: str) -> str:
+    """Nome do produto sem o sufixo de acabamento (ex: ' - POLICROMIA')."""
+    return product_name.replace(" - POLICROMIA", "").replace(" - COURO SINTÉTICO", "").strip().upper()
+
+def _read_rows(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [{k.strip(): (v or "").strip() for k, v in row.items()} for row in csv.DictReader(f)]
+
+def load_catalog(produtos_path: str, formatos_path: str) -> Catalog:
+    """Lê os CSVs do catálogo e valida as referências entre eles."""
+    formatos = {}
+    for row in _read_rows(formatos_path):
+        precos = tuple(
+            (tipo, float(row[f"PRECO_{tipo}"]))
+            for tipo in TIPOS_IMPRESSAO_DIGITAL if row.get(f"PRECO_{tipo}")
+        )
+        formatos[row["FORMATO"]] = UsefulFormat(row["FORMATO"], float(row["LARGURA_CM"]), float(row["ALTURA_CM"]), precos)
+    if FORMATO_UTIL_PADRAO not in formatos:
+        raise ValueError(f"Formato útil padrão '{FORMATO_UTIL_PADRAO}' ausente em {formatos_path}.")
+
+    produtos = {}
+    for row in _read_rows(produtos_path):
+        nome = base_product_name(row["PRODUTO"])
+        if row["FORMATO_UTIL"] not in formatos:
+            raise ValueError(f"Produto '{nome}': formato útil '{row['FORMATO_UTIL']}' não cadastrado.")
+        produtos[nome] = ProductGeometry(
+            nome=nome,
+            largura_aberta_cm=float(row["LARGURA_ABERTA_CM"]),
+            altura_aberta_cm=float(row["ALTURA_ABERTA_CM"]),
+            altura_faca_cm=float(row["ALTURA_FACA_CM"]),
+            formato_util=formatos[row["FORMATO_UTIL"]],
+        )
+    return Catalog(MappingProxyType(produtos), MappingProxyType(formatos))
+
+@lru_cache(maxsize=1)
+def get_catalog() -> Catalog:
+    """Catálogo padrão do projeto, carregado uma única vez por processo."""
+    return load_catalog(config.CATALOGO_PRODUTOS_FILE, config.CATALOGO_FORMATOS_FILE)
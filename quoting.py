@@ -0,0 +1,355 @@
+# orcamento_pro/quoting.py
+"""
+Cotação sem sessão do Streamlit.
+
+Refaz, a partir de um SelecoesJSON (as mesmas chaves que a página de
+orçamento salva: sel_produto, sel_capa_papel, cd_<categoria>, util_<item>...),
+o cálculo da página de orçamento com as mesmas funções de calculations.py e o
+mesmo markup/comissões do "Resumo Financeiro". Não depende de widgets: serve
+ao serviço HTTP (service.py) e a scripts.
+
+As tabelas de referência são carregadas uma vez (load_reference_tables) e
+passadas a cada cotação; quote_selections não faz E/S.
+"""
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+import config
+import calculations as calc
+import data_services as ds
+import pricing
+
+# Componentes na ordem da tela: (título do seletor, coluna do item na tabela)
+COMPONENTES = (
+    ("Guarda (Frente) ou Forro", "Item"),
+    ("Miolo", "Miolo"),
+    ("Bolsa", "Bolsa"),
+    ("Divisória", "Divisoria"),
+    ("Adesivo", "Adesivo"),
+)
+GUARDA_VERSO = ("Guarda (Verso)", "GuardaVerso")
+
+# Chaves do SelecoesJSON: prefixos dos widgets e campos de capa/acabamento (como salvos pela tela)
+PREFIXOS_SELECAO = ('sel_', 'paper_', 'mat_cost_', 'serv_cost_', 'util_', 'rings_', 'vu_', 'cd_')
+# Chaves numéricas (o resto das chaves de seleção guarda o texto escolhido nos widgets)
+PREFIXOS_NUMERICOS = ('mat_cost_', 'serv_cost_', 'util_', 'rings_', 'vu_')
+CHAVES_SELECAO_EXTRAS = (
+    'selected_laminacao', 'selected_hot_stamping', 'selected_silk',
+    'sel_capa_papel', 'sel_capa_impressao', 'sel_capa_couro', 'sel_produto'
+)
+
+# Nº de anéis de WIRE-O por unidade quando a seleção não informa (mesmo valor inicial da tela)
+ANEIS_WIREO_PADRAO = 30
+
+@dataclass(frozen=True, slots=True)
+class ReferenceTables:
+    """Tabelas de referência já carregadas, compartilhadas entre cotações (somente leitura)."""
+    df_paper: pd.DataFrame
+    paper_index: dict
+    paper_yield_index: dict
+    price_book: pricing.PriceBook
+    component_tables: dict       # coluna do item -> DataFrame
+    direct_purchases: dict       # categoria -> itens (ds.load_direct_purchases)
+    wireo_map: dict
+    df_mod_ggf: pd.DataFrame
+    impression_steps: dict       # URL -> calc.ImpressionSteps
+    carregado_em: float = field(default_factory=time.time)
+
+def load_reference_tables() -> ReferenceTables:
+    """Carrega (ou pega do cache dos loaders) todas as tabelas usadas na cotação."""
+    return ReferenceTables(
+        df_paper=ds.load_paper_purchases(),
+        paper_index=ds.load_paper_index(),
+        paper_yield_index=ds.load_paper_yield_index(),
+        price_book=ds.load_paper_price_book(),
+        component_tables={col: ds.load_component_table(col) for col in ds.COMPONENT_TABLES},
+        direct_purchases=ds.load_direct_purchases(),
+        wireo_map=ds.load_wireo_table(),
+        df_mod_ggf=ds.load_mod_ggf_data(),
+        impression_steps={url: ds.load_impression_steps(url) for url in set(config.CSV_MAP_IMPRESSAO.values())},
+    )
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    """Resultado de uma cotação: linhas de custo, erros/avisos e o preço de venda."""
+    produto: str
+    quantidade: int
+    estrategia_preco: str
+    lines: tuple
+    erros: tuple
+    avisos: tuple
+    custo_componentes: float
+    ajustes: float
+    custo_ajustado: float
+    markup: float
+    comissao_pct: float
+    preco_venda: float
+
+    @property
+    def categorias(self) -> dict:
+        totais = dict.fromkeys(
+            (calc.CATEGORIA_MATERIAL, calc.CATEGORIA_SERVICOS, calc.CATEGORIA_AVIAMENTOS, calc.CATEGORIA_MOD_GGF), 0.0
+        )
+        for line in self.lines:
+            totais[line.category] = totais.get(line.category, 0.0) + line.unit_cost
+        return totais
+
+    def to_dict(self) -> dict:
+        """Representação JSON (valores unitários em R$ por unidade do orçamento)."""
+        return {
+            "produto": self.produto,
+            "quantidade": self.quantidade,
+            "estrategia_preco": self.estrategia_preco,
+            "linhas": [
+                {"componente": l.component, "categoria": l.category, "quantidade": l.quantity,
+                 "unidade": l.unit, "custo_unitario": l.unit_cost, "detalhes": str(l.details)}
+                for l in self.lines
+            ],
+            "categorias": self.categorias,
+            "custo_base": self.custo_componentes,
+            "ajustes": self.ajustes,
+            "custo_ajustado": self.custo_ajustado,
+            "markup": self.markup,
+            "comissao_pct": self.comissao_pct,
+            "preco_venda_unitario": self.preco_venda,
+            "preco_venda_total": self.preco_venda * self.quantidade,
+            "erros": list(self.erros),
+            "avisos": list(self.avisos),
+        }
+
+def parse_selections(selecoes) -> dict:
+    """Aceita o SelecoesJSON como texto ou já como dicionário."""
+    if isinstance(selecoes, str):
+        selecoes = json.loads(selecoes or "{}")
+    if not isinstance(selecoes, dict):
+        raise ValueError("As seleções devem ser um objeto JSON.")
+    return selecoes
+
+class QuoteSpecError(ValueError):
+    """Especificação de cotação inválida (campo ausente ou com tipo errado)."""
+
+def parse_quote_spec(body: dict) -> dict:
+    """
+    Valida uma especificação de cotação (corpo do POST /cotacao, linha do lote)
+    e devolve os argumentos de quote_selections.
+    """
+    if not isinstance(body, dict):
+        raise QuoteSpecError("A especificação deve ser um objeto JSON.")
+    try:
+        selecoes = parse_selections(body.get("selecoes", {}))
+    except (ValueError, TypeError) as e:
+        raise QuoteSpecError(f"'selecoes' inválido: {e}")
+    invalidas = [k for k, v in selecoes.items() if not _valid_selection_value(k, v)]
+    if invalidas:
+        raise QuoteSpecError(
+            "Valores de seleção inválidos (texto nas escolhas; número ou texto em custos, "
+            f"utilizações e anéis): {', '.join(map(str, invalidas))}."
+        )
+    if not selecoes.get("sel_produto"):
+        raise QuoteSpecError("'selecoes.sel_produto' é obrigatório.")
+    if selecoes["sel_produto"] not in config.PRODUTOS_BASE:
+        # Mesma lista da tela de orçamento; um produto desconhecido sairia com custo zero
+        raise QuoteSpecError(f"Produto desconhecido: '{selecoes['sel_produto']}'.")
+
+    try:
+        quantidade = float(body.get("quantidade", 0))
+        if not quantidade.is_integer():
+            raise ValueError
+    except (TypeError, ValueError):
+        raise QuoteSpecError("'quantidade' deve ser um número inteiro.")
+    quantidade = int(quantidade)
+    if quantidade <= 0:
+        raise QuoteSpecError("'quantidade' deve ser maior que zero.")
+
+    args = {"selecoes": selecoes, "quantity": quantidade}
+    for campo in ("markup", "comissao_vendedor", "comissao_promotor"):
+        if body.get(campo) is None:
+            continue
+        try:
+            args[campo] = float(body[campo])
+        except (TypeError, ValueError):
+            raise QuoteSpecError(f"'{campo}' deve ser numérico.")
+    if args.get("markup", 1.0) < 1.0:
+        raise QuoteSpecError("'markup' deve ser no mínimo 1.0.")
+
+    ajustes = body.get("ajustes") or []
+    if not isinstance(ajustes, list) or not all(isinstance(a, dict) for a in ajustes):
+        raise QuoteSpecError("'ajustes' deve ser uma lista de objetos {descricao, valor}.")
+    args["ajustes"] = ajustes
+    return args
+
+def _valid_selection_value(key, value) -> bool:
+    """Como a tela salva: escolhas são texto; custos, utilizações e anéis são número (ou texto numérico, do lote CSV)."""
+    if value is None or not isinstance(key, str) or not is_selection_key(key):
+        return True
+    if isinstance(value, str):
+        return True
+    return key.startswith(PREFIXOS_NUMERICOS) and isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def is_selection_key(key: str) -> bool:
+    """Se a chave faz parte do SelecoesJSON."""
+    return key.startswith(PREFIXOS_SELECAO) or key in CHAVES_SELECAO_EXTRAS
+
+def _number(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def quote_selections(
+    selecoes,
+    quantity: int,
+    tables: ReferenceTables,
+    markup: float = None,
+    comissao_vendedor: float = None,
+    comissao_promotor: float = None,
+    ajustes=()
+) -> Quote:
+    """
+    Calcula o orçamento descrito pelas seleções, como a página de orçamento.
+
+    Args:
+        selecoes: SelecoesJSON (texto ou dicionário); o produto vem de 'sel_produto'.
+        quantity (int): Quantidade do orçamento.
+        tables (ReferenceTables): Tabelas de referência carregadas.
+        markup, comissao_vendedor, comissao_promotor: Padrão: os valores iniciais da tela (config).
+        ajustes: Ajustes manuais [{"descricao": ..., "valor": ...}], somados ao custo.
+
+    Returns:
+        Quote: Linhas de custo, erros por componente (como os st.error da tela) e preço de venda.
+    """
+    selecoes = parse_selections(selecoes)
+    markup = config.MARKUP_PADRAO if markup is None else markup
+    comissao_vendedor = config.COMISSAO_VENDEDOR_PADRAO if comissao_vendedor is None else comissao_vendedor
+    comissao_promotor = config.COMISSAO_PROMOTOR_PADRAO if comissao_promotor is None else comissao_promotor
+    quantity = int(quantity)
+    produto = str(selecoes.get("sel_produto") or "")
+
+    estrategia = selecoes.get("sel_estrategia_preco")
+    if estrategia not in pricing.ESTRATEGIAS:
+        estrategia = config.PRECO_ESTRATEGIA_PADRAO
+    price_book = tables.price_book.with_strategy(estrategia)
+    direct_purchases = ds.apply_price_strategy(tables.direct_purchases, estrategia)
+    df_paper = tables.df_paper
+
+    lines, erros, avisos = [], [], []
+
+    def add_cost_lines(result, label):
+        if result and not result.get("error"):
+            lines.extend(line for line in result.get("lines", []) if line.unit_cost > 0)
+        elif result and result.get("error"):
+            erros.append(f"{label}: {result['error']}")
+
+    if quantity <= 0:
+        erros.append("Quantidade: deve ser maior que zero.")
+    elif not produto:
+        erros.append("Produto: 'sel_produto' não informado.")
+    else:
+        # --- Capa ---
+        cover_cost_result = None
+        impression_type = ""
+        paper_cover = selecoes.get("sel_capa_papel") or ""
+        if "COURO SINTÉTICO" in produto:
+            leather = selecoes.get("sel_capa_couro")
+            if leather:
+                cover_cost_result = calc.calculate_synthetic_leather_cover_cost(produto, leather, quantity, direct_purchases)
+        else:
+            impression_type = selecoes.get("sel_capa_impressao") or ""
+            if paper_cover and impression_type:
+                product_base = produto.replace(" - POLICROMIA", "")
+                if "Offset" in impression_type:
+                    impression_url = config.CSV_MAP_IMPRESSAO.get(product_base)
+                    if impression_url:
+                        cover_cost_result = calc.calculate_offset_cover_cost(
+                            product_base, quantity, paper_cover, df_paper,
+                            tables.impression_steps[impression_url], price_book=price_book
+                        )
+                elif "Digital" in impression_type:
+                    cover_cost_result = calc.calculate_digital_cover_cost(
+                        produto, paper_cover, impression_type, quantity, df_paper,
+                        paper_yield=tables.paper_yield_index.get((paper_cover, calc.base_product_name(produto))),
+                        price_book=price_book
+                    )
+        add_cost_lines(cover_cost_result, "Capa")
+
+        # --- Acabamentos ---
+        hot_stamping = selecoes.get("selected_hot_stamping", "Nenhum")
+        if hot_stamping != "Nenhum":
+            add_cost_lines(calc.calculate_hot_stamping_cost(hot_stamping, quantity), "Hot Stamping")
+        laminacao = selecoes.get("selected_laminacao", "Nenhum")
+        if laminacao != "Nenhum" and impression_type and cover_cost_result and not cover_cost_result.get("error"):
+            add_cost_lines(calc.calculate_cover_lamination_cost(
+                cover_cost_result, impression_type, paper_cover, quantity, df_paper,
+                product_name=produto, paper_spec=tables.paper_index.get(paper_cover)
+            ), "Laminação")
+        silk = selecoes.get("selected_silk", "Nenhum")
+        if silk != "Nenhum":
+            add_cost_lines(calc.calculate_silk_cost(silk, quantity), "Silk")
+
+        # --- Componentes ---
+        componentes = list(COMPONENTES)
+        guarda_frente = str(selecoes.get(f"sel_{COMPONENTES[0][0].lower()}", "Nenhum"))
+        if "guarda" in guarda_frente.lower():
+            componentes.append(GUARDA_VERSO)
+        for title, item_col in componentes:
+            key = title.lower()
+            selection = selecoes.get(f"sel_{key}", "Nenhum")
+            comp_cost_result = None
+            if selection == "Personalizado":
+                total_material = _number(selecoes.get(f"mat_cost_{key}"), 0.0)
+                total_service = _number(selecoes.get(f"serv_cost_{key}"), 0.0)
+                if total_material > 0 or total_service > 0:
+                    comp_cost_result = calc.calculate_custom_component_cost(
+                        total_material_cost=total_material, total_service_cost=total_service,
+                        budget_quantity=quantity, material_name=selecoes.get(f"paper_{key}", "Material Personalizado")
+                    )
+            elif selection != "Nenhum":
+                comp_cost_result = calc.calculate_component_cost(
+                    selection, tables.component_tables[item_col], df_paper, quantity, item_col, price_book=price_book
+                )
+            add_cost_lines(comp_cost_result, selection)
+
+        # --- Compras diretas (aviamentos) ---
+        for category, items in sorted(direct_purchases.items()):
+            if category == "COURO":
+                continue
+            selected_item = selecoes.get(f"cd_{category}", "Nenhum")
+            if selected_item == "Personalizado":
+                util = _number(selecoes.get(f"util_cd_{category}"), 1.0)
+            elif category == "WIRE-O":
+                util = _number(selecoes.get(f"rings_{selected_item}"), ANEIS_WIREO_PADRAO)
+            else:
+                util = _number(selecoes.get(f"util_{selected_item}"), 1.0)
+            cost_info = calc.calculate_direct_purchase_cost(
+                category, selected_item, items, quantity, util=util, wireo_map=tables.wireo_map,
+                custom_unit_price=_number(selecoes.get(f"vu_{category}"), 1.0)
+            )
+            if cost_info["line"] is not None:
+                lines.append(cost_info["line"])
+
+        # --- MOD + GGF ---
+        if not tables.df_mod_ggf.empty:
+            produto_padronizado = re.sub(r'\s+', ' ', produto.strip().upper())
+            try:
+                mod_ggf_cost = tables.df_mod_ggf.loc[produto_padronizado]['MOD+GGF']
+                lines.append(calc.CostLine("MOD + GGF", calc.CATEGORIA_MOD_GGF, mod_ggf_cost, quantity, "un", "Custo combinado"))
+            except KeyError:
+                avisos.append(f"Produto '{produto}' não encontrado na tabela de custos MOD/GGF.")
+
+    # --- Resumo financeiro ---
+    custo_componentes = float(sum(line.unit_cost for line in lines))
+    total_ajustes = float(sum(_number(a.get("valor"), 0.0) for a in ajustes or ()))
+    custo_ajustado = custo_componentes + total_ajustes
+    comissao_pct = comissao_vendedor + comissao_promotor
+    preco = calc.calculate_sale_price(custo_ajustado, markup, comissao_pct)
+    if preco["error"]:
+        erros.append(f"Comissões: {preco['error']}")
+
+    return Quote(
+        produto, quantity, estrategia, tuple(lines), tuple(erros), tuple(avisos),
+        custo_componentes, total_ajustes, custo_ajustado, float(markup), float(comissao_pct), float(preco["preco_venda"])
+    )
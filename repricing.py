@@ -0,0 +1,347 @@
+# orcamento_pro/repricing.py
+"""
+Reprecificação dos orçamentos em aberto quando os preços de referência mudam.
+
+Refaz cada orçamento com status em config.REPRECIFICACAO_STATUS a partir do
+SelecoesJSON, Quantidade, Markup, ComissaoPct e AjustesJSON salvos, com as
+tabelas de referência atuais (quoting.quote_selections, as mesmas fórmulas
+da tela). Os orçamentos são divididos entre processos, como no lote
+(batch.py).
+
+Para dizer quais componentes mudaram, o orçamento também é refeito com os
+preços como estavam na data dele (só as compras com NF até a data). A
+diferença entre as duas cotações, linha a linha, dá os componentes que
+subiram ou baixaram. Se a cotação na data não bate com o CustoBase salvo,
+a diferença não vem só de preço (cadastro, tabela de impressão, MOD/GGF).
+
+    ORCAMENTO_DADOS_LOCAIS=. python -m repricing --relatorio reprecificacao.csv [--salvar]
+
+Com --salvar, os orçamentos cujo custo mudou por preço de compra (cotação
+na data x cotação de hoje) ganham uma nova versão (a anterior vai para
+VersoesJSON, como na edição pela tela), gravadas de uma vez só. Mudanças
+fora de preço (cadastro, fórmulas) só aparecem no relatório, a menos que
+se peça --incluir-fora-de-preco. Orçamentos com componente que não pôde
+ser cotado nunca são gravados.
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+import config
+import data_services as ds
+import quoting
+import storage
+
+@dataclass(frozen=True, slots=True)
+class ComponentChange:
+    """Custo unitário de um componente na data do orçamento e hoje."""
+    componente: str
+    custo_antes: float
+    custo_depois: float
+
+    @property
+    def variacao_pct(self) -> float | None:
+        if not self.custo_antes:
+            return None
+        return (self.custo_depois / self.custo_antes - 1) * 100
+
+    def __str__(self) -> str:
+        var = "novo" if self.variacao_pct is None else f"{self.variacao_pct:+.1f}%"
+        return f"{self.componente}: {self.custo_antes:.4f} -> {self.custo_depois:.4f} ({var})"
+
+@dataclass(frozen=True, slots=True)
+class RepriceResult:
+    """Orçamento salvo x o mesmo orçamento com os preços de hoje."""
+    id: str
+    cliente: str
+    produto: str
+    quantidade: int
+    status: str
+    custo_base_antigo: float
+    preco_venda_antigo: float
+    custo_base_novo: float | None
+    preco_venda_novo: float | None
+    custo_na_data: float | None      # cotação refeita com as compras até a data do orçamento
+    componentes: tuple               # ComponentChange dos componentes que mudaram
+    erros: tuple
+
+    @staticmethod
+    def _pct(antes, depois):
+        if depois is None or not antes:
+            return None
+        return (depois / antes - 1) * 100
+
+    @property
+    def variacao_custo_pct(self) -> float | None:
+        return self._pct(self.custo_base_antigo, self.custo_base_novo)
+
+    @property
+    def variacao_preco_pct(self) -> float | None:
+        return self._pct(self.preco_venda_antigo, self.preco_venda_novo)
+
+    @property
+    def variacao_fora_preco_pct(self) -> float | None:
+        """Salvo x refeito na data do orçamento: o que mudou sem ser preço de compra."""
+        return self._pct(self.custo_base_antigo, self.custo_na_data)
+
+    @property
+    def variacao_por_preco_pct(self) -> float | None:
+        """Refeito na data do orçamento x refeito hoje: só o efeito dos preços de compra."""
+        return self._pct(self.custo_na_data, self.custo_base_novo)
+
+    @staticmethod
+    def _acima_tolerancia(var) -> bool:
+        return var is not None and abs(var) >= config.REPRECIFICACAO_TOLERANCIA_PCT
+
+    @property
+    def alterado(self) -> bool:
+        """
+        Se há nova versão a gravar: cotou sem erros e os preços de compra moveram o
+        custo além da tolerância (sem data no orçamento não dá para separar: False).
+        """
+        return not self.erros and self._acima_tolerancia(self.variacao_por_preco_pct)
+
+    def nova_versao(self, incluir_fora_preco: bool = False) -> bool:
+        """
+        Se o orçamento deve ganhar nova versão. Com incluir_fora_preco, também
+        quando só o cadastro ou as fórmulas mudaram o custo (salvo x hoje).
+        """
+        if incluir_fora_preco:
+            return self.alterado or (not self.erros and self._acima_tolerancia(self.variacao_custo_pct))
+        return self.alterado
+
+# ================== TABELAS NA DATA DO ORÇAMENTO ==================
+def tables_as_of(tables: quoting.ReferenceTables, df_direct: pd.DataFrame, data: pd.Timestamp) -> quoting.ReferenceTables:
+    """As mesmas tabelas, com os preços calculados só sobre as compras com NF até a data."""
+    df_paper = tables.df_paper[(tables.df_paper['DataEmissaoNF'] <= data) | tables.df_paper['DataEmissaoNF'].isna()]
+    direct = df_direct[df_direct['DATA_EMISSAO_NF'] <= data]
+    return dataclasses.replace(
+        tables,
+        df_paper=df_paper,
+        price_book=ds.build_paper_price_book(df_paper),
+        direct_purchases=ds.build_direct_purchases(ds.build_direct_purchases_price_table(direct)),
+    )
+
+def _line_costs(quote: quoting.Quote) -> dict:
+    custos = {}
+    for line in quote.lines:
+        custos[line.component] = custos.get(line.component, 0.0) + float(line.unit_cost)
+    return custos
+
+def changed_components(antes: quoting.Quote, depois: quoting.Quote) -> tuple:
+    """Componentes cujo custo unitário mudou além da tolerância (ou que entraram/saíram)."""
+    custos_antes, custos_depois = _line_costs(antes), _line_costs(depois)
+    mudancas = []
+    for componente in dict.fromkeys([*custos_antes, *custos_depois]):
+        a, d = custos_antes.get(componente, 0.0), custos_depois.get(componente, 0.0)
+        if a == d:
+            continue
+        if not a or abs(d / a - 1) * 100 >= config.REPRECIFICACAO_TOLERANCIA_PCT:
+            mudancas.append(ComponentChange(componente, a, d))
+    return tuple(sorted(mudancas, key=lambda c: -abs(c.custo_depois - c.custo_antes)))
+
+# ================== REPRECIFICAÇÃO ==================
+def _json_field(value, default):
+    if not isinstance(value, str) or not value.strip():
+        return default
+    return json.loads(value)
+
+def reprice_budget(row: dict, tables: quoting.ReferenceTables, tables_antes: quoting.ReferenceTables = None) -> RepriceResult:
+    """Refaz um orçamento (linha de orcamentos_novo.csv como dict) com as tabelas atuais."""
+    base = dict(
+        id=row["ID"], cliente=str(row.get("Cliente", "")), produto=str(row.get("Produto", "")),
+        quantidade=row.get("Quantidade"), status=row.get("StatusOrcamento", ""),
+        custo_base_antigo=float(row["CustoBase"]), preco_venda_antigo=float(row["PrecoVenda"]),
+    )
+    try:
+        selecoes = dict(_json_field(row.get("SelecoesJSON"), {}))
+        selecoes.setdefault("sel_produto", row.get("Produto"))
+        args = quoting.parse_quote_spec({
+            "selecoes": selecoes, "quantidade": row.get("Quantidade"), "markup": row.get("Markup"),
+            # ComissaoPct já é a soma vendedor + promotor
+            "comissao_vendedor": row.get("ComissaoPct"), "comissao_promotor": 0.0,
+            "ajustes": _json_field(row.get("AjustesJSON"), []),
+        })
+        novo = quoting.quote_selections(tables=tables, **args)
+        antes = quoting.quote_selections(tables=tables_antes, **args) if tables_antes is not None else None
+    except Exception as e:  # um orçamento ruim não interrompe a reprecificação
+        return RepriceResult(**base, custo_base_novo=None, preco_venda_novo=None, custo_na_data=None,
+                             componentes=(), erros=(f"{type(e).__name__}: {e}",))
+    return RepriceResult(
+        **base,
+        custo_base_novo=novo.custo_componentes,
+        preco_venda_novo=novo.preco_venda,
+        custo_na_data=antes.custo_componentes if antes is not None else None,
+        componentes=changed_components(antes, novo) if antes is not None else (),
+        erros=novo.erros,
+    )
+
+_tables = None
+_df_direct = None
+
+def _init_worker():
+    """Carrega as tabelas de referência uma vez por processo."""
+    global _tables, _df_direct
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    _tables = quoting.load_reference_tables()
+    _df_direct = ds.load_direct_purchases_frame()
+
+@lru_cache(maxsize=64)
+def _tables_at(data: pd.Timestamp) -> quoting.ReferenceTables:
+    # Muitos orçamentos são do mesmo dia: cada data é montada uma vez por processo
+    return tables_as_of(_tables, _df_direct, data)
+
+def _reprice_block(rows: list) -> list:
+    results = []
+    for row in rows:
+        data = pd.to_datetime(row.get("Data"), format="%d/%m/%Y", errors="coerce")
+        results.append(reprice_budget(row, _tables, None if pd.isna(data) else _tables_at(data)))
+    return results
+
+def open_budgets(df_orcamentos: pd.DataFrame, status=None) -> list:
+    """Orçamentos em aberto (status em config.REPRECIFICACAO_STATUS), como dicts."""
+    status = status or config.REPRECIFICACAO_STATUS
+    return df_orcamentos[df_orcamentos["StatusOrcamento"].isin(status)].to_dict("records")
+
+def reprice_budgets(rows: list, workers: int = None) -> list:
+    """
+    Reprecifica os orçamentos em paralelo.
+
+    Args:
+        rows (list): Orçamentos (dicts com as colunas de orcamentos_novo.csv), ex: open_budgets(df).
+        workers (int): Processos (padrão: config.LOTE_WORKERS; 1 = no próprio processo).
+
+    Returns:
+        list: RepriceResult de cada orçamento, na ordem de rows.
+    """
+    workers = min(workers or config.LOTE_WORKERS, max(len(rows), 1))
+    block_size = config.LOTE_TAMANHO_BLOCO
+    if workers <= 1:
+        _init_worker()
+        return _reprice_block(rows)
+    # Blocos menores que no lote: poucos orçamentos devem se espalhar por todos os processos
+    block_size = max(1, min(block_size, -(-len(rows) // workers)))
+    blocks = [rows[i:i + block_size] for i in range(0, len(rows), block_size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        return [r for block in pool.map(_reprice_block, blocks) for r in block]
+
+# ================== RELATÓRIO E GRAVAÇÃO ==================
+def results_to_frame(results, incluir_fora_preco: bool = False) -> pd.DataFrame:
+    """Relatório de diferenças: um orçamento por linha (ver RepriceResult.nova_versao)."""
+    return pd.DataFrame({
+        "ID": [r.id for r in results],
+        "Cliente": [r.cliente for r in results],
+        "Produto": [r.produto for r in results],
+        "Quantidade": [r.quantidade for r in results],
+        "Status": [r.status for r in results],
+        "CustoBase salvo": [r.custo_base_antigo for r in results],
+        "CustoBase na data": [r.custo_na_data for r in results],
+        "CustoBase atual": [r.custo_base_novo for r in results],
+        "Variação custo (%)": [r.variacao_custo_pct for r in results],
+        "Variação por preço (%)": [r.variacao_por_preco_pct for r in results],
+        "Variação fora de preço (%)": [r.variacao_fora_preco_pct for r in results],
+        "PrecoVenda salvo": [r.preco_venda_antigo for r in results],
+        "PrecoVenda atual": [r.preco_venda_novo for r in results],
+        "Variação preço (%)": [r.variacao_preco_pct for r in results],
+        "Nova versão": [r.nova_versao(incluir_fora_preco) for r in results],
+        "Componentes alterados": ["; ".join(str(c) for c in r.componentes) for r in results],
+        "Erros": ["; ".join(r.erros) for r in results],
+    })
+
+def apply_new_versions(df_orcamentos: pd.DataFrame, results, incluir_fora_preco: bool = False) -> tuple[pd.DataFrame, list]:
+    """
+    Grava, em uma cópia do DataFrame de orçamentos, uma nova versão de cada
+    orçamento alterado (RepriceResult.nova_versao). A versão anterior vai
+    para VersoesJSON, como na edição pela tela. Orçamentos editados depois
+    da leitura (CustoBase ou PrecoVenda diferentes do que foi reprecificado)
+    são pulados.
+
+    Returns:
+        tuple: (novo DataFrame, IDs atualizados).
+    """
+    df = df_orcamentos.copy()
+    agora = datetime.now()
+    atualizados = []
+    for r in results:
+        if not r.nova_versao(incluir_fora_preco):
+            continue
+        idx = df.index[df["ID"] == r.id]
+        if len(idx) != 1:
+            continue
+        idx = idx[0]
+        if float(df.at[idx, "CustoBase"]) != r.custo_base_antigo or float(df.at[idx, "PrecoVenda"]) != r.preco_venda_antigo:
+            continue
+        try:
+            versoes = json.loads(df.at[idx, "VersoesJSON"])
+        except Exception:
+            versoes = []
+        versoes.append({"timestamp": agora.strftime("%Y-%m-%d %H:%M:%S"), "data": df.loc[idx].to_dict()})
+        df.at[idx, "VersoesJSON"] = json.dumps(versoes)
+        df.at[idx, "VersoesOrcamento"] = len(versoes)
+        df.at[idx, "CustoBase"] = round(r.custo_base_novo, 4)
+        df.at[idx, "PrecoVenda"] = round(r.preco_venda_novo, 2)
+        df.at[idx, "Data"] = agora.strftime("%d/%m/%Y")
+        atualizados.append(r.id)
+    return df, atualizados
+
+def save_budgets(df: pd.DataFrame, file_path: str):
+    """Grava o arquivo de orçamentos uma vez e, com token configurado, envia ao GitHub."""
+    storage.save_csv(df, file_path)
+    token = storage.get_github_token()
+    if token:
+        storage.save_orcamentos_to_github(df, token)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m repricing", description="Reprecifica os orçamentos em aberto.")
+    parser.add_argument("--arquivo", default=config.ORCAMENTOS_FILE, help="Arquivo de orçamentos")
+    parser.add_argument("--status", nargs="+", default=list(config.REPRECIFICACAO_STATUS), help="Status a reprecificar")
+    parser.add_argument("--relatorio", help="Grava o relatório de diferenças (.csv)")
+    parser.add_argument("--salvar", action="store_true", help="Grava nova versão dos orçamentos alterados")
+    parser.add_argument("--incluir-fora-de-preco", action="store_true",
+                        help="Considera alterados também os orçamentos que mudaram só por cadastro ou fórmulas")
+    parser.add_argument("--workers", type=int, default=None, help=f"Processos (padrão: {config.LOTE_WORKERS})")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = storage.load_csv(args.arquivo, config.COLUNAS_ORCAMENTOS)
+    results = reprice_budgets(open_budgets(df, args.status), workers=args.workers)
+    report = results_to_frame(results, args.incluir_fora_de_preco)
+    if args.relatorio:
+        report.to_csv(args.relatorio, index=False)
+
+    alterados = [r for r in results if r.nova_versao(args.incluir_fora_de_preco)]
+    fora_preco = [r for r in results if not r.erros and r._acima_tolerancia(r.variacao_fora_preco_pct)]
+    com_erro = [r for r in results if r.erros]
+    with pd.option_context("display.width", 200, "display.max_colwidth", 80):
+        print(report.loc[report["Nova versão"], ["ID", "Produto", "CustoBase salvo", "CustoBase atual", "PrecoVenda salvo",
+                                                 "PrecoVenda atual", "Variação custo (%)", "Variação por preço (%)"]].to_string(index=False))
+    print(f"{len(results)} orçamentos em {time.perf_counter() - start:.1f} s: "
+          f"{len(alterados)} com nova versão, {len(fora_preco)} com variação fora de preço, {len(com_erro)} com erro")
+    if fora_preco and not args.incluir_fora_de_preco:
+        print("Variações fora de preço (cadastro, fórmulas) não geram nova versão: ver o relatório "
+              "ou usar --incluir-fora-de-preco.")
+    for r in com_erro:
+        print(f"{r.id}: {'; '.join(r.erros)}", file=sys.stderr)
+
+    if args.salvar and alterados:
+        # Relê o arquivo logo antes de gravar: só a janela entre leitura e gravação fica exposta
+        atual = storage.load_csv(args.arquivo, config.COLUNAS_ORCAMENTOS)
+        novo_df, atualizados = apply_new_versions(atual, alterados, args.incluir_fora_de_preco)
+        if atualizados:
+            save_budgets(novo_df, args.arquivo)
+        print(f"{len(atualizados)} orçamentos gravados com nova versão.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# orcamento_pro/risk.py
+"""
+Risco de preço de compra do orçamento (Monte Carlo).
+
+Cada linha de custo com price_key tem custo proporcional ao preço de compra
+do item: unit_cost = preço x consumo. A simulação sorteia, para cada item,
+um preço entre as suas compras mais recentes (bootstrap do histórico) e
+reprecifica o orçamento inteiro de uma vez, como um produto de matrizes
+(simulações x itens) @ (consumo por item). Linhas sem histórico (serviços,
+MOD+GGF, personalizados) entram como custo fixo.
+
+O markup sugerido é o que mantém, no percentil de custo escolhido
+(config.RISCO_PERCENTIL, P90), a mesma margem que o markup atual dá sobre o
+custo cotado. Nunca fica abaixo do markup atual.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import config
+
+@dataclass(frozen=True, slots=True)
+class RiskItem:
+    """Um item de compra exposto na cotação."""
+    fonte: str
+    item: object
+    preco_cotado: float
+    consumo: float               # unidades de compra por unidade do orçamento
+    historico: np.ndarray        # preços das compras mais recentes (mais recente primeiro)
+
+    @property
+    def nome(self) -> str:
+        return self.item[1] if isinstance(self.item, tuple) else str(self.item)
+
+    @property
+    def custo_cotado(self) -> float:
+        return self.preco_cotado * self.consumo
+
+@dataclass(frozen=True, slots=True)
+class RiskReport:
+    """Distribuição do custo unitário simulado (R$/un) e os itens que a movem."""
+    custo_cotado: float
+    media: float
+    p50: float
+    p_risco: float               # custo no percentil de risco (P90 por padrão)
+    percentil: int
+    simulacoes: int
+    itens: tuple
+    sem_historico: tuple         # componentes com preço de compra, mas sem histórico
+
+    def markup_sugerido(self, markup: float) -> float:
+        """Markup que preserva no percentil de risco a margem do markup atual sobre o custo cotado."""
+        if self.custo_cotado <= 0:
+            return markup
+        return markup * max(self.p_risco / self.custo_cotado, 1.0)
+
+def build_price_history(df: pd.DataFrame, key, price_col: str, date_col: str, janela: int = None) -> dict:
+    """
+    Preços das compras mais recentes de cada item, como arrays (mais recente primeiro).
+
+    Args:
+        key: Coluna (ou lista de colunas) que identifica o item, como em pricing.build_price_table.
+    """
+    janela = janela or config.RISCO_JANELA_COMPRAS
+    keys = [key] if isinstance(key, str) else list(key)
+    d = df[keys + [price_col, date_col]].dropna(subset=[price_col])
+    d = d.sort_values(date_col, ascending=False, kind="stable")
+    d = d[d.groupby(keys, sort=False, observed=True).cumcount() < janela]
+    grupos = d.groupby(keys if len(keys) > 1 else keys[0], sort=False, observed=True)[price_col]
+    return {item: serie.to_numpy(dtype=float) for item, serie in grupos}
+
+def simulate_quote(lines, histories: dict, fixed_extra: float = 0.0, n: int = None, seed: int = None,
+                   percentil: int = None) -> RiskReport:
+    """
+    Reprecifica o orçamento n vezes sorteando os preços de compra do histórico.
+
+    Args:
+        lines: Linhas de custo (calc.CostLine) do orçamento.
+        histories (dict): fonte -> {item: array de preços} (ver build_price_history).
+        fixed_extra (float): Valor somado a todas as simulações (ex: ajustes manuais).
+        n (int): Nº de simulações (padrão: config.RISCO_SIMULACOES).
+        seed (int): Semente do sorteio (padrão: config.RISCO_SEMENTE).
+        percentil (int): Percentil de risco (padrão: config.RISCO_PERCENTIL).
+
+    Returns:
+        RiskReport: Custo unitário cotado, média, P50 e percentil de risco.
+    """
+    n = n or config.RISCO_SIMULACOES
+    seed = config.RISCO_SEMENTE if seed is None else seed
+    percentil = percentil or config.RISCO_PERCENTIL
+
+    fixo = float(fixed_extra)
+    consumo, precos, sem_historico = {}, {}, []
+    for line in lines:
+        hist = histories.get(line.price_key[0], {}).get(line.price_key[1]) if line.price_key else None
+        if hist is None or not len(hist) or not line.purchase_price:
+            fixo += line.unit_cost
+            if line.price_key:
+                sem_historico.append(line.component)
+            continue
+        # Mesmo item em várias linhas: os consumos se somam e o sorteio é um só
+        consumo[line.price_key] = consumo.get(line.price_key, 0.0) + line.unit_cost / line.purchase_price
+        precos.setdefault(line.price_key, line.purchase_price)
+
+    keys = list(consumo)
+    itens = tuple(
+        RiskItem(k[0], k[1], precos[k], consumo[k], histories[k[0]][k[1]]) for k in keys
+    )
+    custo_cotado = fixo + sum(i.custo_cotado for i in itens)
+    if not itens:
+        return RiskReport(custo_cotado, custo_cotado, custo_cotado, custo_cotado, percentil, 0, (), tuple(sem_historico))
+
+    # Históricos em uma matriz (itens x compras), sorteio por índice uniforme em cada linha
+    tamanhos = np.array([len(i.historico) for i in itens])
+    matriz = np.zeros((len(itens), tamanhos.max()))
+    for k, item in enumerate(itens):
+        matriz[k, :tamanhos[k]] = item.historico
+    rng = np.random.default_rng(seed)
+    idx = (rng.random((n, len(itens))) * tamanhos).astype(np.int64)
+    sorteados = matriz[np.arange(len(itens)), idx]                      # (n, itens)
+    custos = fixo + sorteados @ np.array([i.consumo for i in itens])     # (n,)
+
+    p50, p_risco = np.percentile(custos, [50, percentil])
+    return RiskReport(custo_cotado, float(custos.mean()), float(p50), float(p_risco), percentil, n, itens, tuple(sem_historico))
+
+def items_to_frame(report: RiskReport) -> pd.DataFrame:
+    """Itens expostos, com a faixa de preço do histórico, para exibição."""
+    return pd.DataFrame({
+        "Item": [i.nome for i in report.itens],
+        "Preço cotado (R$)": [i.preco_cotado for i in report.itens],
+        "Mín. histórico (R$)": [float(i.historico.min()) for i in report.itens],
+        "Máx. histórico (R$)": [float(i.historico.max()) for i in report.itens],
+        "Compras": [len(i.historico) for i in report.itens],
+        "Custo cotado (R$/un)": [i.custo_cotado for i in report.itens],
+    })
@@ -0,0 +1,145 @@
+# orcamento_pro/service.py
+"""
+Serviço HTTP de cotação para sistemas externos (ERP, site, planilhas).
+
+Recebe as seleções no mesmo formato do SelecoesJSON salvo nos orçamentos e
+devolve o detalhamento de custos e o preço de venda calculados por
+quoting.quote_selections, com as mesmas fórmulas e o mesmo markup/comissões
+do "Resumo Financeiro" da tela.
+
+As tabelas de referência são carregadas uma vez na subida do serviço e ficam
+em memória; cada cotação roda em um pool de threads
+(config.SERVICO_WORKERS), sem bloquear o laço de eventos. Para usar mais
+núcleos, suba mais processos (uvicorn --workers).
+
+    ORCAMENTO_DADOS_LOCAIS=. uvicorn service:app --port 8600 --workers 2
+
+Rotas:
+    POST /cotacao     {"selecoes": {...} | "<SelecoesJSON>", "quantidade": 15000,
+                       "markup": 2.0, "comissao_vendedor": 1.5, "comissao_promotor": 1.7,
+                       "ajustes": [{"descricao": "...", "valor": 0.10}]}
+    POST /recarregar  Relê as tabelas de referência (ex: depois de novas compras).
+    GET  /saude       Estado do serviço e idade das tabelas.
+
+Se ORCAMENTO_API_TOKEN estiver definido, as rotas POST exigem o cabeçalho
+"Authorization: Bearer <token>". /recarregar refaz o download de todas as
+tabelas, então só funciona com o token definido. "python -m service" escuta
+em 127.0.0.1 (ORCAMENTO_API_HOST) e se recusa a escutar em outra interface
+sem token.
+"""
+import asyncio
+import contextlib
+import hmac
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import config
+import quoting
+
+# Os loaders usam st.cache_*; fora do "streamlit run" o Streamlit só emite avisos
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+def _authorized(request: Request) -> bool:
+    if not config.SERVICO_TOKEN:
+        return True
+    header = request.headers.get("authorization", "")
+    return hmac.compare_digest(header, f"Bearer {config.SERVICO_TOKEN}")
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"erro": message}, status_code=status)
+
+async def _run(request: Request, func, *args):
+    """Executa func no pool de cálculo do serviço."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app.state.pool, func, *args)
+
+# ================== ROTAS ==================
+async def cotacao(request: Request) -> JSONResponse:
+    if not _authorized(request):
+        return _error(401, "Token inválido ou ausente.")
+    tables = request.app.state.tables
+    if tables is None:
+        return _error(503, "Tabelas de referência ainda carregando.")
+    try:
+        body = await request.json()
+    except ValueError:  # JSONDecodeError e UnicodeDecodeError (corpo que não é UTF-8)
+        return _error(400, "JSON inválido.")
+    try:
+        args = quoting.parse_quote_spec(body)
+    except quoting.QuoteSpecError as e:
+        return _error(400, str(e))
+
+    start = time.perf_counter()
+    try:
+        quote = await _run(request, lambda: quoting.quote_selections(tables=tables, **args))
+    except Exception as e:  # falha inesperada no cálculo: responde em JSON, como os outros erros
+        logging.getLogger(__name__).exception("Falha na cotação")
+        return _error(500, f"Falha no cálculo da cotação: {type(e).__name__}: {e}")
+    result = quote.to_dict()
+    result["tempo_calculo_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return JSONResponse(result)
+
+async def recarregar(request: Request) -> JSONResponse:
+    if not config.SERVICO_TOKEN:
+        return _error(403, "Recarga desativada: defina ORCAMENTO_API_TOKEN no serviço.")
+    if not _authorized(request):
+        return _error(401, "Token inválido ou ausente.")
+    start = time.perf_counter()
+    # As cotações em andamento terminam com as tabelas antigas; as novas entram de uma vez
+    request.app.state.tables = await _run(request, _reload_tables)
+    return JSONResponse({"recarregado_em_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+async def saude(request: Request) -> JSONResponse:
+    tables = request.app.state.tables
+    if tables is None:
+        return JSONResponse({"status": "carregando"}, status_code=503)
+    return JSONResponse({"status": "ok", "tabelas_idade_s": round(time.time() - tables.carregado_em, 1)})
+
+def _reload_tables() -> quoting.ReferenceTables:
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    return quoting.load_reference_tables()
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    app.state.tables = None
+    app.state.pool = ThreadPoolExecutor(max_workers=config.SERVICO_WORKERS, thread_name_prefix="cotacao")
+    # Aquece as tabelas antes de aceitar conexões: a primeira cotação já encontra tudo em memória
+    app.state.tables = await asyncio.get_running_loop().run_in_executor(app.state.pool, quoting.load_reference_tables)
+    try:
+        yield
+    finally:
+        app.state.pool.shutdown(wait=False, cancel_futures=True)
+
+app = Starlette(
+    routes=[
+        Route("/cotacao", cotacao, methods=["POST"]),
+        Route("/recarregar", recarregar, methods=["POST"]),
+        Route("/saude", saude, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+def _is_loopback(host: str) -> bool:
+    import ipaddress
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+if __name__ == "__main__":
+    import sys
+    import uvicorn
+    if not config.SERVICO_TOKEN and not _is_loopback(config.SERVICO_HOST):
+        print(f"Recusando escutar em {config.SERVICO_HOST} sem ORCAMENTO_API_TOKEN definido.", file=sys.stderr)
+        sys.exit(2)
+    uvicorn.run("service:app", host=config.SERVICO_HOST, port=config.SERVICO_PORTA)
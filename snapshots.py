@@ -0,0 +1,223 @@
+# orcamento_pro/snapshots.py
+"""
+Snapshots colunares (Arrow IPC) das tabelas de referência já limpas e tipadas.
+
+Cada tabela é identificada pelo hash do conteúdo da fonte (CSV) junto com o
+nome/versão do parser. Se existir um snapshot para esse hash, ele é aberto via
+memory-map (as páginas ficam no cache do sistema e são compartilhadas entre os
+processos); caso contrário o CSV é processado normalmente e o snapshot é
+regravado. Sem pyarrow, tudo cai no caminho do CSV.
+
+Ao lado de cada snapshot fica a versão da fonte que o gerou (tamanho e mtime
+do arquivo local, ou ETag/Last-Modified da URL): enquanto ela não mudar, o
+snapshot é aberto sem reler nem recalcular o hash do CSV (a URL só responde
+304). Os DataFrames lidos do snapshot apontam para o arquivo mapeado: quem os
+guarda em cache deve compartilhá-los (st.cache_resource), não copiá-los.
+
+Build manual de todos os snapshots: python -m snapshots
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import time
+
+import pandas as pd
+import requests
+
+import config
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional: sem ele os loaders leem o CSV
+    pa = None
+
+# Incrementar quando a limpeza de qualquer tabela mudar de forma incompatível
+SNAPSHOT_FORMAT_VERSION = "4"
+
+# ================== FONTES ==================
+def resolve_source(url: str) -> str:
+    """
+    Retorna o caminho local equivalente à URL quando ORCAMENTO_DADOS_LOCAIS
+    estiver definido (e o arquivo existir); senão, a própria URL.
+    """
+    if os.path.exists(url):
+        return url
+    if config.DADOS_REFERENCIA_LOCAL:
+        file_name = os.path.basename(url)
+        file_name = config.ARQUIVOS_LOCAIS_ALIAS.get(file_name, file_name)
+        local_path = os.path.join(config.DADOS_REFERENCIA_LOCAL, file_name)
+        if os.path.exists(local_path):
+            return local_path
+    return url
+
+def fetch_source(url: str) -> bytes:
+    """Lê o conteúdo bruto de uma fonte (arquivo local ou URL)."""
+    return fetch_if_changed(url)[0]
+
+def fetch_if_changed(url: str, version: str = "") -> tuple:
+    """
+    Lê a fonte só se ela mudou desde a versão informada.
+
+    Args:
+        url (str): Fonte (arquivo local ou URL).
+        version (str): Versão já conhecida, como devolvida por uma chamada anterior.
+
+    Returns:
+        tuple: (conteúdo, ou None se a versão não mudou; versão atual, "" se a
+        fonte não informa nenhuma).
+    """
+    source = resolve_source(url)
+    if os.path.exists(source):
+        stat = os.stat(source)
+        current = f"arquivo:{stat.st_size}:{stat.st_mtime_ns}"
+        if version == current:
+            return None, current
+        with open(source, "rb") as f:
+            return f.read(), current
+    headers = {}
+    if version.startswith("etag:"):
+        headers["If-None-Match"] = version[len("etag:"):]
+    elif version.startswith("data:"):
+        headers["If-Modified-Since"] = version[len("data:"):]
+    resp = requests.get(source, headers=headers, timeout=30)
+    if resp.status_code == 304:
+        return None, version
+    resp.raise_for_status()
+    etag, modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    return resp.content, f"etag:{etag}" if etag else f"data:{modified}" if modified else ""
+
+def read_csv_bytes(raw: bytes, **kwargs) -> pd.DataFrame:
+    """pd.read_csv sobre o conteúdo já baixado."""
+    return pd.read_csv(io.BytesIO(raw), encoding=kwargs.pop("encoding", "utf-8"), **kwargs)
+
+# ================== SNAPSHOTS ==================
+def _digest(name: str, raw: bytes, variant: str = "") -> str:
+    h = hashlib.sha256()
+    h.update(f"{name}|{SNAPSHOT_FORMAT_VERSION}|{variant}|".encode("utf-8"))
+    h.update(raw)
+    return h.hexdigest()[:16]
+
+def _snapshot_path(name: str, digest: str) -> str:
+    return os.path.join(config.SNAPSHOT_DIR, f"{name}-{digest}.arrow")
+
+def _source_path(name: str) -> str:
+    return os.path.join(config.SNAPSHOT_DIR, f"{name}.fonte.json")
+
+def _read_source_info(name: str) -> dict:
+    """Versão da fonte e snapshot gerado a partir dela ({} se não houver ou estiver ilegível)."""
+    try:
+        with open(_source_path(name), encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return info if isinstance(info, dict) else {}
+
+def _write_source_info(name: str, info: dict):
+    tmp_path = f"{_source_path(name)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, _source_path(name))
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte colunas object com tipos mistos (ex: NF '123' e 'AV677') para texto."""
+    fixed = None
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                if fixed is None:
+                    fixed = df.copy()
+                fixed[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df if fixed is None else fixed
+
+def write_snapshot(name: str, digest: str, df: pd.DataFrame) -> str:
+    """Grava o snapshot de forma atômica e remove versões antigas da mesma tabela."""
+    os.makedirs(config.SNAPSHOT_DIR, exist_ok=True)
+    path = _snapshot_path(name, digest)
+    table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # Sem compressão: é o que permite o memory-map sem cópia
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(config.SNAPSHOT_DIR, f"{name}-*.arrow")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
+
+def read_snapshot(path: str) -> pd.DataFrame:
+    """
+    Abre o snapshot via memory-map e converte para pandas sem consolidar blocos.
+    As colunas sem cópia apontam para o arquivo: tratar o DataFrame como somente leitura.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+def load_table(name: str, url: str, parse, variant: str = "") -> pd.DataFrame:
+    """
+    Carrega uma tabela de referência limpa.
+
+    Args:
+        name (str): Nome estável da tabela (parte do nome do snapshot).
+        url (str): Fonte do CSV (URL ou caminho local).
+        parse (callable): Recebe os bytes do CSV e devolve o DataFrame limpo.
+        variant (str): Qualquer parâmetro extra que altere o resultado do parse.
+
+    Returns:
+        pd.DataFrame: A tabela limpa, vinda do snapshot quando ele estiver atualizado
+        (somente leitura, ver read_snapshot).
+    """
+    if pa is None or not config.USAR_SNAPSHOTS:
+        return parse(fetch_source(url))
+
+    # Mesma versão da fonte, parser e variante do último snapshot: abre sem reler o CSV
+    info = _read_source_info(name)
+    known = info.get("fonte", "") if info.get("chave") == f"{SNAPSHOT_FORMAT_VERSION}|{variant}" else ""
+    raw, version = fetch_if_changed(url, known)
+    if raw is None:
+        try:
+            return read_snapshot(_snapshot_path(name, info["digest"]))
+        except (OSError, KeyError, pa.ArrowInvalid):
+            raw, version = fetch_if_changed(url)  # snapshot sumiu ou corrompido: relê a fonte
+
+    digest = _digest(name, raw, variant)
+    path = _snapshot_path(name, digest)
+    df = None
+    if os.path.exists(path):
+        try:
+            df = read_snapshot(path)
+        except (OSError, pa.ArrowInvalid):
+            pass  # snapshot corrompido: refaz a partir do CSV
+
+    if df is None:
+        df = parse(raw)
+        try:
+            # Já devolve a versão mapeada: a mesma tabela (e a mesma memória) das próximas cargas
+            df = read_snapshot(write_snapshot(name, digest, df))
+        except (OSError, pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return df  # o snapshot é só um atalho; a tabela recém-processada continua válida
+    if version:
+        try:
+            _write_source_info(name, {"fonte": version, "chave": f"{SNAPSHOT_FORMAT_VERSION}|{variant}", "digest": digest})
+        except OSError:
+            pass
+    return df
+
+
+if __name__ == "__main__":
+    # Build step: processa todas as tabelas de referência e grava os snapshots
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    import data_services as ds
+
+    for label, loader in ds.reference_table_loaders().items():
+        start = time.perf_counter()
+        loader()
+        print(f"{label:<40} {(time.perf_counter() - start) * 1000:8.1f} ms")
@@ -8,8 +8,16 @@ import os
 import pandas as pd
 import streamlit as st
 from pandas.errors import EmptyDataError # <--- ADICIONE ESTA LINHA
-import requests
-import base64
+import tempfile
+import threading
+from contextlib import contextmanager
+import perf
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 def get_github_token():
     """Retorna o token do GitHub via st.secrets ou None se não configurado."""
@@ -18,6 +26,7 @@ def get_github_token():
     except Exception:
         return None
 
+@perf.timed
 def load_csv(file_path: str, columns: list) -> pd.DataFrame:
     """
     Carrega um arquivo CSV. Se não existir, cria um com as colunas especificadas.
@@ -55,6 +64,7 @@ def load_csv(file_path: str, columns: list) -> pd.DataFrame:
 
 # O restante do arquivo storage.py continua igual...
 
+@perf.timed
 def save_csv(df: pd.DataFrame, file_path: str):
     """
     Salva um DataFrame em um arquivo CSV, garantindo que o diretório exista.
@@ -69,6 +79,79 @@ def save_csv(df: pd.DataFrame, file_path: str):
     df.to_csv(file_path, index=False)
 
 
+# ================== SEQUÊNCIAS PERSISTIDAS ==================
+_SEQUENCE_THREAD_LOCK = threading.Lock()
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """
+    Trava exclusiva entre processos (e threads) baseada em um arquivo de lock.
+    O sistema operacional libera a trava automaticamente se o processo morrer.
+    """
+    with _SEQUENCE_THREAD_LOCK, open(lock_path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _write_text_atomic(file_path: str, content: str):
+    """Grava o conteúdo em um arquivo temporário e o move por cima do destino (os.replace é atômico)."""
+    data_dir = os.path.dirname(file_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=data_dir, prefix=".tmp_", suffix=os.path.basename(file_path))
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            tmp.write(content)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def reserve_sequence_number(seq_file: str, seed=None) -> int:
+    """
+    Reserva o próximo número de uma sequência persistida em disco.
+    O contador é incrementado sob trava exclusiva e gravado de forma atômica
+    antes de o número ser devolvido, então dois salvamentos simultâneos nunca
+    recebem o mesmo número. Se a sessão cair depois da reserva, o número é
+    apenas pulado (nunca reutilizado).
+
+    Args:
+        seq_file (str): Caminho do arquivo que guarda o último número emitido.
+        seed (callable, opcional): Chamado apenas quando o arquivo ainda não existe,
+            deve retornar o último número já usado (ex: maior ID do histórico).
+
+    Returns:
+        int: O número reservado.
+    """
+    data_dir = os.path.dirname(seq_file)
+    if data_dir and not os.path.exists(data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+
+    with _file_lock(seq_file + ".lock"):
+        current = None
+        if os.path.exists(seq_file):
+            try:
+                with open(seq_file) as f:
+                    current = int(f.read().strip())
+            except ValueError:
+                current = None
+        if current is None:
+            current = int(seed()) if seed else 0
+        next_number = current + 1
+        _write_text_atomic(seq_file, str(next_number))
+        return next_number
+
 def initialize_session_state_df(key: str, file_path: str, columns: list):
     """
     Inicializa um DataFrame no st.session_state se ele não existir,
@@ -82,6 +165,7 @@ def initialize_session_state_df(key: str, file_path: str, columns: list):
     if key not in st.session_state:
         st.session_state[key] = load_csv(file_path, columns)
 
+@perf.timed("github.save_csv")
 def save_csv_to_github(df, repo, path, token, branch="main", commit_message="Update CSV via Streamlit"):
     """
     Salva um DataFrame como CSV em um repositório do GitHub usando a API do GitHub.
@@ -97,6 +181,10 @@ def save_csv_to_github(df, repo, path, token, branch="main", commit_message="Upd
     Returns:
         tuple: Código de status e resposta da API do GitHub.
     """
+    # requests só é carregado na primeira gravação (não atrasa a tela de login)
+    import base64
+    import requests
+
     # Lê o conteúdo atual (para pegar o SHA)
     url = f"https://api.github.com/repos/{repo}/contents/{path}"
     headers = {"Authorization": f"token {token}"}
@@ -149,6 +237,7 @@ def save_templates_to_github(df, token, branch="main"):
     path = "data/templates.csv"
     return save_csv_to_github(df, repo, path, token, branch, commit_message="Update templates.csv via Streamlit")
 
+@perf.timed("github.delete_file")
 def delete_file_from_github(repo, path, token, branch="main", commit_message="Delete file via Streamlit"):
     """
     Exclui um arquivo de um repositório do GitHub usando a API do GitHub.
@@ -163,6 +252,8 @@ def delete_file_from_github(repo, path, token, branch="main", commit_message="De
     Returns:
         tuple: Código de status e resposta da API do GitHub.
     """
+    import requests
+
     url = f"https://api.github.com/repos/{repo}/contents/{path}"
     headers = {"Authorization": f"token {token}"}
     # Primeiro, pega o SHA do arquivo
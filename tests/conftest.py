@@ -0,0 +1,8 @@
+# orcamento_pro/tests/conftest.py
+"""Roda os testes a partir da raiz do projeto, com as tabelas de referência locais."""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault("ORCAMENTO_DADOS_LOCAIS", RAIZ)
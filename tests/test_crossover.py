@@ -0,0 +1,46 @@
+# orcamento_pro/tests/test_crossover.py
+"""Viradas de crossover.find_crossovers contra a varredura de todas as quantidades."""
+import numpy as np
+import pytest
+
+import config
+import crossover
+import data_services as ds
+import product_catalog
+
+PRODUTO = "FICHARIO A6"
+TIPOS_DIGITAIS = ("Digital 4/0", "Digital 4/1", "Digital 4/4", "Digital 1/0", "Digital 1/1")
+
+@pytest.fixture(scope="module")
+def tabelas():
+    return ds.load_impression_steps(config.CSV_MAP_IMPRESSAO[PRODUTO]), ds.load_paper_yield_index(), ds.load_paper_price_book()
+
+def _viradas_forca_bruta(steps, paper_yield, preco_folha, digital_type):
+    """Quantidades em que o método mais barato muda, avaliando q = 1..último degrau."""
+    q = np.arange(1, int(steps.laminas[-1]) + 1)
+    preco_impressao = product_catalog.get_catalog().useful_format_for(PRODUTO).preco(digital_type.replace("Digital", "").strip())
+    offset_vence = crossover.offset_totals(q, steps, preco_folha) <= crossover.digital_totals(q, paper_yield, preco_impressao, preco_folha)
+    return tuple(int(x) for x in q[1:][offset_vence[1:] != offset_vence[:-1]])
+
+def test_viradas_iguais_a_forca_bruta(tabelas):
+    steps, yield_index, price_book = tabelas
+    comparados = 0
+    for (paper, produto), paper_yield in yield_index.items():
+        preco_folha = price_book.price(paper)
+        if produto != PRODUTO or preco_folha is None:
+            continue
+        for digital_type in TIPOS_DIGITAIS:
+            virada = crossover.find_crossovers(PRODUTO, paper, steps, paper_yield, preco_folha, digital_type=digital_type)
+            if virada is None:
+                continue
+            comparados += 1
+            assert virada.viradas == _viradas_forca_bruta(steps, paper_yield, preco_folha, digital_type), (paper, digital_type)
+    assert comparados > 0
+
+def test_janela_do_offset_no_fim_do_degrau(tabelas):
+    # O Offset vence só no fim de um degrau e volta a perder no início do seguinte
+    steps, yield_index, price_book = tabelas
+    paper = "Reciclato 75G 66 X 96"
+    virada = crossover.find_crossovers(PRODUTO, paper, steps, yield_index[(paper, PRODUTO)], price_book.price(paper),
+                                       digital_type="Digital 1/1")
+    assert virada.viradas == (2903, 3001, 3396)
@@ -2,14 +2,23 @@
 """
 Módulo para componentes de UI reutilizáveis do Streamlit.
 Agora com validação de formulários e busca de CEP por API.
+
+O formulário de login depende deste módulo, então ele não importa nada pesado
+no topo: cálculos, descrições, PDF e HTTP são importados dentro das funções
+que os usam, na primeira vez que a página correspondente é aberta.
 """
 import streamlit as st
 import pandas as pd
 import storage
 import config
+import auth
+import perf
+import budget_fields
+import math
+import copy
+import os
 import re
-import requests
-import json # <-- Importamos a nova biblioteca
+from datetime import datetime
 
 # ================== CONSTANTES E FUNÇÕES AUXILIARES ==================
 
@@ -45,6 +54,8 @@ def format_telefone(telefone):
 
 def get_address_from_cep(cep):
     """Busca o endereço correspondente a um CEP usando a API ViaCEP."""
+    import requests
+
     cep_digits = re.sub(r'\D', '', cep)
     if len(cep_digits) != 8:
         return None, "CEP inválido. Deve conter 8 dígitos."
@@ -193,41 +204,46 @@ def display_client_registration_form():
                 df_clientes[col] = df_clientes[col].astype(str)
     st.dataframe(df_clientes, width='stretch')
 
-def display_history_page():
-    st.title("📜 Meu Histórico de Orçamentos")
-    import os
-    from generate_ordem_prototipo import generate_ordem_prototipo_pdf
-    from datetime import datetime
-
-    user_history = st.session_state.df_orcamentos[
-        st.session_state.df_orcamentos["Usuario"] == st.session_state.username
-    ].copy()
+def build_history_tables(df_orcamentos: pd.DataFrame, username: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Orçamentos do usuário (status preenchido) e a tabela exibida no histórico."""
+    user_history = df_orcamentos[df_orcamentos["Usuario"] == username].copy()
 
     # Garante que a coluna existe e preenche NaN com "Pendente"
     if "StatusOrcamento" not in user_history.columns:
         user_history["StatusOrcamento"] = "Pendente"
     user_history["StatusOrcamento"] = user_history["StatusOrcamento"].fillna("Pendente")
 
+    df_display = user_history[[
+        "NomeOrcamentista", "Cliente", "Quantidade", "Produto", "Data", "PropostaPDF", "StatusOrcamento"
+    ]].copy()
+    df_display.rename(columns={
+        "NomeOrcamentista": "Orçamentista",
+        "Cliente": "Cliente",
+        "Quantidade": "Qtd.",
+        "Produto": "Produto",
+        "Data": "Data",
+        "PropostaPDF": "Proposta PDF",
+        "StatusOrcamento": "Status"
+    }, inplace=True)
+    # CORREÇÃO: converte colunas object para número ou string
+    for col in df_display.columns:
+        try:
+            df_display[col] = pd.to_numeric(df_display[col])
+        except Exception:
+            df_display[col] = df_display[col].astype(str)
+    return user_history, df_display
+
+def budget_versions(orcamento: pd.Series) -> list:
+    """Versões anteriores salvas em VersoesJSON, seguidas da versão atual."""
+    return budget_fields.versoes(orcamento) + [{"timestamp": orcamento.get("Data", ""), "data": orcamento.to_dict()}]
+
+def display_history_page():
+    st.title("📜 Meu Histórico de Orçamentos")
+
+    user_history, df_display = build_history_tables(st.session_state.df_orcamentos, st.session_state.username)
+
     if not user_history.empty:
         st.write("### Orçamentos Criados por Você")
-        df_display = user_history[[
-            "NomeOrcamentista", "Cliente", "Quantidade", "Produto", "Data", "PropostaPDF", "StatusOrcamento"
-        ]].copy()
-        df_display.rename(columns={
-            "NomeOrcamentista": "Orçamentista",
-            "Cliente": "Cliente",
-            "Quantidade": "Qtd.",
-            "Produto": "Produto",
-            "Data": "Data",
-            "PropostaPDF": "Proposta PDF",
-            "StatusOrcamento": "Status"
-        }, inplace=True)
-        # CORREÇÃO: converte colunas object para número ou string
-        for col in df_display.columns:
-            try:
-                df_display[col] = pd.to_numeric(df_display[col])
-            except Exception:
-                df_display[col] = df_display[col].astype(str)
         st.dataframe(df_display, width='stretch', hide_index=True)
 
         # NOVA SEÇÃO: Seleção de versão para editar ou baixar proposta
@@ -237,13 +253,7 @@ def display_history_page():
             options=list(user_history.index),
             format_func=lambda i: f"{user_history.loc[i, 'Produto']} - {user_history.loc[i, 'Cliente']} ({user_history.loc[i, 'Data']})"
         )
-        versoes_json = user_history.loc[selected_idx].get("VersoesJSON", "[]")
-        try:
-            versoes = json.loads(versoes_json)
-        except Exception:
-            versoes = []
-        versoes = versoes if isinstance(versoes, list) else []
-        versoes.append({"timestamp": user_history.loc[selected_idx].get("Data", ""), "data": user_history.loc[selected_idx].to_dict()})
+        versoes = budget_versions(user_history.loc[selected_idx])
         versao_labels = [f"Versão {i+1} - {v['timestamp']}" for i, v in enumerate(versoes)]
         versao_idx = st.selectbox(
             "Escolha a versão:",
@@ -309,7 +319,7 @@ def display_history_page():
                 with cols[idx]:
                     if btn == "editar":
                         if st.button("Editar esta versão", key=f"editar_{id_orcamento}_details"):
-                            selecoes = json.loads(versoes[versao_idx]["data"].get("SelecoesJSON", "{}"))
+                            selecoes = copy.deepcopy(budget_fields.selecoes(versoes[versao_idx]["data"]))
                             for key, value in selecoes.items():
                                 st.session_state[key] = value
                             st.session_state['selected_client'] = versoes[versao_idx]["data"].get('Cliente', '')
@@ -324,7 +334,7 @@ def display_history_page():
                             ]:
                                 if extra_key in selecoes:
                                     st.session_state[extra_key] = selecoes[extra_key]
-                            st.session_state['ajustes'] = json.loads(versoes[versao_idx]["data"].get('AjustesJSON', '[]'))
+                            st.session_state['ajustes'] = copy.deepcopy(budget_fields.ajustes(versoes[versao_idx]["data"]))
                             st.session_state['editing_id'] = versoes[versao_idx]["data"].get('ID', '')
                             st.session_state['edit_loaded'] = True
                             st.session_state['page'] = "Orçamento"
@@ -386,8 +396,6 @@ def display_history_page():
                     elif btn == "ordem":
                         if st.button("Gerar Ordem de Protótipo", key=f"gerar_ordem_prototipo_{id_orcamento}"):
                             from generate_ordem_prototipo import generate_ordem_prototipo_pdf
-                            import os
-                            from datetime import datetime
                             proposta_data = {
                                 "data": datetime.now().strftime("%d/%m/%Y"),
                                 "cliente": orcamento_selecionado.get("Cliente", ""),
@@ -435,168 +443,10 @@ def display_history_page():
 # Função utilitária para montar descrição técnica do protótipo
 def _monta_descricao_prototipo(orcamento):
     """Gera uma descrição técnica a partir do JSON dos itens escolhidos no orçamento."""
-    import json
-    selecoes_json = orcamento.get("SelecoesJSON", "{}")
-    try:
-        selecoes = json.loads(selecoes_json)
-    except Exception:
-        selecoes = {}
-    # Estrutura de seções conforme o PDF
-    secoes = {
-        "Capa": [],
-        "Guarda": [],
-        "Miolo": [],
-        "Bolsa": [],
-        "Divisória": [],
-        "DIVISORIA": [],
-        "Adesivo": [],
-        "ELASTICO": [],
-        "FITA DE CETIM": [],
-        "FERRAGEM": [],
-        "ILHOS": [],
-        "PENDENTE": [],
-        "REBITE": [],
-        "SACO ADESIVADO": [],
-        "WIRE-O": [],
-        "PAPELAO": [],
-        "Acabamento": []
-    }
-    import json
-    selecoes_json = orcamento.get("SelecoesJSON", "{}")
-    try:
-        selecoes = json.loads(selecoes_json)
-    except Exception:
-        selecoes = {}
-
-    # Agrupa os itens por seção, mostrando todos os selecionados relevantes sem repetições
-    for k, v in selecoes.items():
-        k_clean = k.replace('cd_', '').replace('util_', '').replace('sel', '').strip().capitalize()
-        if isinstance(v, dict):
-            for subk, subv in v.items():
-                if str(subv).strip() != 'Nenhum':
-                    if 'capa' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Capa']:
-                            secoes['Capa'].append(f"{subk}: {subv}")
-                    elif 'guarda' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Guarda']:
-                            secoes['Guarda'].append(f"{subk}: {subv}")
-                    elif 'miolo' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Miolo']:
-                            secoes['Miolo'].append(f"{subk}: {subv}")
-                    elif 'bolsa' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Bolsa']:
-                            secoes['Bolsa'].append(f"{subk}: {subv}")
-                    elif 'Divisoria' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Divisória']:
-                            secoes['Divisória'].append(f"{subk}: {subv}")
-                    elif 'Divisória' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Divisória']:
-                            secoes['Divisória'].append(f"{subk}: {subv}")        
-                    elif 'DIVISORIA' in k_clean.upper():
-                        if f"{subk}: {subv}" not in secoes['Divisória']:
-                            secoes['Divisória'].append(f"{subk}: {subv}")        
-                    elif 'adesivo' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Adesivo']:
-                            secoes['Adesivo'].append(f"{subk}: {subv}")
-                    elif 'ferragem' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['FERRAGEM']:
-                            secoes['FERRAGEM'].append(f"{subk}: {subv}")
-                    elif 'ilhos' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['ILHOS']:
-                            secoes['ILHOS'].append(f"{subk}: {subv}")
-                    elif 'pendente' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['PENDENTE']:                                        
-                            secoes['PENDENTE'].append(f"{subk}: {subv}")
-                    elif 'rebite' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['REBITE']:
-                            secoes['REBITE'].append(f"{subk}: {subv}")
-                    elif 'saco adesivado' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['SACO ADESIVADO']:                
-                            secoes['SACO ADESIVADO'].append(f"{subk}: {subv}")
-                    elif 'wire-o' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['WIRE-O']:
-                            secoes['WIRE-O'].append(f"{subk}: {subv}")        
-                    elif 'elastico' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['ELASTICO']:
-                            secoes['ELASTICO'].append(f"{subk}: {subv}")
-                    elif 'cetim' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['FITA DE CETIM']:
-                            secoes['FITA DE CETIM'].append(f"{subk}: {subv}")
-                    elif 'papelao' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['PAPELAO']:
-                            secoes['PAPELAO'].append(f"{subk}: {subv}")
-                    elif 'acabamento' in k_clean.lower():
-                        if f"{subk}: {subv}" not in secoes['Acabamento']:
-                            secoes['Acabamento'].append(f"{subk}: {subv}")
-        else:
-            if str(v).strip() != 'Nenhum':
-                if 'capa' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Capa']:
-                        secoes['Capa'].append(f"{k_clean}: {v}")
-                elif 'guarda' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Guarda']:
-                        secoes['Guarda'].append(f"{k_clean}: {v}")
-                elif 'miolo' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Miolo']:
-                        secoes['Miolo'].append(f"{k_clean}: {v}")
-                elif 'bolsa' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Bolsa']:
-                        secoes['Bolsa'].append(f"{k_clean}: {v}")
-                elif 'Divisoria' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Divisória']:
-                        secoes['Divisória'].append(f"{k_clean}: {v}")
-                elif 'DIVISORIA' in k_clean.upper():
-                    if f"{k_clean}: {v}" not in secoes['Divisória']:
-                        secoes['Divisória'].append(f"{k_clean}: {v}") 
-                elif 'Divisória' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Divisória']:
-                        secoes['Divisória'].append(f"{k_clean}: {v}")             
-                elif 'adesivo' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Adesivo']:
-                        secoes['Adesivo'].append(f"{k_clean}: {v}")
-                elif 'ferragem' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['FERRAGEM']:
-                        secoes['FERRAGEM'].append(f"{k_clean}: {v}")
-                elif 'ilhos' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['ILHOS']:
-                        secoes['ILHOS'].append(f"{k_clean}: {v}")
-                elif 'pendente' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['PENDENTE']:                                        
-                        secoes['PENDENTE'].append(f"{k_clean}: {v}")
-                elif 'rebite' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['REBITE']:
-                        secoes['REBITE'].append(f"{k_clean}: {v}")
-                elif 'saco adesivado' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['SACO ADESIVADO']:                
-                        secoes['SACO ADESIVADO'].append(f"{k_clean}: {v}")
-                elif 'wire-o' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['WIRE-O']:
-                        secoes['WIRE-O'].append(f"{k_clean}: {v}")        
-                elif 'elastico' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['ELASTICO']:
-                        secoes['ELASTICO'].append(f"{k_clean}: {v}")
-                elif 'cetim' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['FITA DE CETIM']:
-                        secoes['FITA DE CETIM'].append(f"{k_clean}: {v}")
-                elif 'papelao' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['PAPELAO']:
-                        secoes['PAPELAO'].append(f"{k_clean}: {v}")
-                elif 'acabamento' in k_clean.lower():
-                    if f"{k_clean}: {v}" not in secoes['Acabamento']:
-                        secoes['Acabamento'].append(f"{k_clean}: {v}")
-
-    # Monta o texto final igual ao PDF
-    descricao_final = []
-    for secao, itens in secoes.items():
-        if itens:
-            descricao_final.append(f"{secao}:")
-            descricao_final.extend(itens)
-            descricao_final.append("")
-
-    # Se não houver nada, retorna nome do produto
-    if not descricao_final:
-        return orcamento.get("Produto", "")
-    return "\n".join(descricao_final)
+    import descriptions
+    return descriptions.prototype_description(
+        orcamento.get("ID", ""), orcamento.get("SelecoesJSON", "{}"), orcamento.get("Produto", "")
+    )
             # ...existing code for ajustes_json, ajustes_lista, etc...
 
 # ...existing code...
@@ -644,10 +494,11 @@ def render_component_selector(component_type: str, df_items: pd.DataFrame, paper
         
     return result
 
-def render_direct_purchase_selector(category: str, items: list, wireo_map: dict) -> dict:
+def render_direct_purchase_selector(category: str, items: list, wireo_map: dict, budget_quantity: int = 1) -> dict:
     """
     Renderiza um seletor genérico para itens de compra direta.
-    Retorna um dicionário com o custo calculado e detalhes.
+    Retorna um dicionário com o custo calculado, detalhes e a linha de custo
+    (calc.CostLine, ou None se nada tiver custo).
     """
     st.markdown(f"##### {category}")
     item_names = [item['NomeLimpo'] for item in items]
@@ -655,41 +506,29 @@ def render_direct_purchase_selector(category: str, items: list, wireo_map: dict)
 
     selected_item = st.selectbox(f"Selecione:", options, key=f"cd_{category}", label_visibility="collapsed")
 
-    cost_info = {"cost": 0.0, "details": "Nenhum", "util": 1.0}
-
+    util, val_unit = 1.0, 1.0
     if selected_item == "Personalizado":
         val_unit = st.number_input(f"Valor unitário pers.", min_value=0.0, value=1.0, key=f"vu_{category}", step=0.1)
         util = st.number_input(f"Aproveitamento", min_value=0.01, value=1.0, step=0.01, key=f"util_cd_{category}")
-        cost_info["cost"] = val_unit * util
-        cost_info["details"] = f"Personalizado (R$ {val_unit:.2f} * {util}) = R$ {cost_info['cost']:.4f}"
-        cost_info["util"] = util
-
-    elif selected_item != "Nenhum":
-        item_data = next((i for i in items if i['NomeLimpo'] == selected_item), None)
-        if item_data:
-            price = item_data['VALOR_UNITARIO']
-            last_nf = item_data['ULTIMA_NF']
-
-            if category == "WIRE-O":
-                qty_box = wireo_map.get(selected_item, 6000)
-                rings = st.number_input(f"Nº de anéis por unidade", min_value=1, value=30, step=1, key=f"rings_{selected_item}")
-                cost_info["cost"] = (price / qty_box) * rings if qty_box > 0 else 0
-                cost_info["util"] = rings # Para wire-o, util representa o nº de anéis
-            else:
-                util = st.number_input(f"Aproveitamento ({selected_item})", min_value=0.01, value=1.0, step=0.01, key=f"util_{selected_item}")
-                cost_info["cost"] = price * util
-                cost_info["util"] = util
-
-            cost_info["details"] = f"{selected_item} (NF: {last_nf})"
+    elif selected_item != "Nenhum" and any(i['NomeLimpo'] == selected_item for i in items):
+        if category == "WIRE-O":
+            # Para wire-o, util representa o nº de anéis
+            util = st.number_input(f"Nº de anéis por unidade", min_value=1, value=30, step=1, key=f"rings_{selected_item}")
+        else:
+            util = st.number_input(f"Aproveitamento ({selected_item})", min_value=0.01, value=1.0, step=0.01, key=f"util_{selected_item}")
 
-    return cost_info
+    import calculations as calc
+    return calc.calculate_direct_purchase_cost(
+        category, selected_item, items, budget_quantity,
+        util=util, wireo_map=wireo_map, custom_unit_price=val_unit
+    )
 
 def display_admin_panel():
     """Renderiza a página de gerenciamento de usuários, clientes, templates e orçamentos."""
     st.title("🔑 Painel de Administração")
     
     # --- ABA DE ORÇAMENTOS RESTAURADA ---
-    tab1, tab2, tab3, tab4 = st.tabs(["Gerenciar Usuários", "Gerenciar Clientes", "Gerenciar Templates", "Visualizar Orçamentos"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Gerenciar Usuários", "Gerenciar Clientes", "Gerenciar Templates", "Visualizar Orçamentos", "Desempenho"])
 
     with tab1:
         st.write("### Gerenciamento de Usuários")
@@ -708,6 +547,7 @@ def display_admin_panel():
                         if st.button("✅ Aprovar", key=f"approve_{user['usuario']}"):
                             st.session_state.df_usuarios.loc[index, 'status'] = 'ativo'
                             storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                            auth.refresh_user_index()
                             # Salva no GitHub após aprovar
                             token = storage.get_github_token()
                             if token:
@@ -723,6 +563,7 @@ def display_admin_panel():
                         if st.button("⬆️ Promover a Orcamentista", key=f"promote_orc_{user['usuario']}"):
                             st.session_state.df_usuarios.loc[index, 'role'] = 'orcamentista'
                             storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                            auth.refresh_user_index()
                             token = storage.get_github_token()
                             if token:
                                 storage.save_usuarios_to_github(st.session_state.df_usuarios, token)
@@ -736,6 +577,7 @@ def display_admin_panel():
                             if st.button("⬆️ Promover a Admin", key=f"promote_adm_{user['usuario']}"):
                                 st.session_state.df_usuarios.loc[index, 'role'] = 'admin'
                                 storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                                auth.refresh_user_index()
                                 token = storage.get_github_token()
                                 if token:
                                     storage.save_usuarios_to_github(st.session_state.df_usuarios, token)
@@ -747,6 +589,7 @@ def display_admin_panel():
                             if st.button("⬇️ Rebaixar para Usuário", key=f"demote_usr_{user['usuario']}"):
                                 st.session_state.df_usuarios.loc[index, 'role'] = 'user'
                                 storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                                auth.refresh_user_index()
                                 token = storage.get_github_token()
                                 if token:
                                     storage.save_usuarios_to_github(st.session_state.df_usuarios, token)
@@ -760,6 +603,7 @@ def display_admin_panel():
                         if st.button("❌ Desativar", key=f"deactivate_{user['usuario']}"):
                             st.session_state.df_usuarios.loc[index, 'status'] = 'inativo'
                             storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                            auth.refresh_user_index()
                             token = storage.get_github_token()
                             if token:
                                 storage.save_usuarios_to_github(st.session_state.df_usuarios, token)
@@ -773,6 +617,7 @@ def display_admin_panel():
                         if st.button("Excluir", key=f"delete_{user['usuario']}"):
                             st.session_state.df_usuarios = st.session_state.df_usuarios.drop(index=index).reset_index(drop=True)
                             storage.save_csv(st.session_state.df_usuarios, config.USERS_FILE)
+                            auth.refresh_user_index()
                             token = storage.get_github_token()
                             if token:
                                 storage.delete_usuario_from_github(user['usuario'], token)
@@ -943,7 +788,6 @@ def display_admin_panel():
                     # Botão para baixar o PDF da proposta, se existir
                     pdf_path = orcamento_selecionado_admin.get("PropostaPDF")
                     # Garante que pdf_path é string válida e não NaN/None
-                    import math
                     if pdf_path is None or (isinstance(pdf_path, float) and math.isnan(pdf_path)):
                         pdf_path = ""
                     try:
@@ -1036,8 +880,6 @@ def display_admin_panel():
                                 # ...estilo customizado removido: botão ordem...
                                 if st.button("Gerar Ordem de Protótipo", key=f"gerar_ordem_prototipo_{id_orcamento_admin}"):
                                     from generate_ordem_prototipo import generate_ordem_prototipo_pdf
-                                    import os
-                                    from datetime import datetime
                                     # Garante que orcamento_selecionado está definido
                                     orcamento_selecionado = orcamento_completo[orcamento_completo['ID'] == id_orcamento_admin].iloc[0]
                                     proposta_data = {
@@ -1082,4 +924,64 @@ def display_admin_panel():
                                                 fpdf,
                                                 file_name=os.path.basename(ordem_path),
                                                 key=f"download_ordem_{id_orcamento_admin}"
-                                            )
\ No newline at end of file
+                                            )
+
+    with tab5:
+        display_performance_tab()
+        display_memory_report()
+
+def display_performance_tab():
+    """Tempos por trecho (p50/p95) e reruns mais lentos medidos neste processo (perf.py)."""
+    st.write("### Desempenho")
+    if not perf.enabled:
+        st.info("Coleta de tempos desligada (ORCAMENTO_DESEMPENHO=0).")
+        return
+    st.caption(
+        f"Janela móvel das últimas {config.DESEMPENHO_JANELA} medições de cada trecho, neste processo do servidor. "
+        "Os loaders de dados só são medidos quando carregam de verdade (fora do cache)."
+    )
+    resumo = perf.summary_frame()
+    if resumo.empty:
+        st.info("Nenhuma medição ainda.")
+        return
+    st.dataframe(
+        resumo, width='stretch', hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ("p50 (ms)", "p95 (ms)", "Máximo (ms)")}
+    )
+
+    st.write("#### Reruns mais lentos")
+    st.dataframe(
+        perf.reruns_frame(perf.slowest_reruns(10)), width='stretch', hide_index=True,
+        column_config={"Duração (ms)": st.column_config.NumberColumn(format="%.0f")}
+    )
+
+    metricas = perf.export_text()
+    c1, c2 = st.columns(2)
+    c1.download_button("Exportar métricas (texto)", metricas, file_name="metricas_orcamento.txt", mime="text/plain")
+    if c2.button("Zerar medições"):
+        perf.reset()
+        st.rerun()
+    with st.expander("Métricas em texto"):
+        st.code(metricas, language="text")
+
+def display_memory_report():
+    """Memória das tabelas de compras e componentes antes e depois da compactação (data_services.memory_report)."""
+    st.write("#### Memória das tabelas de referência")
+    st.caption(
+        "Antes: tabela limpa com todas as colunas do CSV. Depois: como fica em cache, só com as colunas usadas, "
+        "nomes repetidos como categoria e inteiros reduzidos. A medição relê as fontes."
+    )
+    if not st.button("Medir memória das tabelas"):
+        return
+    import data_services as ds
+    try:
+        relatorio = ds.memory_report()
+    except Exception as e:
+        st.error(f"❌ Falha ao medir a memória das tabelas: {e}")
+        return
+    st.dataframe(
+        relatorio, width='stretch', hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ("Antes (KB)", "Depois (KB)", "Redução (%)")}
+    )
+    antes, depois = relatorio["Antes (KB)"].sum(), relatorio["Depois (KB)"].sum()
+    st.caption(f"Total: {antes:,.1f} KB → {depois:,.1f} KB")
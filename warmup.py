@@ -0,0 +1,87 @@
+# orcamento_pro/warmup.py
+"""
+Aquecimento das tabelas de referência em segundo plano.
+
+    warmup.start()   # depois do formulário de login; só a primeira chamada do processo faz algo
+
+A primeira execução do app inicia uma thread que carrega e processa todas as
+tabelas de data_services.reference_table_loaders() enquanto o usuário ainda
+está na tela de login. Depois ela volta a consultar cada tabela a cada metade
+de config.REFERENCIA_TTL_S: como os loaders usam refresh_mode="background",
+a consulta a uma tabela vencida devolve a versão em cache e dispara a
+recarga em segundo plano, e a tabela nunca chega a expirar de vez na frente
+de um usuário.
+
+Cargas simultâneas da mesma tabela fria (esta thread e sessões, ou várias
+sessões) acontecem uma vez só: o cache do Streamlit tem uma trava por chave
+e quem chega depois espera o resultado da carga em andamento. Enquanto a
+primeira rodada não termina, a página de orçamento mostra o progresso em vez
+de esperar dentro do rerun (ver app.budget_page).
+"""
+import threading
+import time
+
+import config
+import perf
+
+_lock = threading.Lock()
+_thread = None
+_first_pass = threading.Event()
+_total = 0
+_loaded = 0
+_errors = {}  # tabela -> mensagem da última falha (a sessão tenta de novo e mostra o erro)
+
+def start() -> bool:
+    """Inicia a thread de aquecimento, uma vez por processo. True só na chamada que a iniciou."""
+    global _thread
+    if not config.AQUECIMENTO_ATIVO or _thread is not None:
+        return False
+    with _lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_run, name="aquecimento", daemon=True)
+        _thread.start()
+    return True
+
+def _load_all(loaders: dict):
+    global _loaded
+    for label, loader in loaders.items():
+        try:
+            with perf.span(f"aquecimento.{label}"):
+                loader()
+            _errors.pop(label, None)
+        except Exception as e:
+            _errors[label] = f"{type(e).__name__}: {e}"
+        if not _first_pass.is_set():
+            with _lock:
+                _loaded += 1
+
+def _run():
+    global _total
+    import data_services as ds  # aqui, e não no topo: não atrasa a tela de login
+
+    loaders = ds.reference_table_loaders()
+    _total = len(loaders)
+    try:
+        _load_all(loaders)
+    finally:
+        _first_pass.set()
+    while True:
+        time.sleep(config.REFERENCIA_TTL_S / 2)
+        _load_all(loaders)
+
+def ready() -> bool:
+    """True quando a primeira rodada terminou (ou quando não há aquecimento rodando)."""
+    return _thread is None or _first_pass.is_set()
+
+def wait(timeout: float = None) -> bool:
+    """Espera a primeira rodada terminar (para scripts e testes de carga)."""
+    return _thread is None or _first_pass.wait(timeout)
+
+def progress() -> tuple:
+    """(tabelas carregadas, total) da primeira rodada; o total é 0 até a thread listar as tabelas."""
+    return _loaded, _total
+
+def errors() -> dict:
+    """Tabelas cuja última carga em segundo plano falhou, com a mensagem do erro."""
+    return dict(_errors)